@@ -0,0 +1,96 @@
+"""
+Benchmark dense recall backends: recall@k of IVF vs exact search, and latency.
+
+Usage:
+  python Paper-KG-Pipeline/scripts/dev/bench_dense_recall.py                       # synthetic clustered data
+  python Paper-KG-Pipeline/scripts/dev/bench_dense_recall.py --index-dir <recall_index_dir> --kind paper
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from idea2paper.infra.index_segments import base_paths
+from idea2paper.infra.index_store import EmbeddingMatrix, encode_embeddings, load_embeddings
+from idea2paper.recall.dense_search import ExactDenseSearcher, IVFDenseSearcher
+
+
+def _synthetic(n: int, dim: int, clusters: int, noise: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    mat = centers[rng.integers(0, clusters, size=n)] + noise * rng.standard_normal((n, dim)).astype(np.float32)
+    mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat
+
+
+def _time_queries(searcher, queries, k):
+    results = []
+    start = time.perf_counter()
+    for q in queries:
+        idxs, _ = searcher.search(q, k)
+        results.append(idxs)
+    elapsed = (time.perf_counter() - start) * 1000 / max(1, len(queries))
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--kind", default="paper", choices=["idea", "paper"])
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=1.5)
+    parser.add_argument("--emb-dtype", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", default="1,4,8,16,32")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.index_dir:
+        index_dir = Path(args.index_dir)
+        manifest = json.loads((index_dir / f"{args.kind}_manifest.json").read_text(encoding="utf-8"))
+        matrix = load_embeddings(base_paths(index_dir, args.kind, manifest)[0], manifest)
+        source = f"{index_dir} ({args.kind}, {manifest.get('emb_dtype', 'float32')})"
+    else:
+        data, scale = encode_embeddings(_synthetic(args.n, args.dim, args.clusters, args.noise, args.seed), args.emb_dtype)
+        matrix = EmbeddingMatrix(data, scale)
+        source = f"synthetic n={args.n} dim={args.dim} ({args.emb_dtype})"
+
+    rng = np.random.default_rng(args.seed + 1)
+    q_rows = rng.choice(len(matrix), size=min(args.queries, len(matrix)), replace=False)
+    queries = matrix.rows(q_rows) + 0.05 * rng.standard_normal((len(q_rows), matrix.shape[1])).astype(np.float32)
+    k = min(args.k, len(matrix))
+
+    print(f"source: {source}")
+    print(f"queries={len(queries)} k={k}")
+
+    exact = ExactDenseSearcher(matrix)
+    truth, exact_ms = _time_queries(exact, queries, k)
+    print(f"{'backend':<18}{'recall@k':>10}{'ms/query':>12}")
+    print(f"{'exact':<18}{1.0:>10.4f}{exact_ms:>12.2f}")
+
+    start = time.perf_counter()
+    ivf = IVFDenseSearcher.train(matrix, n_lists=args.nlist, seed=args.seed)
+    train_sec = time.perf_counter() - start
+    print(f"(ivf train: n_lists={ivf.n_lists}, {train_sec:.2f}s)")
+    for nprobe in [int(x) for x in args.nprobe.split(",") if x.strip()]:
+        ivf.nprobe = nprobe
+        approx, ivf_ms = _time_queries(ivf, queries, k)
+        hits = [len(set(a.tolist()) & set(t.tolist())) / max(1, len(t)) for a, t in zip(approx, truth)]
+        print(f"{'ivf nprobe=' + str(nprobe):<18}{float(np.mean(hits)):>10.4f}{ivf_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
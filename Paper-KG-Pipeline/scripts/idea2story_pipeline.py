@@ -254,15 +254,27 @@ def main():
         print("\n🔍 运行召回系统...")
         print("-" * 80)
 
-        # 【优化】直接使用 RecallSystem 类（支持两阶段召回，大幅提速）
-        from recall_system import RecallSystem
+        # 常驻索引服务可用时直接查询，省去节点/图谱/索引加载
+        from idea2paper.infra.index_service import get_service_client, replay_events
+        service = get_service_client(logger)
+        remote = service.recall(user_idea) if service else None
+
+        if remote is not None:
+            print(f"  ✓ 使用常驻索引服务: {service.base_url}")
+            print(remote.get("log", ""), end="")
+            replay_events(logger, remote.get("events"))
+            recall_results = [tuple(r) for r in remote.get("results") or []]
+            recall_audit = remote.get("audit")
+        else:
+            # 【优化】直接使用 RecallSystem 类（支持两阶段召回，大幅提速）
+            from recall_system import RecallSystem
 
-        print("  初始化召回系统...")
-        recall_system = RecallSystem()
+            print("  初始化召回系统...")
+            recall_system = RecallSystem()
 
-        print("\n  执行三路召回（优化版，支持两阶段加速）...")
-        recall_results = recall_system.recall(user_idea, verbose=True)
-        recall_audit = getattr(recall_system, "last_audit", None)
+            print("\n  执行三路召回（优化版，支持两阶段加速）...")
+            recall_results = recall_system.recall(user_idea, verbose=True)
+            recall_audit = getattr(recall_system, "last_audit", None)
 
         # 【关键修复】加载完整的 patterns_structured.json 以合并数据
         patterns_structured_file = OUTPUT_DIR / "patterns_structured.json"
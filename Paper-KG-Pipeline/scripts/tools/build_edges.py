@@ -7,6 +7,7 @@
 """
 
 import json
+import sys
 from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
@@ -20,6 +21,11 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 SCRIPTS_DIR = SCRIPT_DIR.parent
 PROJECT_ROOT = SCRIPTS_DIR.parent
 OUTPUT_DIR = PROJECT_ROOT / "output"
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from idea2paper.recall.paper_quality import PaperQualityTable
 
 # 输入文件
 NODES_IDEA = OUTPUT_DIR / "nodes_idea.json"
@@ -70,6 +76,9 @@ class EdgeBuilder:
         print(f"  ✓ Paper: {len(self.papers)} 个")
         print(f"  ✓ Review: {len(self.reviews)} 条")
 
+        # Paper 质量按行预计算一次（建边使用 edge_quality 列，与原 _get_paper_quality 口径一致）
+        self.paper_quality = PaperQualityTable.from_papers(self.papers)
+
         # 构建映射索引
         self._build_indices()
 
@@ -138,9 +147,9 @@ class EdgeBuilder:
         """构建 Paper 的基础连接边"""
         print("\n📄 构建 Paper 基础连接边...")
 
-        for paper in self.papers:
+        for row, paper in enumerate(self.papers):
             paper_id = paper['paper_id']
-            paper_quality = self._get_paper_quality(paper)
+            paper_quality = float(self.paper_quality.edge_quality[row])
 
             # 1. Paper -[implements]-> Idea
             idea_id = paper.get('idea_id', '')
@@ -266,49 +275,43 @@ class EdgeBuilder:
         """
         print("\n🌍 构建 Pattern -[works_well_in]-> Domain 效果边...")
 
-        for pattern in self.patterns:
-            pattern_id = pattern['pattern_id']
-
-            # 统计每个 Domain 中使用该 Pattern 的 Paper
-            domain_stats = defaultdict(lambda: {'papers': [], 'qualities': []})
+        quality = self.paper_quality.edge_quality
 
-            for paper in self.papers:
-                # V3: Paper 有 pattern_id 字段（单个）
-                if paper.get('pattern_id', '') != pattern_id:
-                    continue
+        # 按 Pattern / Domain 分组 Paper 行号（只遍历一次 Paper）
+        pattern_rows = defaultdict(list)
+        domain_rows = defaultdict(list)
+        for row, paper in enumerate(self.papers):
+            pattern_rows[paper.get('pattern_id', '')].append(row)
+            domain_rows[paper.get('domain_id', '')].append(row)
+        # 领域基线 = 该 Domain 全部 Paper 的平均质量
+        domain_baselines = {domain_id: np.mean(quality[rows]) for domain_id, rows in domain_rows.items()}
 
-                paper_quality = self._get_paper_quality(paper)
-                # V3: Paper 有 domain_id 字段
-                domain_id = paper.get('domain_id', '')
+        for pattern in self.patterns:
+            pattern_id = pattern['pattern_id']
 
+            # 统计每个 Domain 中使用该 Pattern 的 Paper（V3: Paper 有 pattern_id / domain_id 字段）
+            domain_stats = defaultdict(list)
+            for row in pattern_rows.get(pattern_id, []):
+                domain_id = self.papers[row].get('domain_id', '')
                 if domain_id:
-                    domain_stats[domain_id]['papers'].append(paper['paper_id'])
-                    domain_stats[domain_id]['qualities'].append(paper_quality)
+                    domain_stats[domain_id].append(row)
 
             # 为每个 Domain 创建 works_well_in 边
-            for domain_id, stats in domain_stats.items():
-                if not stats['papers']:
-                    continue
-
+            for domain_id, rows in domain_stats.items():
                 # 计算平均质量
-                qualities = stats['qualities']
-                avg_quality = np.mean(qualities)
+                avg_quality = np.mean(quality[rows])
 
-                # 计算领域基线
+                # 领域基线
                 domain = self.domain_id_to_domain.get(domain_id)
                 if not domain:
                     continue
-
-                # V3: 根据 domain_id 筛选 Paper
-                domain_papers = [p for p in self.papers
-                                if p.get('domain_id', '') == domain_id]
-                domain_baseline = np.mean([self._get_paper_quality(p) for p in domain_papers]) if domain_papers else 0.7
+                domain_baseline = domain_baselines[domain_id]
 
                 # 效果 = 平均质量 - 基线
                 effectiveness = avg_quality - domain_baseline
 
                 # 频率
-                frequency = len(stats['papers'])
+                frequency = len(rows)
 
                 # 置信度 (样本数越多越可信)
                 confidence = min(frequency / 20, 1.0)
@@ -340,6 +343,8 @@ class EdgeBuilder:
         """
         print("\n🔗 构建 Idea -[similar_to_paper]-> Paper 边...")
 
+        quality = self.paper_quality.edge_quality
+
         for idea in self.ideas:
             idea_id = idea['idea_id']
             idea_desc = idea.get('description', '')
@@ -350,7 +355,7 @@ class EdgeBuilder:
             # 与所有 Paper 计算相似度
             similarities = []
 
-            for paper in self.papers:
+            for row, paper in enumerate(self.papers):
                 paper_id = paper['paper_id']
                 # V3: Paper 的 idea 字段是字符串，而不是字典
                 paper_idea = paper.get('idea', '')
@@ -365,7 +370,7 @@ class EdgeBuilder:
                 if similarity < 0.1:
                     continue
 
-                paper_quality = self._get_paper_quality(paper)
+                paper_quality = float(quality[row])
                 combined_weight = similarity * paper_quality
 
                 similarities.append({
@@ -394,22 +399,6 @@ class EdgeBuilder:
 
     # ===================== 辅助函数 =====================
 
-    def _get_paper_quality(self, paper: Dict) -> float:
-        """计算 Paper 的综合质量分数
-
-        基于 review 的评分，归一化到 [0, 1]
-        """
-        # V3: 使用 review_stats 中的 avg_score
-        review_stats = paper.get('review_stats', {})
-        avg_score = review_stats.get('avg_score', 0.5)
-
-        # 如果没有 review 数据，返回默认值
-        if avg_score == 0.5 and review_stats.get('review_count', 0) == 0:
-            return 0.5
-
-        # avg_score 已经被归一化到 [0, 1]
-        return min(max(avg_score, 0.0), 1.0)
-
     def _compute_text_similarity(self, text1: str, text2: str) -> float:
         """计算两段文本的简单相似度
 
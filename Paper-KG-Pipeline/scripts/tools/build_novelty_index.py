@@ -4,20 +4,24 @@ Build novelty index offline (batch + resume).
 Usage:
   python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py
   python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py --batch-size 32 --resume
+  python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py --batch-size 32 --max-workers 8
   python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py --force-rebuild
+  python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py --force-rebuild --emb-dtype float16
+  python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py --compact
+
+When nodes_paper.json changed since the last build, only new/changed papers are embedded
+into a delta segment and removed ids are tombstoned (see idea2paper.infra.index_segments).
 """
 
 import argparse
 import json
 import os
 import sys
-import time
 import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict
 
-import numpy as np
 from tqdm import tqdm
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -41,23 +45,30 @@ from idea2paper.config import (
     NOVELTY_INDEX_BUILD_RESUME,
     NOVELTY_INDEX_BUILD_MAX_RETRIES,
     NOVELTY_INDEX_BUILD_SLEEP_SEC,
+    NOVELTY_INDEX_BUILD_MAX_WORKERS,
+    INDEX_EMB_DTYPE,
+    INDEX_DELTA_ENABLE,
+    INDEX_DELTA_MAX_SEGMENTS,
+    INDEX_DELTA_COMPACT_RATIO,
+)
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.index_build import embed_to_parts, merge_parts, read_done_meta, reconcile_parts
+from idea2paper.infra.index_store import EMB_DTYPES, manifest_emb_dtype, scale_path_for
+from idea2paper.infra.index_segments import (
+    base_paths,
+    commit_delta,
+    compact_index,
+    has_deltas,
+    live_meta,
+    needs_compaction,
+    next_delta_segment,
+    remove_stale_segments,
+    segments_complete,
+    write_manifest,
 )
 from idea2paper.novelty.novelty_index import build_paper_text
-from idea2paper.infra.embeddings import get_embeddings_batch, EMBEDDING_MODEL
-
-
-def _file_hash(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
-def _normalize_matrix(mat: np.ndarray) -> np.ndarray:
-    norms = np.linalg.norm(mat, axis=1, keepdims=True)
-    norms[norms == 0] = 1.0
-    return mat / norms
+from idea2paper.application.novelty.lexical_index import load_or_build_bm25
+from idea2paper.infra.embeddings import EMBEDDING_MODEL
 
 
 def _load_nodes_paper(path: Path) -> List[Dict]:
@@ -65,51 +76,13 @@ def _load_nodes_paper(path: Path) -> List[Dict]:
         return json.load(f)
 
 
-def _read_done_ids(meta_path: Path) -> set:
-    done = set()
-    if not meta_path.exists():
-        return done
-    with meta_path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-                pid = obj.get("paper_id")
-                if pid:
-                    done.add(pid)
-            except Exception:
-                continue
-    return done
-
-
-def _next_part_index(index_dir: Path) -> int:
-    parts = sorted(index_dir.glob("paper_emb.part_*.npy"))
-    if not parts:
-        return 0
-    last = parts[-1].stem  # paper_emb.part_XXXX
+def _load_manifest(path: Path):
+    if not path.exists():
+        return None
     try:
-        return int(last.split("_")[-1]) + 1
+        return json.loads(path.read_text(encoding="utf-8"))
     except Exception:
-        return len(parts)
-
-
-def _merge_parts(index_dir: Path, emb_path: Path):
-    parts = sorted(index_dir.glob("paper_emb.part_*.npy"))
-    if not parts:
-        return
-    mats = []
-    for p in parts:
-        mats.append(np.load(p))
-    mat = np.vstack(mats) if mats else np.zeros((0, 0), dtype=np.float32)
-    np.save(emb_path, mat)
-    # cleanup part files after successful merge
-    for p in parts:
-        try:
-            p.unlink()
-        except Exception:
-            pass
+        return None
 
 
 def build_novelty_index(
@@ -120,6 +93,8 @@ def build_novelty_index(
     sleep_sec: float,
     force_rebuild: bool,
     logger=None,
+    emb_dtype: str = INDEX_EMB_DTYPE,
+    max_workers: int = NOVELTY_INDEX_BUILD_MAX_WORKERS,
 ):
     index_dir = Path(index_dir)
     index_dir.mkdir(parents=True, exist_ok=True)
@@ -131,7 +106,7 @@ def build_novelty_index(
     if not nodes_paper_path.exists():
         raise FileNotFoundError(f"nodes_paper.json not found: {nodes_paper_path}")
 
-    current_hash = _file_hash(nodes_paper_path)
+    current_hash = fingerprint(nodes_paper_path)
 
     if force_rebuild:
         for p in index_dir.glob("*"):
@@ -141,53 +116,54 @@ def build_novelty_index(
                 except Exception:
                     pass
 
-    if emb_path.exists() and meta_path.exists() and manifest_path.exists() and not force_rebuild:
-        return {"ok": True, "skipped": 0, "index_dir": str(index_dir), "already_exists": True}
+    # 增量模式: nodes 变化时在已有索引之上追加 delta 段，只embedding新增/文本变更的Paper
+    base_manifest = None
+    existing = None if force_rebuild else _load_manifest(manifest_path)
+    if manifest_path.exists() and not force_rebuild and all(
+        p.exists() for p in base_paths(index_dir, "paper", existing)
+    ):
+        base_manifest = existing
+        if (
+            not INDEX_DELTA_ENABLE
+            or base_manifest is None
+            or base_manifest.get("nodes_paper_hash") == current_hash
+            or base_manifest.get("embedding_model") != EMBEDDING_MODEL
+            or not segments_complete(index_dir, "paper", base_manifest)
+        ):
+            return {"ok": True, "skipped": 0, "index_dir": str(index_dir), "already_exists": True}
+
+    prefix = "paper"
+    live = {}
+    if base_manifest is not None:
+        live = live_meta(index_dir, "paper", base_manifest, "paper_id")
+        segment = next_delta_segment(base_manifest)
+        prefix = f"paper_{segment}"
+        meta_path = index_dir / f"{prefix}_meta.jsonl"
+        emb_path = index_dir / f"{prefix}_emb.npy"
+        emb_dtype = manifest_emb_dtype(base_manifest)
+
+    # 续建: 保留已提交的批（part 文件 + meta 行）；否则清掉上次中断留下的文件
+    if resume:
+        reconcile_parts(index_dir, prefix, meta_path, emb_path, emb_dtype)
+    else:
+        for p in [meta_path, emb_path, scale_path_for(emb_path), *index_dir.glob(f"{prefix}_emb.part_*.npy")]:
+            if p.exists():
+                p.unlink()
 
     papers = _load_nodes_paper(nodes_paper_path)
-    done_ids = _read_done_ids(meta_path) if resume else set()
-    part_idx = _next_part_index(index_dir) if resume else 0
+    done_ids = set(read_done_meta(meta_path, "paper_id")) if resume else set()
 
     if done_ids:
         print(f"↩️  Resume enabled: {len(done_ids)} already processed")
 
-    skipped = 0
     batch_texts = []
     batch_meta = []
-
-    def flush_batch(batch_texts, batch_meta, part_idx):
-        nonlocal skipped
-        if not batch_texts:
-            return part_idx
-
-        embeddings = None
-        for attempt in range(max_retries + 1):
-            embeddings = get_embeddings_batch(batch_texts, logger=logger)
-            if embeddings is not None:
-                break
-            time.sleep(sleep_sec * (attempt + 1))
-
-        if embeddings is None:
-            skipped += len(batch_meta)
-            return part_idx
-
-        mat = np.array(embeddings, dtype=np.float32)
-        mat = _normalize_matrix(mat)
-
-        part_path = index_dir / f"paper_emb.part_{part_idx:04d}.npy"
-        np.save(part_path, mat)
-        part_idx += 1
-
-        with meta_path.open("a", encoding="utf-8") as f:
-            for m in batch_meta:
-                f.write(json.dumps(m, ensure_ascii=False) + "\n")
-
-        return part_idx
-
-    for paper in tqdm(papers, desc="Processing papers"):
+    for paper in papers:
         pid = paper.get("paper_id")
         if pid in done_ids:
             continue
+        if base_manifest is not None and not pid:
+            continue  # 无id的Paper无法做增量比对
         text = build_paper_text(paper)
         meta = {
             "paper_id": pid or "",
@@ -196,33 +172,75 @@ def build_novelty_index(
             "domain": paper.get("domain", ""),
             "text_hash": hashlib.sha256(text.encode("utf-8")).hexdigest()
         }
+        if live.get(pid, {}).get("text_hash") == meta["text_hash"]:
+            continue
         batch_texts.append(text)
         batch_meta.append(meta)
 
-        if len(batch_texts) >= batch_size:
-            part_idx = flush_batch(batch_texts, batch_meta, part_idx)
-            batch_texts, batch_meta = [], []
-            time.sleep(sleep_sec)
+    # 多个批请求并发在途，每批完成即落盘（part 文件 + meta 行），中断后可续建
+    with tqdm(total=len(batch_texts), desc="Embedding papers") as progress:
+        processed, skipped = embed_to_parts(
+            index_dir, prefix, meta_path, batch_texts, batch_meta,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            max_retries=max_retries,
+            sleep_sec=sleep_sec,
+            logger=logger,
+            progress=progress,
+        )
+    merge_parts(index_dir, prefix, emb_path, emb_dtype)
+
+    if base_manifest is not None:
+        current_ids = {paper.get("paper_id") for paper in papers}
+        removed = [pid for pid in live if pid not in current_ids]
+        manifest = commit_delta(index_dir, "paper", base_manifest, segment, "paper_id", removed)
+        print(f"↪️  Delta: +{processed} embedded, -{len(removed)} tombstoned, {len(manifest['deltas'])} segment(s)")
+        if needs_compaction(manifest, INDEX_DELTA_MAX_SEGMENTS, INDEX_DELTA_COMPACT_RATIO):
+            manifest = compact_index(index_dir, "paper", manifest, "paper_id")
+            print(f"🗜️  Compacted -> {manifest['index_count']} rows")
+        manifest.update({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "paper_count": len(papers),
+            "skipped": skipped,
+            "nodes_paper_hash": current_hash,
+        })
+    else:
+        index_count = 0
+        if meta_path.exists():
+            with meta_path.open("r", encoding="utf-8") as f:
+                index_count = sum(1 for _ in f if _.strip())
+
+        manifest = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "embedding_model": EMBEDDING_MODEL,
+            "paper_count": len(papers),
+            "index_count": index_count,
+            "rows": index_count,
+            "skipped": skipped,
+            "nodes_paper_hash": current_hash,
+            "emb_dtype": emb_dtype,
+        }
+    write_manifest(manifest_path, manifest)
+    remove_stale_segments(index_dir, "paper", manifest)
 
-    part_idx = flush_batch(batch_texts, batch_meta, part_idx)
-    _merge_parts(index_dir, emb_path)
+    # BM25 词法索引（无 embedding 时的回退检索），按 nodes_paper 指纹复用
+    load_or_build_bm25(index_dir, current_hash, len(papers), lambda: [build_paper_text(p) for p in papers])
 
-    index_count = 0
-    if meta_path.exists():
-        with meta_path.open("r", encoding="utf-8") as f:
-            index_count = sum(1 for _ in f if _.strip())
+    return {"ok": True, "skipped": skipped, "index_dir": str(index_dir), "index_count": manifest["index_count"]}
 
-    manifest = {
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "embedding_model": EMBEDDING_MODEL,
-        "paper_count": len(papers),
-        "index_count": index_count,
-        "skipped": skipped,
-        "nodes_paper_hash": current_hash,
-    }
-    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    return {"ok": True, "skipped": skipped, "index_dir": str(index_dir), "index_count": index_count}
+def compact_novelty_index(index_dir: Path) -> Dict:
+    """Fold delta segments / tombstones into the base segment."""
+    index_dir = Path(index_dir)
+    manifest_path = index_dir / "index_manifest.json"
+    manifest = _load_manifest(manifest_path)
+    if manifest is None or not has_deltas(manifest):
+        return {"compacted": False}
+    manifest = compact_index(index_dir, "paper", manifest, "paper_id")
+    manifest["created_at"] = datetime.now(timezone.utc).isoformat()
+    write_manifest(manifest_path, manifest)
+    remove_stale_segments(index_dir, "paper", manifest)
+    return {"compacted": True, "index_count": manifest["index_count"]}
 
 
 def main():
@@ -233,12 +251,23 @@ def main():
     parser.add_argument("--no-resume", action="store_true", default=False)
     parser.add_argument("--force-rebuild", action="store_true", default=False)
     parser.add_argument("--max-retries", type=int, default=NOVELTY_INDEX_BUILD_MAX_RETRIES)
-    parser.add_argument("--sleep-sec", type=float, default=NOVELTY_INDEX_BUILD_SLEEP_SEC)
+    parser.add_argument("--sleep-sec", type=float, default=NOVELTY_INDEX_BUILD_SLEEP_SEC,
+                        help="min seconds between batch requests when http.embedding_rps is 0")
+    parser.add_argument("--max-workers", type=int, default=NOVELTY_INDEX_BUILD_MAX_WORKERS,
+                        help="embedding batch requests in flight (<= http.embedding_max_concurrency)")
+    parser.add_argument("--emb-dtype", choices=EMB_DTYPES, default=INDEX_EMB_DTYPE)
+    parser.add_argument("--compact", action="store_true", default=False,
+                        help="merge delta segments into the base index and exit")
     args = parser.parse_args()
 
     if args.no_resume:
         args.resume = False
 
+    if args.compact:
+        result = compact_novelty_index(Path(args.index_dir))
+        print(f"✅ Compacted: {result}")
+        return
+
     result = build_novelty_index(
         index_dir=Path(args.index_dir),
         batch_size=args.batch_size,
@@ -246,6 +275,8 @@ def main():
         max_retries=args.max_retries,
         sleep_sec=args.sleep_sec,
         force_rebuild=args.force_rebuild,
+        emb_dtype=args.emb_dtype,
+        max_workers=args.max_workers,
     )
     if result.get("already_exists"):
         print("✅ Index already exists. Use --force-rebuild to rebuild.")
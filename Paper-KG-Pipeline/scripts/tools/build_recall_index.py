@@ -5,6 +5,11 @@ Usage:
   python Paper-KG-Pipeline/scripts/tools/build_recall_index.py
   python Paper-KG-Pipeline/scripts/tools/build_recall_index.py --batch-size 32 --resume
   python Paper-KG-Pipeline/scripts/tools/build_recall_index.py --force-rebuild
+  python Paper-KG-Pipeline/scripts/tools/build_recall_index.py --force-rebuild --emb-dtype int8
+  python Paper-KG-Pipeline/scripts/tools/build_recall_index.py --compact
+
+When nodes_*.json changed since the last build, only new/changed items are embedded
+into a delta segment and removed ids are tombstoned (see idea2paper.infra.index_segments).
 """
 
 import argparse
@@ -34,9 +39,26 @@ except Exception:
     pass
 
 from idea2paper.config import (
+    INDEX_DELTA_COMPACT_RATIO,
+    INDEX_DELTA_ENABLE,
+    INDEX_DELTA_MAX_SEGMENTS,
+    INDEX_EMB_DTYPE,
     OUTPUT_DIR,
     PipelineConfig,
 )
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.index_store import EMB_DTYPES, manifest_emb_dtype, save_embeddings
+from idea2paper.infra.index_segments import (
+    commit_delta,
+    compact_index,
+    has_deltas,
+    live_meta,
+    needs_compaction,
+    next_delta_segment,
+    remove_stale_segments,
+    segments_complete,
+    write_manifest,
+)
 from idea2paper.recall.recall_text import (
     build_recall_idea_text,
     build_recall_paper_text,
@@ -45,14 +67,6 @@ from idea2paper.recall.recall_text import (
 from idea2paper.infra.embeddings import get_embeddings_batch, EMBEDDING_MODEL
 
 
-def _file_hash(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
 def _normalize_matrix(mat: np.ndarray) -> np.ndarray:
     norms = np.linalg.norm(mat, axis=1, keepdims=True)
     norms[norms == 0] = 1.0
@@ -64,6 +78,15 @@ def _load_json(path: Path) -> List[Dict]:
         return json.load(f)
 
 
+def _load_manifest(path: Path):
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+
 def _read_done_ids(meta_path: Path, id_key: str) -> set:
     done = set()
     if not meta_path.exists():
@@ -94,13 +117,13 @@ def _next_part_index(index_dir: Path, prefix: str) -> int:
         return len(parts)
 
 
-def _merge_parts(index_dir: Path, prefix: str, emb_path: Path):
+def _merge_parts(index_dir: Path, prefix: str, emb_path: Path, emb_dtype: str = "float32"):
     parts = sorted(index_dir.glob(f"{prefix}_emb.part_*.npy"))
     if not parts:
         return
     mats = [np.load(p) for p in parts]
     mat = np.vstack(mats) if mats else np.zeros((0, 0), dtype=np.float32)
-    np.save(emb_path, mat)
+    save_embeddings(emb_path, mat, emb_dtype)
     for p in parts:
         try:
             p.unlink()
@@ -108,15 +131,42 @@ def _merge_parts(index_dir: Path, prefix: str, emb_path: Path):
             pass
 
 
+def _index_action(manifest, index_dir: Path, kind: str, nodes_hash: str, force_rebuild: bool) -> str:
+    """build（全量）| delta（增量追加）| skip（已是最新）"""
+    if force_rebuild or manifest is None:
+        return "build"
+    # 模型不一致/文件不完整: 保持原行为，需 --force-rebuild
+    if manifest.get("embedding_model") != EMBEDDING_MODEL or not segments_complete(index_dir, kind, manifest):
+        return "skip"
+    if manifest.get(f"nodes_{kind}_hash") == nodes_hash:
+        return "skip"
+    return "delta" if INDEX_DELTA_ENABLE else "skip"
+
+
 def _build_index(kind: str, items: List[Dict], id_key: str, text_fn, index_dir: Path,
                  batch_size: int, resume: bool, max_retries: int, sleep_sec: float,
-                 nodes_hash: str):
+                 nodes_hash: str, emb_dtype: str = "float32", base_manifest: Dict = None):
     meta_path = index_dir / f"{kind}_meta.jsonl"
     emb_path = index_dir / f"{kind}_emb.npy"
     manifest_path = index_dir / f"{kind}_manifest.json"
 
+    # 增量模式: 已有索引之上追加 delta 段，只embedding新增/文本变更的条目
+    prefix = kind
+    live = {}
+    if base_manifest is not None:
+        live = live_meta(index_dir, kind, base_manifest, id_key)
+        segment = next_delta_segment(base_manifest)
+        prefix = f"{kind}_{segment}"
+        meta_path = index_dir / f"{prefix}_meta.jsonl"
+        emb_path = index_dir / f"{prefix}_emb.npy"
+        emb_dtype = manifest_emb_dtype(base_manifest)
+        if not resume:
+            for p in [meta_path, *index_dir.glob(f"{prefix}_emb.part_*.npy")]:
+                if p.exists():
+                    p.unlink()
+
     done_ids = _read_done_ids(meta_path, id_key) if resume else set()
-    part_idx = _next_part_index(index_dir, kind) if resume else 0
+    part_idx = _next_part_index(index_dir, prefix) if resume else 0
 
     skipped = 0
     processed = 0
@@ -138,7 +188,7 @@ def _build_index(kind: str, items: List[Dict], id_key: str, text_fn, index_dir:
             return part_idx
         mat = np.array(embeddings, dtype=np.float32)
         mat = _normalize_matrix(mat)
-        part_path = index_dir / f"{kind}_emb.part_{part_idx:04d}.npy"
+        part_path = index_dir / f"{prefix}_emb.part_{part_idx:04d}.npy"
         np.save(part_path, mat)
         part_idx += 1
         with meta_path.open("a", encoding="utf-8") as f:
@@ -166,6 +216,8 @@ def _build_index(kind: str, items: List[Dict], id_key: str, text_fn, index_dir:
             meta["domain"] = item.get("domain", "")
             review_stats = item.get("review_stats") or {}
             meta["review_count"] = int(review_stats.get("review_count", 0) or 0)
+        if live.get(item_id, {}).get("text_hash") == meta["text_hash"]:
+            continue
         batch_texts.append(emb_text)
         batch_meta.append(meta)
 
@@ -175,24 +227,41 @@ def _build_index(kind: str, items: List[Dict], id_key: str, text_fn, index_dir:
             time.sleep(sleep_sec)
 
     part_idx = flush_batch(batch_texts, batch_meta, part_idx)
-    _merge_parts(index_dir, kind, emb_path)
-
-    index_count = 0
-    if meta_path.exists():
-        with meta_path.open("r", encoding="utf-8") as f:
-            index_count = sum(1 for _ in f if _.strip())
-
-    manifest = {
-        "created_at": datetime.now(timezone.utc).isoformat(),
-        "embedding_model": EMBEDDING_MODEL,
-        f"nodes_{kind}_hash": nodes_hash,
-        "count": len(items),
-        "index_count": index_count,
-        "skipped": skipped,
-    }
-    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    _merge_parts(index_dir, prefix, emb_path, emb_dtype)
+
+    if base_manifest is not None:
+        current_ids = {item.get(id_key) for item in items}
+        removed = [item_id for item_id in live if item_id not in current_ids]
+        manifest = commit_delta(index_dir, kind, base_manifest, segment, id_key, removed)
+        print(f"       delta: +{processed} embedded, -{len(removed)} tombstoned, {len(manifest['deltas'])} segment(s)")
+        if needs_compaction(manifest, INDEX_DELTA_MAX_SEGMENTS, INDEX_DELTA_COMPACT_RATIO):
+            manifest = compact_index(index_dir, kind, manifest, id_key)
+            print(f"       compacted -> {manifest['index_count']} rows")
+        manifest.update({
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            f"nodes_{kind}_hash": nodes_hash,
+            "count": len(items),
+            "skipped": skipped,
+        })
+    else:
+        index_count = 0
+        if meta_path.exists():
+            with meta_path.open("r", encoding="utf-8") as f:
+                index_count = sum(1 for _ in f if _.strip())
+        manifest = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "embedding_model": EMBEDDING_MODEL,
+            f"nodes_{kind}_hash": nodes_hash,
+            "count": len(items),
+            "index_count": index_count,
+            "rows": index_count,
+            "skipped": skipped,
+            "emb_dtype": emb_dtype,
+        }
+    write_manifest(manifest_path, manifest)
+    remove_stale_segments(index_dir, kind, manifest)
 
-    return {"index_count": index_count, "skipped": skipped, "manifest_path": str(manifest_path)}
+    return {"index_count": manifest["index_count"], "skipped": skipped, "manifest_path": str(manifest_path)}
 
 
 def build_recall_index(
@@ -203,6 +272,7 @@ def build_recall_index(
     sleep_sec: float,
     force_rebuild: bool,
     logger=None,
+    emb_dtype: str = INDEX_EMB_DTYPE,
 ):
     print("🔧 创建召回索引...")
     index_dir = Path(index_dir)
@@ -221,43 +291,50 @@ def build_recall_index(
                 except Exception:
                     pass
 
-    idea_manifest = index_dir / "idea_manifest.json"
-    paper_manifest = index_dir / "paper_manifest.json"
-    if idea_manifest.exists() and paper_manifest.exists() and not force_rebuild:
+    idea_hash = fingerprint(nodes_idea_path)
+    paper_hash = fingerprint(nodes_paper_path)
+
+    idea_manifest = _load_manifest(index_dir / "idea_manifest.json")
+    paper_manifest = _load_manifest(index_dir / "paper_manifest.json")
+    idea_action = _index_action(idea_manifest, index_dir, "idea", idea_hash, force_rebuild)
+    paper_action = _index_action(paper_manifest, index_dir, "paper", paper_hash, force_rebuild)
+    if idea_action == "skip" and paper_action == "skip":
         return {"ok": True, "already_exists": True, "index_dir": str(index_dir)}
 
-    ideas = _load_json(nodes_idea_path)
-    papers = _load_json(nodes_paper_path)
-
-    idea_hash = _file_hash(nodes_idea_path)
-    paper_hash = _file_hash(nodes_paper_path)
-
-    print("    🔴 创建 idea 召回索引...")
-    idea_stats = _build_index(
-        "idea",
-        ideas,
-        "idea_id",
-        build_recall_idea_text,
-        index_dir,
-        batch_size,
-        resume,
-        max_retries,
-        sleep_sec,
-        idea_hash
-    )
-    print("    🔵 创建 paper 召回索引...")
-    paper_stats = _build_index(
-        "paper",
-        papers,
-        "paper_id",
-        build_recall_paper_text,
-        index_dir,
-        batch_size,
-        resume,
-        max_retries,
-        sleep_sec,
-        paper_hash
-    )
+    idea_stats = {"index_count": (idea_manifest or {}).get("index_count"), "skipped": 0}
+    if idea_action != "skip":
+        print(f"    🔴 {'增量更新' if idea_action == 'delta' else '创建'} idea 召回索引...")
+        idea_stats = _build_index(
+            "idea",
+            _load_json(nodes_idea_path),
+            "idea_id",
+            build_recall_idea_text,
+            index_dir,
+            batch_size,
+            resume,
+            max_retries,
+            sleep_sec,
+            idea_hash,
+            emb_dtype,
+            base_manifest=idea_manifest if idea_action == "delta" else None,
+        )
+    paper_stats = {"index_count": (paper_manifest or {}).get("index_count"), "skipped": 0}
+    if paper_action != "skip":
+        print(f"    🔵 {'增量更新' if paper_action == 'delta' else '创建'} paper 召回索引...")
+        paper_stats = _build_index(
+            "paper",
+            _load_json(nodes_paper_path),
+            "paper_id",
+            build_recall_paper_text,
+            index_dir,
+            batch_size,
+            resume,
+            max_retries,
+            sleep_sec,
+            paper_hash,
+            emb_dtype,
+            base_manifest=paper_manifest if paper_action == "delta" else None,
+        )
 
     return {
         "ok": True,
@@ -269,6 +346,23 @@ def build_recall_index(
     }
 
 
+def compact_recall_index(index_dir: Path) -> Dict:
+    """Fold delta segments / tombstones of both kinds into their base segment."""
+    index_dir = Path(index_dir)
+    counts = {}
+    for kind in ("idea", "paper"):
+        manifest_path = index_dir / f"{kind}_manifest.json"
+        manifest = _load_manifest(manifest_path)
+        if manifest is None or not has_deltas(manifest):
+            continue
+        manifest = compact_index(index_dir, kind, manifest, f"{kind}_id")
+        manifest["created_at"] = datetime.now(timezone.utc).isoformat()
+        write_manifest(manifest_path, manifest)
+        remove_stale_segments(index_dir, kind, manifest)
+        counts[kind] = manifest["index_count"]
+    return counts
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--index-dir", default=str(PipelineConfig.RECALL_INDEX_DIR))
@@ -278,11 +372,19 @@ def main():
     parser.add_argument("--force-rebuild", action="store_true", default=False)
     parser.add_argument("--max-retries", type=int, default=PipelineConfig.RECALL_EMBED_MAX_RETRIES)
     parser.add_argument("--sleep-sec", type=float, default=PipelineConfig.RECALL_EMBED_SLEEP_SEC)
+    parser.add_argument("--emb-dtype", choices=EMB_DTYPES, default=INDEX_EMB_DTYPE)
+    parser.add_argument("--compact", action="store_true", default=False,
+                        help="merge delta segments into the base index and exit")
     args = parser.parse_args()
 
     if args.no_resume:
         args.resume = False
 
+    if args.compact:
+        counts = compact_recall_index(Path(args.index_dir))
+        print(f"✅ Compacted: {counts or 'nothing to compact'}")
+        return
+
     result = build_recall_index(
         index_dir=Path(args.index_dir),
         batch_size=args.batch_size,
@@ -290,6 +392,7 @@ def main():
         max_retries=args.max_retries,
         sleep_sec=args.sleep_sec,
         force_rebuild=args.force_rebuild,
+        emb_dtype=args.emb_dtype,
     )
     if result.get("already_exists"):
         print("✅ Recall index already exists. Use --force-rebuild to rebuild.")
@@ -0,0 +1,70 @@
+"""
+Build the recall cold-start snapshot (nodes + token indexes + paper quality + recall relations).
+
+RecallSystem uses it automatically while nodes_*.json and the gpickle are unchanged.
+
+Usage:
+  python Paper-KG-Pipeline/scripts/tools/build_recall_snapshot.py
+  python Paper-KG-Pipeline/scripts/tools/build_recall_snapshot.py --snapshot-dir /path/to/snapshot --force-rebuild
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = SCRIPT_DIR.parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+REPO_ROOT = PROJECT_ROOT.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+try:
+    from idea2paper.infra.dotenv import load_dotenv
+    load_dotenv(REPO_ROOT / ".env", override=False)
+except Exception:
+    pass
+
+from idea2paper.config import PipelineConfig
+from idea2paper.recall import recall_system
+from idea2paper.recall.recall_snapshot import RecallSnapshot, build_recall_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot-dir", default=str(PipelineConfig.RECALL_SNAPSHOT_DIR))
+    parser.add_argument("--force-rebuild", action="store_true", default=False)
+    args = parser.parse_args()
+
+    snapshot_dir = Path(args.snapshot_dir)
+    sources = {
+        "nodes_idea": recall_system.NODES_IDEA,
+        "nodes_pattern": recall_system.NODES_PATTERN,
+        "nodes_domain": recall_system.NODES_DOMAIN,
+        "nodes_paper": recall_system.NODES_PAPER,
+        "graph": recall_system.GRAPH_FILE,
+    }
+    missing = [str(p) for p in sources.values() if not Path(p).exists()]
+    if missing:
+        print(f"❌ Missing source files: {missing}")
+        sys.exit(1)
+
+    if not args.force_rebuild:
+        snapshot, _ = RecallSnapshot.open(snapshot_dir, sources)
+        if snapshot is not None:
+            print("✅ Recall snapshot is up to date. Use --force-rebuild to rebuild.")
+            return
+
+    start = time.time()
+    manifest = build_recall_snapshot(snapshot_dir, sources)
+    counts = manifest["counts"]
+    print(f"✅ Build done in {time.time() - start:.1f}s")
+    print(f"   ideas={counts['ideas']}, patterns={counts['patterns']}, domains={counts['domains']}, papers={counts['papers']}")
+    print(f"   graph_nodes={counts['graph_nodes']}, relation_edges={counts['relation_edges']}")
+    print(f"   snapshot_dir={snapshot_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Resident recall / novelty / review service.
+
+Keeps RecallSystem, NoveltyIndex and ReviewIndex loaded and answers JSON requests on
+localhost HTTP, so concurrent pipeline runs do not each reload nodes, graph and
+embedding indexes. Pipeline runs use it automatically (config: service.enable) when
+its signature matches the local data/config, and load in-process otherwise.
+Requests are served one at a time (RecallSystem keeps per-query state).
+
+Usage:
+  python Paper-KG-Pipeline/scripts/tools/index_service.py
+  python Paper-KG-Pipeline/scripts/tools/index_service.py --host 127.0.0.1 --port 8765
+
+Endpoints:
+  GET  /health            {"pid", "started_at", "signature"}
+  POST /recall            {"user_idea"} -> {"results", "audit", "log", "events"}
+  POST /novelty/query     {"story_text", "top_k"} -> {"index_status", "candidates", "info", "events"}
+                          (candidates come with keyword_overlap filled)
+  GET  /review/summaries  -> {"summaries"}
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = SCRIPT_DIR.parent
+PROJECT_ROOT = SCRIPTS_DIR.parent
+REPO_ROOT = PROJECT_ROOT.parent
+SRC_DIR = PROJECT_ROOT / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+try:
+    from idea2paper.infra.dotenv import load_dotenv
+    load_dotenv(REPO_ROOT / ".env", override=False)
+except Exception:
+    pass
+
+from idea2paper.config import NOVELTY_INDEX_DIR, OUTPUT_DIR, SERVICE_HOST, SERVICE_PORT, PipelineConfig
+from idea2paper.infra.index_service import EventRecorder, json_default, service_signature
+from idea2paper.infra.run_context import reset_logger, set_logger
+from idea2paper.novelty.novelty_index import NoveltyIndex
+from idea2paper.recall.recall_system import RecallSystem
+from idea2paper.review.review_index import ReviewIndex
+
+
+class IndexService:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc).isoformat()
+        self.signature = service_signature()
+
+        self.recall_system = RecallSystem()
+        if PipelineConfig.RECALL_USE_OFFLINE_INDEX:
+            self.recall_system._load_offline_index()
+
+        nodes_paper_path = OUTPUT_DIR / "nodes_paper.json"
+        with open(nodes_paper_path, "r", encoding="utf-8") as f:
+            papers = json.load(f)
+        self.novelty_index = NoveltyIndex(papers, NOVELTY_INDEX_DIR, nodes_paper_path)
+        self.novelty_status = self.novelty_index.ensure_index(allow_build=False)
+        # keyword_overlap 所需的 paper token sets 启动时加载，首个请求不再付出构建开销
+        self.novelty_index.paper_texts
+        # 召回系统已按 nodes_paper 行预计算质量数组，直接复用
+        self.review_index = ReviewIndex(papers, self.recall_system._paper_quality)
+        print(f"  ✓ Novelty index: {', '.join(self.novelty_status.get('notes') or [])}")
+        print(f"  ✓ Review index: {len(self.review_index.paper_id_to_summary)} papers")
+
+    @contextlib.contextmanager
+    def _recording(self, *components):
+        """Serialize requests and route run-log events of `components` into a recorder."""
+        recorder = EventRecorder()
+        with self.lock:
+            token = set_logger(recorder)
+            for c in components:
+                c.logger = recorder
+            try:
+                yield recorder
+            finally:
+                for c in components:
+                    c.logger = None
+                reset_logger(token)
+
+    def health(self):
+        return {"pid": os.getpid(), "started_at": self.started_at, "signature": self.signature}
+
+    def recall(self, payload):
+        user_idea = str(payload.get("user_idea") or "")
+        buf = io.StringIO()
+        with self._recording(self.recall_system) as recorder:
+            # 同一时刻只处理一个请求，stdout 重定向不会串到其他请求
+            with contextlib.redirect_stdout(buf):
+                results = self.recall_system.recall(user_idea, verbose=True)
+            audit = self.recall_system.last_audit
+        return {
+            "results": [[pattern_id, info, float(score)] for pattern_id, info, score in results],
+            "audit": audit,
+            "log": buf.getvalue(),
+            "events": recorder.events,
+        }
+
+    def novelty_query(self, payload):
+        story_text = str(payload.get("story_text") or "")
+        top_k = int(payload.get("top_k") or 10)
+        with self._recording(self.novelty_index) as recorder:
+            candidates, info = self.novelty_index.query(story_text, top_k)
+            self.novelty_index.fill_keyword_overlap(story_text, candidates)
+        return {
+            "index_status": self.novelty_status,
+            "candidates": candidates,
+            "info": info,
+            "events": recorder.events,
+        }
+
+    def review_summaries(self, payload=None):
+        summaries = [s for plist in self.review_index.pattern_to_papers.values() for s in plist]
+        return {"summaries": summaries}
+
+
+SERVICE = None
+
+
+def _json_response(handler: BaseHTTPRequestHandler, data: dict, status: int = 200):
+    body = json.dumps(data, ensure_ascii=False, default=json_default).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json; charset=utf-8")
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def _read_json(handler: BaseHTTPRequestHandler):
+    length = int(handler.headers.get("Content-Length", "0"))
+    raw = handler.rfile.read(length) if length else b"{}"
+    try:
+        return json.loads(raw.decode("utf-8"))
+    except Exception:
+        return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    GET_ROUTES = {"/health": "health", "/review/summaries": "review_summaries"}
+    POST_ROUTES = {"/recall": "recall", "/novelty/query": "novelty_query"}
+
+    def log_message(self, format, *args):
+        # Quiet default HTTP logs
+        return
+
+    def _dispatch(self, routes, payload=None):
+        name = routes.get(urlparse(self.path).path)
+        if name is None:
+            return _json_response(self, {"ok": False, "error": "not found"}, status=404)
+        start = time.time()
+        try:
+            method = getattr(SERVICE, name)
+            data = method() if name == "health" else method(payload)
+        except Exception as e:
+            return _json_response(self, {"ok": False, "error": str(e)}, status=500)
+        return _json_response(self, {"ok": True, "elapsed_ms": int((time.time() - start) * 1000), **data})
+
+    def do_GET(self):
+        return self._dispatch(self.GET_ROUTES)
+
+    def do_POST(self):
+        payload = _read_json(self)
+        if not isinstance(payload, dict):
+            return _json_response(self, {"ok": False, "error": "invalid json"}, status=400)
+        return self._dispatch(self.POST_ROUTES, payload)
+
+
+def main():
+    global SERVICE
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args()
+
+    start = time.time()
+    SERVICE = IndexService()
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"✅ Index service ready in {time.time() - start:.1f}s: http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
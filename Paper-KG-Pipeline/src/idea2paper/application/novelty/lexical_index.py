@@ -0,0 +1,188 @@
+"""
+BM25 lexical index over paper texts, used by NoveltyIndex when embeddings are unavailable.
+
+Stored next to paper_emb.npy as paper_bm25.npz:
+  header       JSON (version, nodes_paper_hash, doc count, k1 / b), utf-8 bytes
+  terms        sorted term dictionary, newline-joined utf-8 bytes
+  term_ptr     CSR offsets into doc_rows / term_freqs, one slot per term
+  doc_rows     paper rows (nodes_paper order) of each posting
+  term_freqs   term frequency of each posting
+  doc_len      token count per paper
+  doc_terms    distinct token count per paper (for the keyword overlap of the top-k)
+
+Tokens are the keyword_overlap tokens (lower-cased, whitespace split), so the
+overlap reported for a candidate equals keyword_overlap(story, paper_text).
+"""
+
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from idea2paper.recall.dense_search import top_k_indices
+
+BM25_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def lexical_tokens(text: str) -> List[str]:
+    return text.lower().split()
+
+
+def _encode_str(value: str) -> np.ndarray:
+    return np.frombuffer(value.encode("utf-8"), dtype=np.uint8)
+
+
+def _decode_str(arr: np.ndarray) -> str:
+    return arr.tobytes().decode("utf-8")
+
+
+class BM25Index:
+    """Term -> postings (CSR) with BM25 scoring over a fixed paper row order."""
+
+    FILE_NAME = "paper_bm25.npz"
+
+    def __init__(self, terms: Sequence[str], term_ptr: np.ndarray, doc_rows: np.ndarray, term_freqs: np.ndarray,
+                 doc_len: np.ndarray, doc_terms: np.ndarray, source_hash: Optional[str] = None,
+                 k1: float = BM25_K1, b: float = BM25_B):
+        self.terms = list(terms)
+        self.term_ptr = np.asarray(term_ptr, dtype=np.int64)
+        self.doc_rows = np.asarray(doc_rows, dtype=np.int64)
+        self.term_freqs = np.asarray(term_freqs, dtype=np.float64)
+        self.doc_len = np.asarray(doc_len, dtype=np.float64)
+        self.doc_terms = np.asarray(doc_terms, dtype=np.int64)
+        self.source_hash = source_hash
+        self.k1 = float(k1)
+        self.b = float(b)
+
+        self.term_row: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        n = len(self.doc_len)
+        df = np.diff(self.term_ptr).astype(np.float64)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5))
+        avgdl = float(self.doc_len.mean()) if n else 0.0
+        # per-document length normalization k1 * (1 - b + b * dl / avgdl)
+        self.norm = self.k1 * (1.0 - self.b + self.b * self.doc_len / (avgdl or 1.0))
+
+    def __len__(self) -> int:
+        return int(self.doc_len.shape[0])
+
+    @classmethod
+    def build(cls, texts: Sequence[str], source_hash: Optional[str] = None) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_len = np.zeros(len(texts), dtype=np.int64)
+        doc_terms = np.zeros(len(texts), dtype=np.int64)
+        for row, text in enumerate(texts):
+            tokens = lexical_tokens(text)
+            counts = Counter(tokens)
+            doc_len[row] = len(tokens)
+            doc_terms[row] = len(counts)
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms = sorted(postings)
+        term_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        term_ptr[1:] = np.cumsum([len(postings[t]) for t in terms])
+        doc_rows = np.empty(int(term_ptr[-1]), dtype=np.int32)
+        term_freqs = np.empty(int(term_ptr[-1]), dtype=np.int32)
+        for i, term in enumerate(terms):
+            plist = postings[term]
+            doc_rows[term_ptr[i]:term_ptr[i + 1]] = [row for row, _ in plist]
+            term_freqs[term_ptr[i]:term_ptr[i + 1]] = [tf for _, tf in plist]
+        return cls(terms, term_ptr, doc_rows, term_freqs, doc_len, doc_terms, source_hash)
+
+    def save(self, path: Path):
+        path = Path(path)
+        header = {
+            "version": BM25_VERSION,
+            "nodes_paper_hash": self.source_hash,
+            "doc_count": len(self),
+            "k1": self.k1,
+            "b": self.b,
+        }
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp,
+            header=_encode_str(json.dumps(header)),
+            terms=_encode_str("\n".join(self.terms)),
+            term_ptr=self.term_ptr,
+            doc_rows=self.doc_rows.astype(np.int32),
+            term_freqs=self.term_freqs.astype(np.int32),
+            doc_len=self.doc_len.astype(np.int64),
+            doc_terms=self.doc_terms,
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, source_hash: Optional[str], doc_count: int) -> Optional["BM25Index"]:
+        """Load a persisted index if it was built from the same nodes_paper (else None)."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                header = json.loads(_decode_str(data["header"]))
+                if (
+                    header.get("version") != BM25_VERSION
+                    or header.get("nodes_paper_hash") != source_hash
+                    or header.get("doc_count") != doc_count
+                ):
+                    return None
+                raw_terms = _decode_str(data["terms"])
+                return cls(
+                    raw_terms.split("\n") if raw_terms else [],
+                    data["term_ptr"], data["doc_rows"], data["term_freqs"], data["doc_len"], data["doc_terms"],
+                    source_hash=source_hash, k1=header.get("k1", BM25_K1), b=header.get("b", BM25_B),
+                )
+        except Exception:
+            return None
+
+    def score(self, query_text: str) -> Tuple[np.ndarray, np.ndarray, int]:
+        """(bm25 score per paper, matched distinct query terms per paper, distinct query term count)."""
+        n = len(self)
+        scores = np.zeros(n, dtype=np.float64)
+        matched = np.zeros(n, dtype=np.int64)
+        query_terms = set(lexical_tokens(query_text))
+        for term in query_terms:
+            t = self.term_row.get(term)
+            if t is None:
+                continue
+            start, end = self.term_ptr[t], self.term_ptr[t + 1]
+            rows = self.doc_rows[start:end]
+            tf = self.term_freqs[start:end]
+            # rows are unique within one posting list, so fancy-index += is exact
+            scores[rows] += self.idf[t] * tf * (self.k1 + 1.0) / (tf + self.norm[rows])
+            matched[rows] += 1
+        return scores, matched, len(query_terms)
+
+    def top_k(self, query_text: str, k: int) -> List[Tuple[int, float, float]]:
+        """[(row, bm25, keyword_overlap), ...] sorted by BM25 desc; ties keep row order."""
+        scores, matched, q_size = self.score(query_text)
+        out = []
+        for row in top_k_indices(scores, k).tolist():
+            inter = int(matched[row])
+            union = q_size + int(self.doc_terms[row]) - inter
+            overlap = inter / union if q_size and self.doc_terms[row] and union else 0.0
+            out.append((row, float(scores[row]), overlap))
+        return out
+
+
+def load_or_build_bm25(index_dir: Path, source_hash: Optional[str], doc_count: int,
+                       build_texts: Callable[[], Sequence[str]]) -> BM25Index:
+    """Persisted BM25 index from index_dir, rebuilt from build_texts() (and saved) when stale."""
+    path = Path(index_dir) / BM25Index.FILE_NAME
+    if source_hash:
+        index = BM25Index.load(path, source_hash, doc_count)
+        if index is not None:
+            return index
+    index = BM25Index.build(build_texts(), source_hash)
+    if source_hash:
+        try:
+            Path(index_dir).mkdir(parents=True, exist_ok=True)
+            index.save(path)
+        except Exception:
+            pass
+    return index
@@ -14,7 +14,8 @@ from idea2paper.config import (
     OUTPUT_DIR,
     RESULTS_ROOT,
 )
-from idea2paper.novelty.novelty_index import NoveltyIndex, build_story_text, keyword_overlap, build_paper_text
+from idea2paper.infra.index_service import get_service_client, replay_events
+from idea2paper.novelty.novelty_index import NoveltyIndex, build_story_text
 
 
 class NoveltyChecker:
@@ -38,8 +39,25 @@ class NoveltyChecker:
             return "medium"
         return "low"
 
+    def _query_service(self, story_text: str):
+        """(index_status, candidates, info) from the resident index service, or None."""
+        service = get_service_client(self.logger)
+        remote = service.novelty_query(story_text, NOVELTY_TOPK) if service else None
+        if remote is None or not remote.get("index_status", {}).get("embedding_available", True):
+            return None
+        replay_events(self.logger, remote.get("events"))
+        return remote["index_status"], remote.get("candidates") or [], remote.get("info") or {}
+
     def check(self, story: Dict, run_id: str, user_idea: str) -> Dict:
         story_text = build_story_text(story)
+        remote = self._query_service(story_text)
+        if remote is not None:
+            index_status, candidates, info = remote
+        else:
+            index_status, candidates, info = self._query_local(story_text)
+        return self._build_report(story_text, index_status, candidates, info, run_id, user_idea)
+
+    def _query_local(self, story_text: str):
         index_status = self.index.ensure_index(allow_build=NOVELTY_AUTO_BUILD_INDEX)
 
         if not index_status.get("embedding_available", True) and NOVELTY_REQUIRE_EMBEDDING:
@@ -55,16 +73,12 @@ class NoveltyChecker:
                 "Please build it first: python Paper-KG-Pipeline/scripts/tools/build_novelty_index.py"
             )
         candidates, info = self.index.query(story_text, NOVELTY_TOPK)
+        return index_status, candidates, info
 
-        # fill keyword_overlap if cosine used
-        if candidates and candidates[0].get("keyword_overlap") is None:
-            for c in candidates:
-                # compute overlap with full paper text for top candidates
-                paper = next((p for p in self.papers if p.get("paper_id") == c["paper_id"]), None)
-                if paper:
-                    c["keyword_overlap"] = keyword_overlap(story_text, build_paper_text(paper))
-                else:
-                    c["keyword_overlap"] = 0.0
+    def _build_report(self, story_text: str, index_status: Dict, candidates: List[Dict], info: Dict,
+                      run_id: str, user_idea: str) -> Dict:
+        # fill keyword_overlap if cosine used (the index service returns it already filled)
+        self.index.fill_keyword_overlap(story_text, candidates)
 
         max_sim = 0.0
         if candidates:
@@ -1,12 +1,30 @@
 import hashlib
 import json
+import os
+import pickle
 from datetime import datetime, timezone
+from functools import cached_property
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 
-from idea2paper.infra.embeddings import get_embedding, EMBEDDING_MODEL
+from idea2paper.config import (
+    INDEX_EMB_DTYPE,
+    NOVELTY_INDEX_BUILD_BATCH_SIZE,
+    NOVELTY_INDEX_BUILD_MAX_RETRIES,
+    NOVELTY_INDEX_BUILD_MAX_WORKERS,
+    NOVELTY_INDEX_BUILD_RESUME,
+    NOVELTY_INDEX_BUILD_SLEEP_SEC,
+)
+from idea2paper.infra.embeddings import get_embedding, get_embeddings_batch, EMBEDDING_MODEL
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.index_build import embed_to_parts, merge_parts, read_done_meta, reconcile_parts
+from idea2paper.infra.index_preflight import acquire_lock
+from idea2paper.infra.index_segments import load_index, read_meta, segments_complete
+from idea2paper.infra.index_store import load_embeddings, scale_path_for
+from idea2paper.application.novelty.lexical_index import BM25Index, load_or_build_bm25
+from idea2paper.recall.dense_search import QUERY_CHUNK, top_k_indices
 
 
 def _stable_string(value) -> str:
@@ -56,20 +74,6 @@ def build_paper_text(paper: Dict) -> str:
     return "\n".join([p for p in parts if p])
 
 
-def _file_hash(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
-def _normalize_matrix(mat: np.ndarray) -> np.ndarray:
-    norms = np.linalg.norm(mat, axis=1, keepdims=True)
-    norms[norms == 0] = 1.0
-    return mat / norms
-
-
 def _normalize_vec(vec: np.ndarray) -> np.ndarray:
     norm = np.linalg.norm(vec)
     if norm == 0:
@@ -77,18 +81,81 @@ def _normalize_vec(vec: np.ndarray) -> np.ndarray:
     return vec / norm
 
 
-def _token_set(text: str) -> set:
+def keyword_tokens(text: str) -> set:
     return set(text.lower().split())
 
 
-def keyword_overlap(text1: str, text2: str) -> float:
-    t1 = _token_set(text1)
-    t2 = _token_set(text2)
+def token_overlap(t1: set, t2: set) -> float:
     if not t1 or not t2:
         return 0.0
     return len(t1 & t2) / len(t1 | t2)
 
 
+def keyword_overlap(text1: str, text2: str) -> float:
+    return token_overlap(keyword_tokens(text1), keyword_tokens(text2))
+
+
+PAPER_TOKENS_VERSION = 1
+
+
+class PaperTextIndex:
+    """paper_id -> row lookup plus per-row paper text and keyword token sets.
+
+    Token sets are persisted next to the novelty index (paper_tokens.pkl) keyed by
+    the nodes_paper fingerprint, so a new process does not re-tokenize the corpus.
+    """
+
+    FILE_NAME = "paper_tokens.pkl"
+
+    def __init__(self, papers: List[Dict], cache_path: Optional[Path] = None, source_hash: Optional[str] = None):
+        self.papers = papers
+        self.row_of: Dict[str, int] = {}
+        for row, paper in enumerate(papers):
+            # first match wins, like a linear scan over papers
+            self.row_of.setdefault(paper.get("paper_id"), row)
+        self.token_sets: List[frozenset] = self._load_or_build(cache_path, source_hash)
+
+    @cached_property
+    def texts(self) -> List[str]:
+        return [build_paper_text(p) for p in self.papers]
+
+    def _load_or_build(self, cache_path: Optional[Path], source_hash: Optional[str]) -> List[frozenset]:
+        if cache_path is not None and source_hash and Path(cache_path).exists():
+            try:
+                with open(cache_path, "rb") as f:
+                    data = pickle.load(f)
+                if (
+                    data.get("version") == PAPER_TOKENS_VERSION
+                    and data.get("nodes_paper_hash") == source_hash
+                    and len(data.get("token_sets") or []) == len(self.papers)
+                ):
+                    return data["token_sets"]
+            except Exception:
+                pass
+
+        token_sets = [frozenset(keyword_tokens(text)) for text in self.texts]
+        if cache_path is not None and source_hash:
+            try:
+                tmp = Path(cache_path).with_name(Path(cache_path).name + ".tmp")
+                with open(tmp, "wb") as f:
+                    pickle.dump({
+                        "version": PAPER_TOKENS_VERSION,
+                        "nodes_paper_hash": source_hash,
+                        "token_sets": token_sets,
+                    }, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp, cache_path)
+            except Exception:
+                pass
+        return token_sets
+
+    def row(self, paper_id: str) -> Optional[int]:
+        return self.row_of.get(paper_id)
+
+    def tokens(self, paper_id: str) -> Optional[frozenset]:
+        row = self.row_of.get(paper_id)
+        return None if row is None else self.token_sets[row]
+
+
 class NoveltyIndex:
     def __init__(self, papers: List[Dict], index_dir: Path, nodes_paper_path: Path, logger=None):
         self.papers = papers
@@ -103,6 +170,33 @@ class NoveltyIndex:
         self._embeddings = None
         self._paper_meta = None
 
+    @cached_property
+    def paper_texts(self) -> PaperTextIndex:
+        """Row lookup + paper texts / token sets, built once per index (persisted in index_dir)."""
+        source_hash = fingerprint(self.nodes_paper_path) if self.nodes_paper_path.exists() else None
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        return PaperTextIndex(self.papers, self.index_dir / PaperTextIndex.FILE_NAME, source_hash)
+
+    def fill_keyword_overlap(self, story_text: str, candidates: List[Dict]) -> List[Dict]:
+        """Fill keyword_overlap (story vs full paper text) of cosine candidates in place."""
+        if candidates and candidates[0].get("keyword_overlap") is None:
+            # indexed rows + cached token sets
+            paper_texts = self.paper_texts
+            story_tokens = keyword_tokens(story_text)
+            for c in candidates:
+                tokens = paper_texts.tokens(c["paper_id"])
+                c["keyword_overlap"] = token_overlap(story_tokens, tokens) if tokens is not None else 0.0
+        return candidates
+
+    @cached_property
+    def lexical_index(self) -> BM25Index:
+        """BM25 index over paper texts for the keyword fallback (persisted as paper_bm25.npz)."""
+        source_hash = fingerprint(self.nodes_paper_path) if self.nodes_paper_path.exists() else None
+        return load_or_build_bm25(
+            self.index_dir, source_hash, len(self.papers),
+            lambda: [build_paper_text(p) for p in self.papers],
+        )
+
     def ensure_index(self, force_rebuild: bool = False, allow_build: bool = False) -> Dict:
         status = {
             "rebuilt": False,
@@ -116,81 +210,131 @@ class NoveltyIndex:
         if not self.index_dir.exists():
             self.index_dir.mkdir(parents=True, exist_ok=True)
 
-        current_hash = _file_hash(self.nodes_paper_path) if self.nodes_paper_path.exists() else None
+        current_hash = fingerprint(self.nodes_paper_path) if self.nodes_paper_path.exists() else None
         status["nodes_paper_hash"] = current_hash
 
-        if not force_rebuild and self.manifest_path.exists() and self.emb_path.exists() and self.meta_path.exists():
-            try:
-                manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
-                if (
-                    manifest.get("paper_count") == len(self.papers)
-                    and manifest.get("nodes_paper_hash") == current_hash
-                    and manifest.get("embedding_model") == EMBEDDING_MODEL
-                ):
-                    self._embeddings = np.load(self.emb_path)
-                    self._paper_meta = [json.loads(l) for l in self.meta_path.read_text(encoding="utf-8").splitlines() if l.strip()]
-                    status["notes"].append("index_reused")
-                    return status
-            except Exception as e:
-                status["notes"].append(f"index_load_failed:{e}")
+        if not force_rebuild and self._try_reuse(current_hash, status):
+            return status
 
         if not allow_build:
             status["embedding_available"] = False
             status["notes"].append("index_missing_or_mismatch")
             return status
 
-        # rebuild
+        # 与 preflight / 其他进程的构建互斥；拿到锁后先看别人是否已建好
+        with acquire_lock(self.index_dir / ".build.lock"):
+            if not force_rebuild and self._try_reuse(current_hash, status):
+                return status
+            return self._build(current_hash, status, force_rebuild)
+
+    def _try_reuse(self, current_hash: Optional[str], status: Dict) -> bool:
+        if not self.manifest_path.exists():
+            return False
+        try:
+            manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+            if (
+                manifest.get("paper_count") == len(self.papers)
+                and manifest.get("nodes_paper_hash") == current_hash
+                and manifest.get("embedding_model") == EMBEDDING_MODEL
+                and segments_complete(self.index_dir, "paper", manifest)
+            ):
+                self._embeddings, self._paper_meta = load_index(self.index_dir, "paper", manifest, "paper_id")
+                status["notes"].append("index_reused")
+                return True
+        except Exception as e:
+            status["notes"].append(f"index_load_failed:{e}")
+        return False
+
+    def _clear_index_files(self):
+        paths = [self.manifest_path, self.meta_path, self.emb_path, scale_path_for(self.emb_path)]
+        paths += list(self.index_dir.glob("paper_emb.part_*.npy"))
+        paths += list(self.index_dir.glob("paper_delta_*"))
+        paths += list(self.index_dir.glob("paper_base_*"))
+        for path in paths:
+            if path.exists():
+                path.unlink()
+
+    def _build(self, current_hash: Optional[str], status: Dict, force_rebuild: bool) -> Dict:
+        """Batched, concurrent build checkpointed as part files (same layout as build_novelty_index.py).
+
+        A directory without manifest holds an interrupted build: its committed
+        batches are kept and only the remaining papers are embedded.
+        """
         status["rebuilt"] = True
-        vectors = []
-        meta = []
-        skipped = 0
-
-        for paper in self.papers:
-            text = build_paper_text(paper)
-            emb = get_embedding(text, logger=self.logger)
-            if emb is None:
-                skipped += 1
-                continue
-            vectors.append(np.array(emb, dtype=np.float32))
-            meta.append({
+        texts = self.paper_texts.texts
+        metas = [
+            {
                 "paper_id": paper.get("paper_id", ""),
                 "title": paper.get("title", ""),
                 "pattern_id": paper.get("pattern_id", ""),
                 "domain": paper.get("domain", ""),
                 "text_hash": hashlib.sha256(text.encode("utf-8")).hexdigest()
-            })
+            }
+            for paper, text in zip(self.papers, texts)
+        ]
+
+        if force_rebuild or self.manifest_path.exists() or not NOVELTY_INDEX_BUILD_RESUME:
+            # 已有索引过期（或强制重建）：从头开始
+            self._clear_index_files()
+        else:
+            reconcile_parts(self.index_dir, "paper", self.meta_path, self.emb_path, INDEX_EMB_DTYPE)
+        done = read_done_meta(self.meta_path, "paper_id")
+        current = {m["paper_id"]: m["text_hash"] for m in metas if m["paper_id"]}
+        if any(current.get(pid) != meta.get("text_hash") for pid, meta in done.items()):
+            # 中断的构建来自另一版 nodes_paper，无法续建
+            self._clear_index_files()
+            done = {}
+        if done:
+            status["notes"].append(f"index_resumed:{len(done)}")
+
+        pending = [i for i, m in enumerate(metas) if not (m["paper_id"] and m["paper_id"] in done)]
+        _processed, skipped = embed_to_parts(
+            self.index_dir, "paper", self.meta_path,
+            [texts[i] for i in pending], [metas[i] for i in pending],
+            batch_size=NOVELTY_INDEX_BUILD_BATCH_SIZE,
+            max_workers=NOVELTY_INDEX_BUILD_MAX_WORKERS,
+            max_retries=NOVELTY_INDEX_BUILD_MAX_RETRIES,
+            sleep_sec=NOVELTY_INDEX_BUILD_SLEEP_SEC,
+            logger=self.logger,
+        )
+        status["skipped"] = skipped
 
-        if not vectors:
+        emb_format = merge_parts(self.index_dir, "paper", self.emb_path, INDEX_EMB_DTYPE)
+        meta = read_meta(self.meta_path)
+        if emb_format is None or not meta:
             status["embedding_available"] = False
             status["notes"].append("no_embeddings_built")
-            status["skipped"] = skipped
             return status
 
-        mat = np.vstack(vectors)
-        mat = _normalize_matrix(mat)
-
-        np.save(self.emb_path, mat)
-        self.meta_path.write_text("\n".join(json.dumps(m, ensure_ascii=False) for m in meta), encoding="utf-8")
         manifest = {
             "created_at": datetime.now(timezone.utc).isoformat(),
             "embedding_model": EMBEDDING_MODEL,
             "paper_count": len(self.papers),
             "index_count": len(meta),
+            "rows": len(meta),
             "skipped": skipped,
-            "nodes_paper_hash": current_hash
+            "nodes_paper_hash": current_hash,
+            **emb_format,
         }
         self.manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
 
-        self._embeddings = mat
+        self._embeddings = load_embeddings(self.emb_path, manifest)
         self._paper_meta = meta
-        status["skipped"] = skipped
         return status
 
+    def _load_manifest(self) -> Dict:
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+
     def _ensure_loaded(self):
-        if self._embeddings is None and self.emb_path.exists():
-            self._embeddings = np.load(self.emb_path)
-        if self._paper_meta is None and self.meta_path.exists():
-            self._paper_meta = [json.loads(l) for l in self.meta_path.read_text(encoding="utf-8").splitlines() if l.strip()]
+        if self._embeddings is None:
+            manifest = self._load_manifest()
+            if segments_complete(self.index_dir, "paper", manifest):
+                self._embeddings, self._paper_meta = load_index(self.index_dir, "paper", manifest, "paper_id")
 
     def query(self, story_text: str, top_k: int) -> Tuple[List[Dict], Dict]:
         """Return candidates list and info dict."""
@@ -210,29 +354,68 @@ class NoveltyIndex:
 
         vec = _normalize_vec(np.array(story_emb, dtype=np.float32))
         scores = self._embeddings.dot(vec)
-        top_idx = np.argsort(scores)[::-1][:top_k]
+        return self._top_candidates(scores, top_k), info
+
+    def query_batch(self, story_texts: List[str], top_k: int) -> List[Tuple[List[Dict], Dict]]:
+        """query() for several stories: one batched embedding request and one matmul per chunk of stories.
+
+        Returns [(candidates, info), ...] in input order with the same candidates as
+        query(story_text, top_k); cosines may differ from it in the last float32 bits.
+        """
+        self._ensure_loaded()
+        if not story_texts:
+            return []
+        if self._embeddings is None or self._paper_meta is None:
+            return [
+                (self._fallback_query(text, top_k), {"embedding_available": False, "notes": ["index_missing"]})
+                for text in story_texts
+            ]
+
+        embs = get_embeddings_batch(list(story_texts), logger=self.logger)
+        if embs is None:
+            # batch request failed: per-story requests, so one bad story does not fail the others
+            embs = [get_embedding(text, logger=self.logger) for text in story_texts]
+
+        results: List[Tuple[List[Dict], Dict]] = [None] * len(story_texts)
+        embedded = []
+        for i, (text, emb) in enumerate(zip(story_texts, embs)):
+            if emb is None:
+                info = {"embedding_available": False, "notes": ["story_embedding_failed"]}
+                results[i] = (self._fallback_query(text, top_k), info)
+            else:
+                embedded.append((i, _normalize_vec(np.array(emb, dtype=np.float32))))
+
+        for start in range(0, len(embedded), QUERY_CHUNK):
+            chunk = embedded[start:start + QUERY_CHUNK]
+            scores = self._embeddings.matmul(np.vstack([vec for _, vec in chunk]))
+            for (i, _), row in zip(chunk, scores):
+                results[i] = (self._top_candidates(row, top_k), {"embedding_available": True, "notes": []})
+        return results
+
+    def _top_candidates(self, scores: np.ndarray, top_k: int) -> List[Dict]:
+        """Top-k rows by cosine (partition, then sorted desc; near-ties keep row order)."""
         candidates = []
-        for idx in top_idx:
-            meta = self._paper_meta[int(idx)]
+        for idx in top_k_indices(scores, top_k).tolist():
+            meta = self._paper_meta[idx]
             candidates.append({
                 **meta,
-                "cosine": float(scores[int(idx)]),
+                "cosine": float(scores[idx]),
                 "keyword_overlap": None
             })
-        return candidates, info
+        return candidates
 
     def _fallback_query(self, story_text: str, top_k: int) -> List[Dict]:
+        """Keyword fallback: BM25 top-k over the lexical index (keyword_overlap filled for the top-k)."""
         results = []
-        for paper in self.papers:
-            text = build_paper_text(paper)
-            overlap = keyword_overlap(story_text, text)
+        for row, bm25, overlap in self.lexical_index.top_k(story_text, top_k):
+            paper = self.papers[row]
             results.append({
                 "paper_id": paper.get("paper_id", ""),
                 "title": paper.get("title", ""),
                 "pattern_id": paper.get("pattern_id", ""),
                 "domain": paper.get("domain", ""),
                 "cosine": None,
-                "keyword_overlap": overlap
+                "keyword_overlap": overlap,
+                "bm25": bm25,
             })
-        results.sort(key=lambda x: x["keyword_overlap"], reverse=True)
-        return results[:top_k]
+        return results
@@ -29,6 +29,10 @@ IdeaFusionEngine - 在概念层面融合两个研究 idea
 from typing import Dict, Optional
 
 from idea2paper.infra.llm import call_llm, parse_json_from_llm
+from idea2paper.infra.pattern_memo import get_pattern_memo
+
+# Bump when the pattern DNA prompt changes so memoized DNA is not reused.
+_PATTERN_DNA_PROMPT_VERSION = "pattern_dna_v1"
 
 
 class IdeaFusionEngine:
@@ -134,7 +138,14 @@ class IdeaFusionEngine:
 
     def _extract_pattern_dna(self, pattern_id: str, pattern_info: Dict,
                              pattern_name: str) -> Dict:
-        """从 Pattern 信息中提取核心 DNA"""
+        """从 Pattern 信息中提取核心 DNA（只依赖 Pattern 本身，结果可跨运行复用）"""
+        memo = get_pattern_memo()
+        if memo is not None:
+            cached = memo.get("pattern_dna", _PATTERN_DNA_PROMPT_VERSION, pattern_id, pattern_info)
+            if cached:
+                print("   ♻️  Pattern DNA 缓存命中")
+                return cached
+
         # 尝试从结构化信息中提取
         summary = pattern_info.get('summary', {})
 
@@ -175,6 +186,8 @@ class IdeaFusionEngine:
         result = parse_json_from_llm(response)
 
         if result and all(k in result for k in ['problem', 'assumption', 'novelty_claim']):
+            if memo is not None:
+                memo.put("pattern_dna", _PATTERN_DNA_PROMPT_VERSION, pattern_id, pattern_info, result)
             return result
         else:
             return {
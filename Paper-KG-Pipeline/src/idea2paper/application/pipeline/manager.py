@@ -18,6 +18,7 @@ from idea2paper.config import (
     NOVELTY_REQUIRE_EMBEDDING,
     OUTPUT_DIR,
 )
+from idea2paper.infra.index_service import get_service_client
 from idea2paper.infra.run_context import get_logger
 
 
@@ -35,7 +36,9 @@ class Idea2StoryPipeline:
         self.pattern_selector = PatternSelector(recalled_patterns, user_idea)
         self.story_generator = StoryGenerator(user_idea)
         self.story_reflector = StoryReflector()  # 新增：故事反思器
-        self.review_index = ReviewIndex(papers)
+        service = get_service_client()
+        summaries = service.review_summaries() if service else None
+        self.review_index = ReviewIndex.from_summaries(summaries) if summaries is not None else ReviewIndex(papers)
         self.critic = MultiAgentCritic(review_index=self.review_index)
         # RefinementEngine 需要在 Pattern Selection 后初始化，以获取分类结果
         self.refinement_engine = None  # 延迟初始化
@@ -1,7 +1,62 @@
 from typing import Dict, List, Tuple, Optional
 
-from idea2paper.config import PipelineConfig
+from idea2paper.config import PATTERN_MEMO_KEY_BY_IDEA, PipelineConfig
+from idea2paper.infra.concurrency import run_in_threads
 from idea2paper.infra.llm import call_llm, parse_json_from_llm
+from idea2paper.infra.pattern_memo import get_pattern_memo
+
+# Bump when the scoring prompt changes so memoized scores are not reused.
+_MULTIDIM_PROMPT_VERSION = "multidim_v1"
+
+_STATIC_REFERENCE_EXAMPLES = """
+Example 1 - LOW novelty, HIGH stability (Size 150):
+  "Attention Is All You Need" application - highly replicated, but well-known approach
+  → stability_score: 0.85, novelty_score: 0.15
+
+Example 2 - HIGH novelty, MEDIUM stability (Size 25):
+  "Reframing task as code generation problem" - novel angle, but niche community
+  → stability_score: 0.35, novelty_score: 0.75
+
+Example 3 - MEDIUM novelty, MEDIUM stability (Size 60):
+  "Combining RAG with multi-hop reasoning" - interesting combination, growing adoption
+  → stability_score: 0.60, novelty_score: 0.55
+"""
+
+_SCORING_GUIDELINES = """【Scoring Guidelines - Be CRITICAL and DISCRIMINATIVE】
+
+**Stability Score (0.0-1.0)** - How proven, mature, and widely-adopted?
+Consider: Has this approach been replicated across many papers? Are there established benchmarks?
+- 0.1-0.25: Highly experimental, niche idea, Size < 15, no standard benchmarks, high uncertainty
+- 0.3-0.45: Early-stage research, Size 15-40, some implementations but inconsistent results
+- 0.5-0.65: Maturing approach, Size 40-70, multiple independent implementations, emerging consensus
+- 0.7-0.85: Well-established, Size 70-120, standard benchmarks, widely replicated with consistent gains
+- 0.9-1.0: Foundational/canonical approach, Size > 120, ubiquitous, considered solved or foundational
+🔴 RED FLAG: Avoid giving middle scores (0.4-0.6) to everything. Distinguish clearly.
+
+**Novelty Score (0.0-1.0)** - How original, counter-intuitive, and fresh is this?
+Consider: Is this a new perspective? Does it challenge existing assumptions? Or incremental variation?
+- 0.1-0.25: Well-trodden path, combinations of existing techniques, straightforward application
+- 0.3-0.45: Some novelty in execution or application domain, but builds on established ideas
+- 0.5-0.65: Interesting recombination or new angle on known problems, moderate originality
+- 0.7-0.85: Novel methodology, surprising insight, challenges conventional wisdom, fresh angle
+- 0.9-1.0: Paradigm shift, highly counter-intuitive, fundamentally new problem formulation
+🔴 RED FLAG: If pattern_name suggests "reframing" or "transforming", likely 0.6+. If it's optimization/tuning, likely 0.2-0.4.
+
+**Domain Distance (0.0-1.0)** - How different from user's core idea?
+Consider semantic and methodological distance, not just application domain.
+- 0.0-0.15: Directly addresses same problem, highly relevant methodology
+- 0.2-0.35: Related domain/approach, applicable with minor adaptation
+- 0.4-0.55: Different domain but transferable insights, moderate adaptation needed
+- 0.6-0.8: Orthogonal domain, interesting cross-domain inspirations
+- 0.85-1.0: Completely different field, minimal direct relevance
+💡 TIP: Compare pattern semantics to user idea content for distance.
+
+【CRITICAL INSTRUCTIONS】
+1. DO NOT give all patterns middle-range scores (0.4-0.6). Spread the distribution.
+2. DISTINGUISH between: optimization (low novelty), new methodology (medium), paradigm shift (high).
+3. Large cluster size (>100) should NOT automatically mean high stability if methodology is flawed.
+4. Small cluster size (<20) should NOT automatically mean low novelty; niche innovation exists.
+"""
 
 
 class PatternSelector:
@@ -16,6 +71,8 @@ class PatternSelector:
         self.recalled_patterns = recalled_patterns
         self.user_idea = user_idea
         self.pattern_classifications = {}  # 存储 LLM 分类结果
+        self._pattern_info_by_id = {pid: pinfo for pid, pinfo, _ in recalled_patterns}
+        self._memo = get_pattern_memo()
 
     def select(self) -> Dict[str, List[Tuple[str, Dict, Dict]]]:
         """选择多个 Pattern 并按三个维度（稳健度、新颖度、跨域度）分别排序
@@ -73,53 +130,94 @@ class PatternSelector:
         return ranked
 
     def _score_patterns_multidimensional(self):
-        """为所有 Pattern 计算三个维度的得分（稳健度、新颖度、跨域度）"""
+        """为所有 Pattern 计算三个维度的得分（稳健度、新颖度、跨域度）
+
+        模式 (PipelineConfig.PATTERN_SCORING_MODE):
+          - serial: 逐个调用，后续调用以已评分 Pattern 作为校准示例
+          - concurrent: 并发逐个调用（固定校准示例），结果按召回顺序合并
+          - batch: 单次 LLM 调用评分全部 Pattern，缺失的再并发补评
+        """
         # 对 Top-20 进行 LLM 评分（平衡效果和成本）
         top_patterns = self.recalled_patterns[:20]
-
-        for pattern_id, pattern_info, recall_score in top_patterns:
-            # 构建 Pattern 摘要信息
-            pattern_name = pattern_info.get('name', '')
-            pattern_size = pattern_info.get('size', 0)
-
-            summary = pattern_info.get('summary', {})
-            if isinstance(summary, dict):
-                representative_ideas = summary.get('representative_ideas', [])[:3]
-                common_problems = summary.get('common_problems', [])[:2]
-            else:
-                representative_ideas = []
-                common_problems = []
-
-            # 调用 LLM 进行多维度评分
-            scores = self._call_llm_for_multidim_scoring(
-                pattern_id, pattern_name, pattern_size,
-                representative_ideas, common_problems
+        mode = str(getattr(PipelineConfig, "PATTERN_SCORING_MODE", "serial") or "serial").lower()
+
+        cached = {}
+        if self._memo is not None:
+            cached = self._memo.get_many(
+                "multidim", _MULTIDIM_PROMPT_VERSION,
+                [(pid, pinfo) for pid, pinfo, _ in top_patterns],
+                idea=self._memo_idea(),
             )
+            if cached:
+                print(f"  ♻️  缓存命中 {len(cached)}/{len(top_patterns)} 个 Pattern 评分")
+
+        if mode == "serial":
+            for item in top_patterns:
+                scores = cached.get(item[0]) or self._score_single_pattern(item)
+                self._record_scores(item[0], scores)
+            return
+
+        results = dict(cached)
+        pending = [item for item in top_patterns if item[0] not in results]
+        if mode == "batch" and pending:
+            results.update(self._call_llm_for_batch_scoring(pending))
+            missing = [item for item in pending if item[0] not in results]
+            if missing:
+                print(f"  ⚠️  批量评分缺失 {len(missing)} 个 Pattern，逐个补评...")
+        else:
+            missing = pending
 
-            if scores:
-                self.pattern_classifications[pattern_id] = scores
-                print(f"  ✓ {pattern_id}: 稳健={scores.get('stability_score', 0):.2f}, "
-                      f"新颖={scores.get('novelty_score', 0):.2f}, "
-                      f"域距={scores.get('domain_distance', 0):.2f}")
+        max_workers = int(getattr(PipelineConfig, "PATTERN_SCORING_MAX_WORKERS", 8) or 1)
+        scored = run_in_threads(
+            lambda item: self._score_single_pattern(item, reference_examples=_STATIC_REFERENCE_EXAMPLES),
+            missing,
+            max_workers,
+        )
+        for item, scores in zip(missing, scored):
+            results[item[0]] = scores
+
+        for pattern_id, _, _ in top_patterns:
+            self._record_scores(pattern_id, results.get(pattern_id))
+
+    def _memo_idea(self) -> Optional[str]:
+        return self.user_idea if PATTERN_MEMO_KEY_BY_IDEA else None
+
+    def _memo_put(self, pattern_id: str, scores: Dict):
+        pattern_info = self._pattern_info_by_id.get(pattern_id)
+        if self._memo is None or pattern_info is None:
+            return
+        self._memo.put("multidim", _MULTIDIM_PROMPT_VERSION, pattern_id, pattern_info, scores,
+                       idea=self._memo_idea())
+
+    def _record_scores(self, pattern_id: str, scores: Optional[Dict]):
+        if scores:
+            self.pattern_classifications[pattern_id] = scores
+            print(f"  ✓ {pattern_id}: 稳健={scores.get('stability_score', 0):.2f}, "
+                  f"新颖={scores.get('novelty_score', 0):.2f}, "
+                  f"域距={scores.get('domain_distance', 0):.2f}")
+
+    def _pattern_summary(self, pattern_info: Dict) -> Tuple[List[str], List[str]]:
+        summary = pattern_info.get('summary', {})
+        if isinstance(summary, dict):
+            return summary.get('representative_ideas', [])[:3], summary.get('common_problems', [])[:2]
+        return [], []
+
+    def _score_single_pattern(self, item: Tuple[str, Dict, float],
+                              reference_examples: Optional[str] = None) -> Optional[Dict]:
+        pattern_id, pattern_info, _ = item
+        representative_ideas, common_problems = self._pattern_summary(pattern_info)
+        return self._call_llm_for_multidim_scoring(
+            pattern_id, pattern_info.get('name', ''), pattern_info.get('size', 0),
+            representative_ideas, common_problems,
+            reference_examples=reference_examples,
+        )
 
     def _generate_reference_examples(self, current_pattern_id: str) -> str:
         """生成参考示例来校准 LLM 评分，基于已评分的 Pattern"""
         # 如果已有评分，使用它们作为参考；否则生成人工示例
         if not self.pattern_classifications:
             # 没有已评分的Pattern，使用人工示例
-            return """
-Example 1 - LOW novelty, HIGH stability (Size 150):
-  "Attention Is All You Need" application - highly replicated, but well-known approach
-  → stability_score: 0.85, novelty_score: 0.15
-
-Example 2 - HIGH novelty, MEDIUM stability (Size 25):
-  "Reframing task as code generation problem" - novel angle, but niche community
-  → stability_score: 0.35, novelty_score: 0.75
-
-Example 3 - MEDIUM novelty, MEDIUM stability (Size 60):
-  "Combining RAG with multi-hop reasoning" - interesting combination, growing adoption
-  → stability_score: 0.60, novelty_score: 0.55
-"""
+            return _STATIC_REFERENCE_EXAMPLES
         else:
             # 从已评分中提取几个代表性样本
             samples = []
@@ -132,13 +230,15 @@ Example 3 - MEDIUM novelty, MEDIUM stability (Size 60):
 
     def _call_llm_for_multidim_scoring(self, pattern_id: str, pattern_name: str,
                                        pattern_size: int, ideas: List[str],
-                                       problems: List[str]) -> Optional[Dict]:
+                                       problems: List[str],
+                                       reference_examples: Optional[str] = None) -> Optional[Dict]:
         """调用 LLM 为单个 Pattern 计算三个维度的得分（稳健度、新颖度、跨域度）"""
 
         ideas_text = "\n".join(f"- {idea}" for idea in ideas[:3])
 
         # 生成一些对比参考（从已评分的 Pattern 中抽取）
-        reference_examples = self._generate_reference_examples(pattern_id)
+        if reference_examples is None:
+            reference_examples = self._generate_reference_examples(pattern_id)
 
         prompt = f"""
 You are a **CRITICAL Multidimensional Pattern Scorer** for top-tier AI conferences (ICLR/NeurIPS).
@@ -158,41 +258,7 @@ Representative Research Ideas:
 【Reference Examples (for calibration)】
 {reference_examples}
 
-【Scoring Guidelines - Be CRITICAL and DISCRIMINATIVE】
-
-**Stability Score (0.0-1.0)** - How proven, mature, and widely-adopted?
-Consider: Has this approach been replicated across many papers? Are there established benchmarks?
-- 0.1-0.25: Highly experimental, niche idea, Size < 15, no standard benchmarks, high uncertainty
-- 0.3-0.45: Early-stage research, Size 15-40, some implementations but inconsistent results
-- 0.5-0.65: Maturing approach, Size 40-70, multiple independent implementations, emerging consensus
-- 0.7-0.85: Well-established, Size 70-120, standard benchmarks, widely replicated with consistent gains
-- 0.9-1.0: Foundational/canonical approach, Size > 120, ubiquitous, considered solved or foundational
-🔴 RED FLAG: Avoid giving middle scores (0.4-0.6) to everything. Distinguish clearly.
-
-**Novelty Score (0.0-1.0)** - How original, counter-intuitive, and fresh is this?
-Consider: Is this a new perspective? Does it challenge existing assumptions? Or incremental variation?
-- 0.1-0.25: Well-trodden path, combinations of existing techniques, straightforward application
-- 0.3-0.45: Some novelty in execution or application domain, but builds on established ideas
-- 0.5-0.65: Interesting recombination or new angle on known problems, moderate originality
-- 0.7-0.85: Novel methodology, surprising insight, challenges conventional wisdom, fresh angle
-- 0.9-1.0: Paradigm shift, highly counter-intuitive, fundamentally new problem formulation
-🔴 RED FLAG: If pattern_name suggests "reframing" or "transforming", likely 0.6+. If it's optimization/tuning, likely 0.2-0.4.
-
-**Domain Distance (0.0-1.0)** - How different from user's core idea?
-Consider semantic and methodological distance, not just application domain.
-- 0.0-0.15: Directly addresses same problem, highly relevant methodology
-- 0.2-0.35: Related domain/approach, applicable with minor adaptation
-- 0.4-0.55: Different domain but transferable insights, moderate adaptation needed
-- 0.6-0.8: Orthogonal domain, interesting cross-domain inspirations
-- 0.85-1.0: Completely different field, minimal direct relevance
-💡 TIP: Compare pattern semantics to user idea content for distance.
-
-【CRITICAL INSTRUCTIONS】
-1. DO NOT give all patterns middle-range scores (0.4-0.6). Spread the distribution.
-2. DISTINGUISH between: optimization (low novelty), new methodology (medium), paradigm shift (high).
-3. Large cluster size (>100) should NOT automatically mean high stability if methodology is flawed.
-4. Small cluster size (<20) should NOT automatically mean low novelty; niche innovation exists.
-
+{_SCORING_GUIDELINES}
 【Output Format - JSON ONLY】
 {{
   "stability_score": 0.75,
@@ -203,10 +269,12 @@ Consider semantic and methodological distance, not just application domain.
 """
 
         try:
-            # 使用更长的超时时间（180 秒）以应对网络较慢的情况
-            response = call_llm(prompt, temperature=0.3, max_tokens=300, timeout=180)
+            # 使用更长的超时时间（默认 180 秒）以应对网络较慢的情况
+            timeout = int(getattr(PipelineConfig, "PATTERN_SCORING_TIMEOUT", 180))
+            response = call_llm(prompt, temperature=0.3, max_tokens=300, timeout=timeout)
             scores = parse_json_from_llm(response)
             if scores and all(k in scores for k in ['stability_score', 'novelty_score', 'domain_distance']):
+                self._memo_put(pattern_id, scores)
                 return scores
         except Exception as e:
             print(f"  ⚠️  LLM 评分失败 ({pattern_id}): {e}")
@@ -214,6 +282,66 @@ Consider semantic and methodological distance, not just application domain.
         # Fallback: 使用规则计算
         return self._fallback_multidim_scoring(pattern_size)
 
+    def _call_llm_for_batch_scoring(self, patterns: List[Tuple[str, Dict, float]]) -> Dict[str, Dict]:
+        """单次 LLM 调用为全部 Pattern 评分；返回 {pattern_id: scores}（仅包含解析成功的条目）"""
+        if not patterns:
+            return {}
+        blocks = []
+        for pattern_id, pattern_info, _ in patterns:
+            ideas, _ = self._pattern_summary(pattern_info)
+            ideas_text = "\n".join(f"  - {idea}" for idea in ideas[:3]) or "  N/A"
+            blocks.append(
+                f"Pattern ID: {pattern_id}\n"
+                f"Name: {pattern_info.get('name', '')}\n"
+                f"Cluster Size: {pattern_info.get('size', 0)} papers\n"
+                f"Representative Research Ideas:\n{ideas_text}"
+            )
+        patterns_text = "\n\n".join(blocks)
+
+        prompt = f"""
+You are a **CRITICAL Multidimensional Pattern Scorer** for top-tier AI conferences (ICLR/NeurIPS).
+Your task is to rigorously evaluate EACH of the {len(patterns)} research patterns below across THREE independent dimensions.
+⚠️  IMPORTANT: Avoid clustering scores in the middle range. Be discriminative across patterns!
+
+【User's Research Idea】
+"{self.user_idea}"
+
+【Patterns】
+{patterns_text}
+
+【Reference Examples (for calibration)】
+{_STATIC_REFERENCE_EXAMPLES}
+
+{_SCORING_GUIDELINES}
+【Output Format - JSON ONLY】 one entry per pattern, using the exact Pattern IDs above:
+{{
+  "patterns": [
+    {{"pattern_id": "pattern_1", "stability_score": 0.75, "novelty_score": 0.55, "domain_distance": 0.25, "reasoning": "short reason"}}
+  ]
+}}
+"""
+        timeout = int(getattr(PipelineConfig, "PATTERN_SCORING_TIMEOUT", 180))
+        try:
+            response = call_llm(prompt, temperature=0.3, max_tokens=120 * len(patterns) + 200, timeout=timeout)
+            parsed = parse_json_from_llm(response)
+        except Exception as e:
+            print(f"  ⚠️  批量 LLM 评分失败: {e}")
+            return {}
+
+        wanted = {pattern_id for pattern_id, _, _ in patterns}
+        results = {}
+        entries = parsed.get("patterns") if isinstance(parsed, dict) else None
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict):
+                continue
+            pattern_id = entry.get("pattern_id")
+            if pattern_id not in wanted or pattern_id in results:
+                continue
+            if all(k in entry for k in ['stability_score', 'novelty_score', 'domain_distance']):
+                results[pattern_id] = {k: v for k, v in entry.items() if k != "pattern_id"}
+                self._memo_put(pattern_id, results[pattern_id])
+        return results
+
     def _rank_patterns_by_dimensions(self) -> Dict[str, List[Tuple[str, Dict, Dict]]]:
         """按三个维度（稳健度、新颖度、跨域度）分别排序所有 Pattern"""
         ranked = {
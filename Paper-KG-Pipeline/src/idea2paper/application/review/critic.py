@@ -1,16 +1,53 @@
 import re
+from contextvars import ContextVar
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
+
 from idea2paper.config import PipelineConfig
+from idea2paper.infra.concurrency import run_in_threads
 from idea2paper.infra.llm import call_llm, parse_json_from_llm
+from idea2paper.infra.llm_cache import discard_cached_response
 from idea2paper.review.review_index import ReviewIndex
 from idea2paper.infra.run_context import get_logger
 
+# Events emitted by a reviewer role running in a worker thread are buffered here
+# and flushed in role order, so events.jsonl does not depend on thread timing.
+_role_event_buffer: ContextVar[Optional[List[Tuple[str, Dict]]]] = ContextVar("critic_role_event_buffer", default=None)
+
 
 def _sigmoid(x: float) -> float:
     return 1 / (1 + pow(2.718281828459045, -x))
 
 
+@lru_cache(maxsize=8)
+def _score_grid(step: float) -> np.ndarray:
+    """Grid S = 1.0, 1.0+step, ... <= 10 built by repeated addition (same float values as `S += step`)."""
+    n = int((9.0 + 1e-9) / step) + 2
+    grid = np.cumsum(np.concatenate([[1.0], np.full(n, step)]))
+    grid = grid[grid <= 10.0 + 1e-9]
+    grid.setflags(write=False)
+    return grid
+
+
+def fit_anchor_score(probs: List[float], weights: List[float], scores: List[float],
+                     k: float, step: float) -> Tuple[float, float]:
+    """Grid-search S minimizing sum_i w_i * (sigmoid(k * (S - s_i)) - p_i)^2.
+
+    The whole grid is evaluated at once; terms are accumulated anchor by anchor
+    so each grid loss equals the scalar loop bit for bit, and ties resolve to the
+    smallest S. Returns (best_S, best_loss).
+    """
+    grid = _score_grid(float(step))
+    losses = np.zeros_like(grid)
+    for p, w, s in zip(probs, weights, scores):
+        pred = 1 / (1 + np.power(2.718281828459045, -(k * (grid - s))))
+        losses += w * (pred - p) ** 2
+    idx = int(np.argmin(losses))
+    return float(grid[idx]), float(losses[idx])
+
+
 def _safe_mean(values: List[float]) -> float:
     if not values:
         return 0.0
@@ -29,6 +66,10 @@ class MultiAgentCritic:
         ]
 
     def _log_event(self, event_type: str, payload: Dict):
+        buffer = _role_event_buffer.get()
+        if buffer is not None:
+            buffer.append((event_type, payload))
+            return
         logger = get_logger()
         if logger:
             logger.log_event(event_type, payload)
@@ -186,6 +227,97 @@ Return ONLY the corrected JSON:
     def _build_reemit_prompt(self, story: Dict, reviewer: Dict, anchors: List[Dict]) -> str:
         return self._build_anchor_prompt(story, reviewer, anchors)
 
+    def _build_combined_prompt(self, story: Dict, anchors: List[Dict]) -> str:
+        problem_text = story.get('problem_framing') or story.get('problem_definition', '')
+        method_text = story.get('method_skeleton', '')
+        if isinstance(method_text, dict):
+            method_text = ' '.join(str(v) for v in method_text.values() if v)
+
+        anchor_lines = []
+        for a in anchors:
+            anchor_lines.append(
+                f"- paper_id: {a['paper_id']} | title: {a.get('title','')} | score10: {a['score10']:.1f}"
+            )
+        anchor_text = "\n".join(anchor_lines)
+        roles = [r['role'] for r in self.reviewers]
+        role_keys = ", ".join(f'"{role}"' for role in roles)
+
+        return f"""
+You are a panel of {len(roles)} strict reviewers for top-tier ML/NLP conferences, one per role: {', '.join(roles)}.
+You must NOT output a direct score. Only compare the Story against anchor papers with real review scores.
+
+Anchors (score10 comes from real review statistics):
+{anchor_text}
+
+Story:
+Title: {story.get('title','')}
+Abstract: {story.get('abstract','')}
+Problem: {problem_text}
+Method: {method_text}
+Claims: {', '.join(story.get('innovation_claims', []))}
+Experiments: {story.get('experiments_plan','')}
+
+Task:
+Judge each role independently, from that role's perspective only.
+For each role and each anchor, decide whether the Story is better, tie, or worse on that role, and provide confidence (0-1).
+You must mention the anchor's score10 in the rationale using the format "score10: X.X".
+Each role's comparisons must include every anchor exactly once.
+Each rationale must be ONE sentence (<=25 words).
+
+Output JSON ONLY. No markdown, no extra text. "roles" must contain exactly the keys {role_keys}:
+{{
+  "roles": {{
+    "{roles[0]}": {{
+      "comparisons": [
+        {{"paper_id":"...", "judgement":"better|tie|worse", "confidence":0.0-1.0, "rationale":"...score10: X.X..."}}
+      ],
+      "main_gaps": ["gap1", "gap2", "gap3"]
+    }}
+  }}
+}}
+"""
+
+    def _get_combined_comparisons(
+        self,
+        story: Dict,
+        anchors: List[Dict],
+        pattern_id: str
+    ) -> Dict[str, Tuple[List[Dict], List[str]]]:
+        """单次调用取得全部角色的比较；返回 {role: (comparisons, main_gaps)}（仅包含校验通过的角色）"""
+        prompt = self._build_combined_prompt(story, anchors)
+        max_tokens = 800 * len(self.reviewers)
+        response = call_llm(prompt, temperature=0.0, max_tokens=max_tokens, timeout=180)
+        result = parse_json_from_llm(response)
+        role_results = result.get("roles") if isinstance(result, dict) else None
+        if not isinstance(role_results, dict):
+            role_results = {}
+
+        accepted = {}
+        failed = {}
+        for reviewer in self.reviewers:
+            role = reviewer['role']
+            if role not in role_results:
+                failed[role] = "parse_failed" if result is None else "missing_role"
+                continue
+            ok, reason, normalized = self._validate_comparisons(role_results[role], anchors)
+            if ok:
+                accepted[role] = (normalized["comparisons"], normalized.get("main_gaps", []))
+            else:
+                failed[role] = reason
+
+        if failed:
+            # 部分角色无效时不缓存整份输出，下次评审重新请求
+            discard_cached_response(prompt, temperature=0.0, max_tokens=max_tokens)
+            print(f"   ⚠️  合并评审中 {len(failed)} 个角色输出无效，改为逐角色调用: {', '.join(failed)}")
+        self._log_event("critic_combined_output", {
+            "pattern_id": pattern_id,
+            "accepted_roles": list(accepted),
+            "failed_roles": failed,
+            "response_len": len(response),
+            "truncated_suspected": self._suspect_truncation(response) if failed else False
+        })
+        return accepted
+
     def _get_comparisons_with_retries(
         self,
         story: Dict,
@@ -203,6 +335,8 @@ Return ONLY the corrected JSON:
         if ok:
             return normalized["comparisons"], normalized.get("main_gaps", [])
 
+        # 无效输出不留在响应缓存里，否则 reemit 会原样取回同一份输出
+        discard_cached_response(base_prompt, temperature=0.0, max_tokens=800)
         self._log_event("critic_invalid_output", {
             "pattern_id": pattern_id,
             "role": reviewer.get("role"),
@@ -224,7 +358,7 @@ Return ONLY the corrected JSON:
             else:
                 prompt = self._build_reemit_prompt(story, reviewer, anchors)
 
-            print(f"   ⏳ Critic JSON retry {attempt}/{retries} ({strategy})...")
+            print(f"   ⏳ Critic JSON retry {attempt}/{retries} ({strategy}, {reviewer.get('role')})...")
             response = call_llm(prompt, temperature=0.0, max_tokens=800, timeout=180)
             result = parse_json_from_llm(response)
             ok, reason, normalized = (False, "parse_failed", {})
@@ -240,6 +374,7 @@ Return ONLY the corrected JSON:
                 })
                 return normalized["comparisons"], normalized.get("main_gaps", [])
 
+            discard_cached_response(prompt, temperature=0.0, max_tokens=800)
             self._log_event("critic_invalid_output", {
                 "pattern_id": pattern_id,
                 "role": reviewer.get("role"),
@@ -421,7 +556,8 @@ Return ONLY the corrected JSON:
             if additional:
                 anchors = anchors + additional
                 anchors_rounds.append(additional)
-                round2 = self._anchored_reviews(story, anchors, pattern_id)
+                # 只让各角色比较新增锚点，与第一轮的比较合并后重新拟合分数
+                round2 = self._anchored_reviews(story, additional, pattern_id, previous=round1)
             else:
                 round2 = round1
         else:
@@ -598,13 +734,53 @@ Return ONLY the corrected JSON:
             'feedback': feedback
         }
 
-    def _anchored_reviews(self, story: Dict, anchors: List[Dict], pattern_id: str) -> Dict:
+    def _anchored_reviews(self, story: Dict, anchors: List[Dict], pattern_id: str,
+                          previous: Optional[Dict] = None) -> Dict:
+        """Run every role against `anchors`.
+
+        With `previous` (the result of an earlier round) only `anchors` -- the newly
+        added ones -- are sent; each role's comparisons are merged with its earlier
+        ones and the score is fitted on all anchors.
+        """
+        round_no = previous['round'] + 1 if previous else 1
+        all_anchors = previous['anchors'] + anchors if previous else anchors
+        for reviewer in self.reviewers:
+            print(f"\n📝 {reviewer['name']} ({reviewer['role']}) 评审中...")
+
+        combined = {}
+        if str(getattr(PipelineConfig, "CRITIC_MODE", "per_role") or "per_role").lower() == "combined":
+            combined = self._get_combined_comparisons(story, anchors, pattern_id)
+
+        def run_role(reviewer: Dict):
+            events = []
+            token = _role_event_buffer.set(events)
+            try:
+                anchored = self._anchored_review(
+                    story, reviewer, anchors, pattern_id, precomputed=combined.get(reviewer['role']),
+                    previous=(previous['anchors'], previous['role_details'][reviewer['role']]) if previous else None,
+                    round_no=round_no,
+                )
+                return anchored, events, None
+            except Exception as e:
+                return None, events, e
+            finally:
+                _role_event_buffer.reset(token)
+
+        max_workers = int(getattr(PipelineConfig, "CRITIC_MAX_WORKERS", 3) or 1)
+        outcomes = run_in_threads(run_role, self.reviewers, max_workers)
+
+        # Flush buffered events in role order, then surface the first failure.
+        for _, events, _ in outcomes:
+            for event_type, payload in events:
+                self._log_event(event_type, payload)
+        for _, _, error in outcomes:
+            if error is not None:
+                raise error
+
         reviews = []
         scores = []
         role_details = {}
-        for reviewer in self.reviewers:
-            print(f"\n📝 {reviewer['name']} ({reviewer['role']}) 评审中...")
-            anchored = self._anchored_review(story, reviewer, anchors, pattern_id)
+        for reviewer, (anchored, _, _) in zip(self.reviewers, outcomes):
             score = anchored['score']
             reviews.append({
                 'reviewer': reviewer['name'],
@@ -615,23 +791,48 @@ Return ONLY the corrected JSON:
             scores.append(score)
             role_details[reviewer['role']] = anchored['detail']
 
+            print(f"\n📝 {reviewer['name']} ({reviewer['role']})")
             print(f"   评分: {score:.1f}/10")
             print(f"   反馈: {anchored['feedback']}")
 
         return {
             'reviews': reviews,
             'scores': scores,
-            'role_details': role_details
+            'role_details': role_details,
+            'anchors': all_anchors,
+            'round': round_no
         }
 
-    def _anchored_review(self, story: Dict, reviewer: Dict, anchors: List[Dict], pattern_id: str) -> Dict:
-        """Anchored review: compare against real papers, then deterministically fit score."""
-        comparisons, main_gaps = self._get_comparisons_with_retries(
-            story=story,
-            reviewer=reviewer,
-            anchors=anchors,
-            pattern_id=pattern_id
-        )
+    def _anchored_review(self, story: Dict, reviewer: Dict, anchors: List[Dict], pattern_id: str,
+                         precomputed: Optional[Tuple[List[Dict], List[str]]] = None,
+                         previous: Optional[Tuple[List[Dict], Dict]] = None, round_no: int = 1) -> Dict:
+        """Anchored review: compare against real papers, then deterministically fit score.
+
+        `precomputed` holds validated (comparisons, main_gaps) from the combined call;
+        without it the role is asked on its own. `previous` is (anchors, role detail)
+        of the earlier round whose comparisons are reused. Every comparison records
+        the round it came from.
+        """
+        if precomputed is not None:
+            comparisons, main_gaps = precomputed
+        else:
+            comparisons, main_gaps = self._get_comparisons_with_retries(
+                story=story,
+                reviewer=reviewer,
+                anchors=anchors,
+                pattern_id=pattern_id
+            )
+        comparisons = [dict(c, round=round_no) for c in comparisons]
+
+        if previous is not None:
+            previous_anchors, previous_detail = previous
+            anchors = previous_anchors + anchors
+            comparisons = previous_detail['comparisons'] + comparisons
+            merged_gaps = list(previous_detail.get('main_gaps', []))
+            for gap in main_gaps:
+                if gap not in merged_gaps:
+                    merged_gaps.append(gap)
+            main_gaps = merged_gaps
 
         score, detail = self._compute_score_from_comparisons(anchors, comparisons)
         feedback = f"Main gaps: {', '.join(main_gaps[:3])}. Anchored against {len(anchors)} papers."
@@ -683,21 +884,10 @@ Return ONLY the corrected JSON:
 
         k = getattr(PipelineConfig, "SIGMOID_K", 1.2)
         step = getattr(PipelineConfig, "GRID_STEP", 0.01)
-        best_s = 5.0
-        best_loss = None
-        S = 1.0
-        while S <= 10.0 + 1e-9:
-            loss = 0.0
-            for p, w, s in zip(probs, weights, scores):
-                pred = _sigmoid(k * (S - s))
-                loss += w * (pred - p) ** 2
-            if best_loss is None or loss < best_loss:
-                best_loss = loss
-                best_s = S
-            S += step
+        best_s, best_loss = fit_anchor_score(probs, weights, scores, k, step)
 
         detail = {
-            "loss": best_loss if best_loss is not None else 0.0,
+            "loss": best_loss,
             "avg_confidence": _safe_mean(confs),
             "monotonic_violations": monotonic_violations
         }
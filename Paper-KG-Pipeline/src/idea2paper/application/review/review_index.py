@@ -1,47 +1,61 @@
-import math
 from typing import Dict, List, Optional, Iterable
 
+import numpy as np
+
+from idea2paper.recall.paper_quality import PaperQualityTable
+
 
 class ReviewIndex:
     """Index papers by pattern_id and provide deterministic anchor selection."""
 
-    def __init__(self, papers: List[Dict]):
+    def __init__(self, papers: List[Dict], quality: Optional[PaperQualityTable] = None):
         self.papers = papers or []
         self.pattern_to_papers: Dict[str, List[Dict]] = {}
         self.paper_id_to_summary: Dict[str, Dict] = {}
         self.global_scores_sorted: List[float] = []
-        self._build_index()
+        self._build_index(quality)
 
-    def _build_index(self):
-        for paper in self.papers:
+    def _build_index(self, quality: Optional[PaperQualityTable] = None):
+        # quality arrays are aligned with self.papers rows; reuse a prebuilt table when given
+        if quality is None or len(quality) != len(self.papers):
+            quality = PaperQualityTable.from_papers(self.papers)
+        score10 = 1 + 9 * quality.review_score
+        dispersion10 = 9 * quality.dispersion
+        weight = np.log(1 + quality.review_count) / (1 + np.maximum(dispersion10, 0.0))
+
+        for row, paper in enumerate(self.papers):
             pattern_id = paper.get("pattern_id", "")
             paper_id = paper.get("paper_id", "")
             if not pattern_id or not paper_id:
                 continue
 
-            review_stats = paper.get("review_stats", {}) or {}
-            avg_score = float(review_stats.get("avg_score", 0.5))
-            review_count = int(review_stats.get("review_count", 0))
-            highest = float(review_stats.get("highest_score", avg_score))
-            lowest = float(review_stats.get("lowest_score", avg_score))
-
-            score10 = 1 + 9 * avg_score
-            dispersion10 = 9 * (highest - lowest)
-            weight = math.log(1 + review_count) / (1 + max(dispersion10, 0.0))
-
             summary = {
                 "paper_id": paper_id,
                 "title": paper.get("title", ""),
                 "pattern_id": pattern_id,
-                "score10": score10,
-                "review_count": review_count,
-                "dispersion10": dispersion10,
-                "weight": weight,
+                "score10": float(score10[row]),
+                "review_count": int(quality.review_count[row]),
+                "dispersion10": float(dispersion10[row]),
+                "weight": float(weight[row]),
             }
 
-            self.paper_id_to_summary[paper_id] = summary
-            self.pattern_to_papers.setdefault(pattern_id, []).append(summary)
+            self._add_summary(summary)
+        self._finalize()
+
+    @classmethod
+    def from_summaries(cls, summaries: List[Dict]) -> "ReviewIndex":
+        """Rebuild from precomputed per-paper summaries (e.g. served by the index service)."""
+        index = cls([])
+        for summary in summaries or []:
+            index._add_summary(dict(summary))
+        index._finalize()
+        return index
+
+    def _add_summary(self, summary: Dict):
+        self.paper_id_to_summary[summary["paper_id"]] = summary
+        self.pattern_to_papers.setdefault(summary["pattern_id"], []).append(summary)
 
+    def _finalize(self):
         # keep deterministic order
         for pattern_id, plist in self.pattern_to_papers.items():
             plist.sort(key=lambda x: (x["score10"], x["paper_id"]))
@@ -116,6 +116,143 @@ EMBEDDING_MODEL = _get(
 # Secret: only from env/.env; fallback to SILICONFLOW_API_KEY (LLM_API_KEY)
 EMBEDDING_API_KEY = os.getenv("EMBEDDING_API_KEY", "") or LLM_API_KEY
 
+# ===================== HTTP 客户端配置 =====================
+# LLM / Embedding 共用的进程级连接池（keep-alive 复用 TCP/TLS 连接）
+HTTP_POOL_CONNECTIONS = _get(
+    "I2P_HTTP_POOL_CONNECTIONS",
+    10,
+    cast=int,
+    cfg_path=["http", "pool_connections"],
+)  # 缓存的 host 连接池数量
+HTTP_POOL_MAXSIZE = _get(
+    "I2P_HTTP_POOL_MAXSIZE",
+    32,
+    cast=int,
+    cfg_path=["http", "pool_maxsize"],
+)  # 每个 host 保持的最大连接数（应不小于并发调用数）
+HTTP_KEEPALIVE_SEC = _get(
+    "I2P_HTTP_KEEPALIVE_SEC",
+    60.0,
+    cast=float,
+    cfg_path=["http", "keepalive_sec"],
+)  # 空闲连接保留时间（仅 HTTP/2 客户端生效；requests 由服务端决定）
+HTTP_MAX_RETRIES = _get(
+    "I2P_HTTP_MAX_RETRIES",
+    3,
+    cast=int,
+    cfg_path=["http", "max_retries"],
+)
+HTTP_BACKOFF_FACTOR = _get(
+    "I2P_HTTP_BACKOFF_FACTOR",
+    2.0,
+    cast=float,
+    cfg_path=["http", "backoff_factor"],
+)
+HTTP_HTTP2 = _get(
+    "I2P_HTTP_HTTP2",
+    False,
+    cast=bool,
+    cfg_path=["http", "http2"],
+)  # 需要安装 httpx[http2]；未安装时回退到 requests
+# LLM / Embedding 请求的进程级并发上限与速率（每秒请求数，0 = 不限速）；作用于同步 call_llm / get_embedding(s_batch)
+# 的每次 HTTP 请求，线程池中的调用与 acall_llm / aget_embeddings_batch 共享同一上限（env 名保留 ASYNC_ 前缀以兼容旧配置）
+ASYNC_LLM_MAX_CONCURRENCY = _get(
+    "I2P_ASYNC_LLM_MAX_CONCURRENCY",
+    8,
+    cast=int,
+    cfg_path=["http", "llm_max_concurrency"],
+)
+ASYNC_LLM_RPS = _get(
+    "I2P_ASYNC_LLM_RPS",
+    0.0,
+    cast=float,
+    cfg_path=["http", "llm_rps"],
+)
+ASYNC_EMBEDDING_MAX_CONCURRENCY = _get(
+    "I2P_ASYNC_EMBEDDING_MAX_CONCURRENCY",
+    4,
+    cast=int,
+    cfg_path=["http", "embedding_max_concurrency"],
+)
+ASYNC_EMBEDDING_RPS = _get(
+    "I2P_ASYNC_EMBEDDING_RPS",
+    0.0,
+    cast=float,
+    cfg_path=["http", "embedding_rps"],
+)
+
+# ===================== Cache 配置 =====================
+# 跨进程共享的磁盘缓存根目录（SQLite 文件）
+CACHE_ROOT = _get(
+    "I2P_CACHE_DIR",
+    str(REPO_ROOT / "cache"),
+    cast=Path,
+    cfg_path=["cache", "dir"],
+)
+EMBEDDING_CACHE_ENABLE = _get(
+    "I2P_EMBEDDING_CACHE_ENABLE",
+    True,
+    cast=bool,
+    cfg_path=["cache", "embedding_enable"],
+)
+EMBEDDING_CACHE_MAX_ENTRIES = _get(
+    "I2P_EMBEDDING_CACHE_MAX_ENTRIES",
+    50000,
+    cast=int,
+    cfg_path=["cache", "embedding_max_entries"],
+)
+# 索引校验用的文件指纹缓存（按 size/mtime/inode 复用 sha256 与 JSONL 行数）
+FINGERPRINT_CACHE_ENABLE = _get(
+    "I2P_FINGERPRINT_CACHE_ENABLE",
+    True,
+    cast=bool,
+    cfg_path=["cache", "fingerprint_enable"],
+)
+# Pattern 级 LLM 结果记忆化（多维度评分 / Pattern DNA），nodes_pattern.json 变化时自动失效
+PATTERN_MEMO_ENABLE = _get(
+    "I2P_PATTERN_MEMO_ENABLE",
+    True,
+    cast=bool,
+    cfg_path=["cache", "pattern_memo_enable"],
+)
+PATTERN_MEMO_MAX_ENTRIES = _get(
+    "I2P_PATTERN_MEMO_MAX_ENTRIES",
+    20000,
+    cast=int,
+    cfg_path=["cache", "pattern_memo_max_entries"],
+)
+PATTERN_MEMO_TTL_SEC = _get(
+    "I2P_PATTERN_MEMO_TTL_SEC",
+    0,
+    cast=float,
+    cfg_path=["cache", "pattern_memo_ttl_sec"],
+)  # 0 = 不过期
+PATTERN_MEMO_KEY_BY_IDEA = _get(
+    "I2P_PATTERN_MEMO_KEY_BY_IDEA",
+    True,
+    cast=bool,
+    cfg_path=["cache", "pattern_memo_key_by_idea"],
+)  # 多维度评分的缓存键是否包含用户 idea（domain_distance 依赖 idea）
+# temperature=0 的 LLM 调用响应缓存（键 = model + temperature + max_tokens + prompt 哈希），默认关闭
+LLM_CACHE_ENABLE = _get(
+    "I2P_LLM_CACHE_ENABLE",
+    False,
+    cast=bool,
+    cfg_path=["cache", "llm_enable"],
+)
+LLM_CACHE_MAX_ENTRIES = _get(
+    "I2P_LLM_CACHE_MAX_ENTRIES",
+    5000,
+    cast=int,
+    cfg_path=["cache", "llm_max_entries"],
+)
+LLM_CACHE_TTL_SEC = _get(
+    "I2P_LLM_CACHE_TTL_SEC",
+    0,
+    cast=float,
+    cfg_path=["cache", "llm_ttl_sec"],
+)  # 0 = 不过期
+
 # ===================== Run Logging 配置 =====================
 LOG_ROOT = _get(
     "I2P_LOG_DIR",
@@ -170,6 +307,63 @@ INDEX_DIR_MODE = _get(
     cfg_path=["index", "dir_mode"],
 )
 
+# 离线索引的 embedding 存储精度: float32 | float16 | int8（按行缩放）
+INDEX_EMB_DTYPE = _get(
+    "I2P_INDEX_EMB_DTYPE",
+    "float32",
+    cast=str,
+    cfg_path=["index", "emb_dtype"],
+)
+
+# 增量索引: nodes 变化时只embedding新增/变更条目并追加为 delta 段，删除的条目记为 tombstone；
+# delta 段数或失效行占比超过阈值时合并回 base
+INDEX_DELTA_ENABLE = _get(
+    "I2P_INDEX_DELTA_ENABLE",
+    True,
+    cast=bool,
+    cfg_path=["index", "delta_enable"],
+)
+INDEX_DELTA_MAX_SEGMENTS = _get(
+    "I2P_INDEX_DELTA_MAX_SEGMENTS",
+    8,
+    cast=int,
+    cfg_path=["index", "delta_max_segments"],
+)
+INDEX_DELTA_COMPACT_RATIO = _get(
+    "I2P_INDEX_DELTA_COMPACT_RATIO",
+    0.25,
+    cast=float,
+    cfg_path=["index", "delta_compact_ratio"],
+)
+
+# ===================== Index Service 配置 =====================
+# 常驻召回/查重服务（scripts/tools/index_service.py）：Pipeline 检测到服务可用且数据版本一致时
+# 通过 localhost HTTP 查询，否则回退到进程内加载
+SERVICE_ENABLE = _get(
+    "I2P_SERVICE_ENABLE",
+    True,
+    cast=bool,
+    cfg_path=["service", "enable"],
+)
+SERVICE_HOST = _get(
+    "I2P_SERVICE_HOST",
+    "127.0.0.1",
+    cast=str,
+    cfg_path=["service", "host"],
+)
+SERVICE_PORT = _get(
+    "I2P_SERVICE_PORT",
+    8765,
+    cast=int,
+    cfg_path=["service", "port"],
+)
+SERVICE_TIMEOUT_SEC = _get(
+    "I2P_SERVICE_TIMEOUT_SEC",
+    120,
+    cast=float,
+    cfg_path=["service", "timeout_sec"],
+)
+
 _PROFILE_SAFE_RE = re.compile(r"[^A-Za-z0-9._-]+")
 
 
@@ -252,12 +446,20 @@ NOVELTY_INDEX_BUILD_MAX_RETRIES = _get(
     cast=int,
     cfg_path=["novelty", "index_max_retries"],
 )
+# 未设置 http.embedding_rps 时构建索引的请求节奏：每 sleep_sec 秒最多发起一个批请求（0 = 不限）
 NOVELTY_INDEX_BUILD_SLEEP_SEC = _get(
     "I2P_NOVELTY_INDEX_BUILD_SLEEP_SEC",
     1.0,
     cast=float,
     cfg_path=["novelty", "index_sleep_sec"],
 )
+# 构建 novelty 索引时同时在途的 embedding 批请求数（不超过 http.embedding_max_concurrency）
+NOVELTY_INDEX_BUILD_MAX_WORKERS = _get(
+    "I2P_NOVELTY_INDEX_BUILD_MAX_WORKERS",
+    4,
+    cast=int,
+    cfg_path=["novelty", "index_max_workers"],
+)
 NOVELTY_ACTION = _get(
     "I2P_NOVELTY_ACTION",
     "pivot",
@@ -290,6 +492,26 @@ class PipelineConfig:
     SELECT_PATTERN_COUNT = 3  # 选择 3 个不同策略的 Pattern
     CONSERVATIVE_RANK_RANGE = (0, 2)  # 稳健型: Rank 1-3
     INNOVATIVE_CLUSTER_SIZE_THRESHOLD = 10  # 创新型: Cluster Size < 10
+    # Pattern 多维度评分: serial=逐个调用(动态校准示例，默认) | concurrent=并发逐个调用 | batch=单次调用评分全部
+    # concurrent / batch 使用固定校准示例，评分结果可能与 serial 不同，需显式开启
+    PATTERN_SCORING_MODE = _get(
+        "I2P_PATTERN_SCORING_MODE",
+        "serial",
+        cast=str,
+        cfg_path=["pattern_scoring", "mode"],
+    )
+    PATTERN_SCORING_MAX_WORKERS = _get(
+        "I2P_PATTERN_SCORING_MAX_WORKERS",
+        8,
+        cast=int,
+        cfg_path=["pattern_scoring", "max_workers"],
+    )
+    PATTERN_SCORING_TIMEOUT = _get(
+        "I2P_PATTERN_SCORING_TIMEOUT",
+        180,
+        cast=int,
+        cfg_path=["pattern_scoring", "timeout"],
+    )  # 单次 LLM 调用超时（秒）
 
     # Critic 阈值
     PASS_SCORE = _get(
@@ -379,6 +601,57 @@ class PipelineConfig:
         cast=Path,
         cfg_path=["recall", "index_dir"],
     )
+    # 稠密召回: off=Jaccard粗排+Embedding精排; exact/ivf=直接在离线索引上做向量Top-K
+    RECALL_DENSE_MODE = _get(
+        "I2P_RECALL_DENSE_MODE",
+        "off",
+        cast=str,
+        cfg_path=["recall", "dense_mode"],
+    )  # off|exact|ivf
+    RECALL_DENSE_IVF_NLIST = _get(
+        "I2P_RECALL_DENSE_IVF_NLIST",
+        0,
+        cast=int,
+        cfg_path=["recall", "dense_ivf_nlist"],
+    )  # 0 = sqrt(N)
+    RECALL_DENSE_IVF_NPROBE = _get(
+        "I2P_RECALL_DENSE_IVF_NPROBE",
+        8,
+        cast=int,
+        cfg_path=["recall", "dense_ivf_nprobe"],
+    )
+    # 召回冷启动快照（节点/分词/质量分/邻接的二进制预构建产物，源文件哈希一致时使用）
+    RECALL_SNAPSHOT_ENABLE = _get(
+        "I2P_RECALL_SNAPSHOT_ENABLE",
+        True,
+        cast=bool,
+        cfg_path=["recall", "snapshot_enable"],
+    )
+    RECALL_SNAPSHOT_DIR = _get(
+        "I2P_RECALL_SNAPSHOT_DIR",
+        str(OUTPUT_DIR / "recall_snapshot"),
+        cast=Path,
+        cfg_path=["recall", "snapshot_dir"],
+    )
+    # 召回结果缓存（按规范化Idea + 召回参数 + 索引/节点版本；命中时跳过三路召回）
+    RECALL_CACHE_ENABLE = _get(
+        "I2P_RECALL_CACHE_ENABLE",
+        True,
+        cast=bool,
+        cfg_path=["recall", "cache_enable"],
+    )
+    RECALL_CACHE_TTL_SEC = _get(
+        "I2P_RECALL_CACHE_TTL_SEC",
+        7 * 24 * 3600,
+        cast=float,
+        cfg_path=["recall", "cache_ttl_sec"],
+    )  # 0 = 不过期
+    RECALL_CACHE_MAX_ENTRIES = _get(
+        "I2P_RECALL_CACHE_MAX_ENTRIES",
+        2000,
+        cast=int,
+        cfg_path=["recall", "cache_max_entries"],
+    )
 
     # Index preflight (auto-prepare before run)
     INDEX_AUTO_PREPARE = _get(
@@ -490,3 +763,17 @@ class PipelineConfig:
         cast=int,
         cfg_path=["critic", "json_retries"],
     )
+    # 三个评审角色并发调用 LLM 的线程数（1 = 串行）
+    CRITIC_MAX_WORKERS = _get(
+        "I2P_CRITIC_MAX_WORKERS",
+        3,
+        cast=int,
+        cfg_path=["critic", "max_workers"],
+    )
+    # Anchored 评审调用方式: per_role=每个角色一次 LLM 调用 | combined=单次调用返回全部角色的比较（校验失败的角色再单独调用）
+    CRITIC_MODE = _get(
+        "I2P_CRITIC_MODE",
+        "per_role",
+        cast=str,
+        cfg_path=["critic", "mode"],
+    )
@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_in_threads(fn: Callable[[T], R], items: Sequence[T], max_workers: int) -> List[R]:
+    """Apply fn to items on a bounded thread pool; results keep the input order.
+
+    Each task runs in a copy of the caller's context, so contextvars such as the
+    current RunLogger stay visible inside workers. If any task raises, the first
+    exception in input order is re-raised after all tasks have finished.
+    max_workers <= 1 (or a single item) runs inline in the calling thread.
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        futures = [pool.submit(copy_context().run, fn, item) for item in items]
+    return [f.result() for f in futures]
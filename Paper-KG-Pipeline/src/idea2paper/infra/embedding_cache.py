@@ -0,0 +1,70 @@
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from idea2paper.config import (
+    CACHE_ROOT,
+    EMBEDDING_CACHE_ENABLE,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_MODEL,
+)
+from idea2paper.infra.sqlite_cache import SqliteCache
+
+
+def embedding_cache_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    digest = hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+    return f"{model}:{digest}"
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache keyed by (model, sha256(text)); vectors stored as float32."""
+
+    def __init__(self, store: SqliteCache, model: str = EMBEDDING_MODEL):
+        self.store = store
+        self.model = model
+
+    def get_many(self, texts: List[str]) -> Dict[int, List[float]]:
+        """Return {position: embedding} for the texts found in cache."""
+        keys = [embedding_cache_key(t, self.model) for t in texts]
+        found = self.store.get_many(keys)
+        hits = {}
+        for i, key in enumerate(keys):
+            blob = found.get(key)
+            if blob is not None:
+                hits[i] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return hits
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text]).get(0)
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]):
+        items = {}
+        for text, emb in zip(texts, embeddings):
+            if emb is None:
+                continue
+            items[embedding_cache_key(text, self.model)] = np.asarray(emb, dtype=np.float32).tobytes()
+        self.store.set_many(items)
+
+    def put(self, text: str, embedding: List[float]):
+        self.put_many([text], [embedding])
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide embedding cache (None when disabled)."""
+    global _CACHE
+    if not EMBEDDING_CACHE_ENABLE:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            store = SqliteCache(
+                CACHE_ROOT / "embeddings.sqlite",
+                max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+            )
+            _CACHE = EmbeddingCache(store)
+        return _CACHE
@@ -1,7 +1,6 @@
+import asyncio
 import time
-from typing import Optional, List
-
-import requests
+from typing import Dict, Optional, List
 
 from idea2paper.config import (
     EMBEDDING_API_KEY,
@@ -9,9 +8,63 @@ from idea2paper.config import (
     EMBEDDING_MODEL,
     EMBEDDING_PROVIDER,
 )
+from idea2paper.infra.embedding_cache import get_embedding_cache
+from idea2paper.infra.http_client import get_http_session
+from idea2paper.infra.rate_limit import get_limiter
 from idea2paper.infra.run_context import get_logger
 
 
+def _log_cache_hit(logger, input_preview, start_ts: float, batch_size: int = None):
+    if not logger:
+        return
+    request = {
+        "provider": EMBEDDING_PROVIDER,
+        "url": EMBEDDING_API_URL,
+        "model": EMBEDDING_MODEL,
+        "input_preview": input_preview,
+        "simulated": False,
+        "cache_hit": True,
+    }
+    if batch_size is not None:
+        request["batch_size"] = batch_size
+    logger.log_embedding_call(
+        request=request,
+        response={
+            "ok": True,
+            "latency_ms": int((time.time() - start_ts) * 1000)
+        }
+    )
+
+
+def get_cached_embedding(text: str, logger=None) -> Optional[List[float]]:
+    """Embedding for text from the persistent cache (hit logged as a cache_hit call); None on miss."""
+    cache = get_embedding_cache()
+    if cache is None:
+        return None
+    if logger is None:
+        logger = get_logger()
+    start_ts = time.time()
+    cached = cache.get(text)
+    if cached is not None:
+        _log_cache_hit(logger, text, start_ts)
+    return cached
+
+
+def get_cached_embeddings(texts: List[str], logger=None) -> Dict[int, List[float]]:
+    """Cached embeddings for texts as {index: embedding}; hits are logged as one cache_hit batch call."""
+    cache = get_embedding_cache()
+    if cache is None or not texts:
+        return {}
+    if logger is None:
+        logger = get_logger()
+    start_ts = time.time()
+    hits = cache.get_many(texts)
+    if hits:
+        _log_cache_hit(logger, _preview_texts([texts[i] for i in sorted(hits)]), start_ts,
+                       batch_size=len(hits))
+    return hits
+
+
 def get_embedding(text: str, logger=None, timeout: int = 120) -> Optional[List[float]]:
     """Get embedding for text using SiliconFlow embeddings API.
 
@@ -21,6 +74,11 @@ def get_embedding(text: str, logger=None, timeout: int = 120) -> Optional[List[f
         logger = get_logger()
     start_ts = time.time()
 
+    cache = get_embedding_cache()
+    cached = get_cached_embedding(text, logger)
+    if cached is not None:
+        return cached
+
     if not EMBEDDING_API_KEY:
         if logger:
             logger.log_embedding_call(
@@ -50,10 +108,13 @@ def get_embedding(text: str, logger=None, timeout: int = 120) -> Optional[List[f
     }
 
     try:
-        resp = requests.post(EMBEDDING_API_URL, headers=headers, json=payload, timeout=timeout)
+        with get_limiter("embedding"):
+            resp = get_http_session(retry=False).post(EMBEDDING_API_URL, headers=headers, json=payload, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         emb = data["data"][0]["embedding"]
+        if cache is not None:
+            cache.put(text, emb)
         if logger:
             logger.log_embedding_call(
                 request={
@@ -110,6 +171,16 @@ def get_embeddings_batch(texts: List[str], logger=None, timeout: int = 120) -> O
         logger = get_logger()
     start_ts = time.time()
 
+    # 缓存命中的文本不再请求，只对未命中的部分发起一次批量请求
+    cache = get_embedding_cache()
+    hits = cache.get_many(texts) if cache is not None and texts else {}
+    if texts and len(hits) == len(texts):
+        _log_cache_hit(logger, _preview_texts(texts), start_ts, batch_size=len(texts))
+        return [hits[i] for i in range(len(texts))]
+    miss_idx = [i for i in range(len(texts)) if i not in hits]
+    all_texts = texts
+    texts = [all_texts[i] for i in miss_idx]
+
     if not EMBEDDING_API_KEY:
         if logger:
             logger.log_embedding_call(
@@ -140,12 +211,15 @@ def get_embeddings_batch(texts: List[str], logger=None, timeout: int = 120) -> O
     }
 
     try:
-        resp = requests.post(EMBEDDING_API_URL, headers=headers, json=payload, timeout=timeout)
+        with get_limiter("embedding"):
+            resp = get_http_session(retry=False).post(EMBEDDING_API_URL, headers=headers, json=payload, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
         embs = [item["embedding"] for item in data.get("data", [])]
         if len(embs) != len(texts):
             raise ValueError(f"embedding batch size mismatch: got {len(embs)} expected {len(texts)}")
+        if cache is not None:
+            cache.put_many(texts, embs)
         if logger:
             logger.log_embedding_call(
                 request={
@@ -156,13 +230,21 @@ def get_embeddings_batch(texts: List[str], logger=None, timeout: int = 120) -> O
                     "timeout": timeout,
                     "simulated": False,
                     "batch_size": len(texts),
+                    "cache_hits": len(hits),
                 },
                 response={
                     "ok": True,
                     "latency_ms": int((time.time() - start_ts) * 1000)
                 }
             )
-        return embs
+        if not hits:
+            return embs
+        merged = [None] * len(all_texts)
+        for i, emb in hits.items():
+            merged[i] = emb
+        for i, emb in zip(miss_idx, embs):
+            merged[i] = emb
+        return merged
     except Exception as e:
         if logger:
             logger.log_embedding_call(
@@ -182,3 +264,13 @@ def get_embeddings_batch(texts: List[str], logger=None, timeout: int = 120) -> O
                 }
             )
         return None
+
+
+async def aget_embedding(text: str, logger=None, timeout: int = 120) -> Optional[List[float]]:
+    """get_embedding 的异步版本（在工作线程中执行，并发上限/限速、日志与缓存行为相同）"""
+    return await asyncio.to_thread(get_embedding, text, logger, timeout)
+
+
+async def aget_embeddings_batch(texts: List[str], logger=None, timeout: int = 120) -> Optional[List[List[float]]]:
+    """get_embeddings_batch 的异步版本（在工作线程中执行，并发上限/限速、日志与缓存行为相同）"""
+    return await asyncio.to_thread(get_embeddings_batch, texts, logger, timeout)
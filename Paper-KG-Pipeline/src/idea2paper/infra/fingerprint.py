@@ -0,0 +1,86 @@
+"""
+Shared file fingerprints (sha256) and JSONL line counts for index validation.
+
+Values are keyed by (resolved path, size, mtime_ns, inode) and kept in an
+in-process dict plus a SQLite sidecar under CACHE_ROOT, so a file is only
+re-read when its stat changes. Files modified within the last few seconds are
+not persisted (coarse mtime resolution could hide a same-size rewrite).
+"""
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from idea2paper.config import CACHE_ROOT, FINGERPRINT_CACHE_ENABLE
+from idea2paper.infra.sqlite_cache import SqliteCache
+
+_RACY_WINDOW_NS = 2_000_000_000
+
+_MEMORY: Dict[str, str] = {}
+_STORE: Optional[SqliteCache] = None
+_LOCK = threading.Lock()
+
+
+def sha256_file(path: Path) -> str:
+    """Full-file sha256 (no caching)."""
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _count_lines(path: Path) -> int:
+    count = 0
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                count += 1
+    return count
+
+
+def _store() -> Optional[SqliteCache]:
+    global _STORE
+    if not FINGERPRINT_CACHE_ENABLE:
+        return None
+    with _LOCK:
+        if _STORE is None:
+            _STORE = SqliteCache(CACHE_ROOT / "fingerprints.sqlite", max_entries=10000)
+        return _STORE
+
+
+def _cached(kind: str, path: Path, compute: Callable[[Path], object]) -> str:
+    path = Path(path)
+    st = path.stat()
+    key = f"{kind}|{path.resolve()}|{st.st_size}|{st.st_mtime_ns}|{st.st_ino}"
+    value = _MEMORY.get(key)
+    if value is not None:
+        return value
+    store = _store()
+    if store is not None:
+        blob = store.get(key)
+        if blob is not None:
+            value = blob.decode("utf-8")
+            _MEMORY[key] = value
+            return value
+    value = str(compute(path))
+    if time.time_ns() - st.st_mtime_ns > _RACY_WINDOW_NS:
+        _MEMORY[key] = value
+        if store is not None:
+            store.set(key, value.encode("utf-8"))
+    return value
+
+
+def fingerprint(path: Path) -> str:
+    """sha256 of the file content, recomputed only when (size, mtime_ns, inode) change."""
+    return _cached("sha256", path, sha256_file)
+
+
+def count_jsonl_lines(path: Path) -> int:
+    """Number of non-empty lines, cached like fingerprint(); 0 if the file does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return 0
+    return int(_cached("jsonl_lines", path, _count_lines))
@@ -0,0 +1,158 @@
+"""
+Process-wide pooled HTTP client shared by LLM and embedding calls.
+
+One keep-alive connection pool per process (instead of a new Session per call),
+so repeated calls to the same API host reuse TCP/TLS connections. Retry/backoff
+on 429/5xx is configured once here, and each call path gets exactly one retry
+layer: LLM calls use the retrying session, embedding calls use
+get_http_session(retry=False) because their callers (RecallSystem, the index
+builders) already run their own retry loops.
+
+With HTTP_HTTP2=true and `httpx[http2]` installed, an httpx client is used
+instead; it exposes the same `post()` / response surface and maps its errors to
+`requests.exceptions`, so callers do not need to care which backend is active.
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from idea2paper.config import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_HTTP2,
+    HTTP_KEEPALIVE_SEC,
+    HTTP_MAX_RETRIES,
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+)
+
+try:
+    import httpx  # type: ignore
+except Exception:  # pragma: no cover
+    httpx = None  # optional, only needed for HTTP/2
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def _build_requests_session(retries: int) -> requests.Session:
+    session = requests.Session()
+    retry_strategy = Retry(
+        total=retries,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        status_forcelist=list(RETRY_STATUS),
+        allowed_methods=["POST", "GET"],
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry_strategy if retries > 0 else 0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class _Http2Response:
+    """Minimal requests.Response-like view over an httpx.Response."""
+
+    def __init__(self, resp):
+        self._resp = resp
+        self.status_code = resp.status_code
+        self.headers = resp.headers
+
+    @property
+    def text(self) -> str:
+        return self._resp.text
+
+    @property
+    def content(self) -> bytes:
+        return self._resp.content
+
+    def json(self):
+        return self._resp.json()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self._resp.request.url}", response=self
+            )
+
+
+class _Http2Session:
+    """HTTP/2 client; post() is its only retry layer (the httpx transport does not retry)."""
+
+    def __init__(self, retries: int):
+        self.retries = retries
+        limits = httpx.Limits(
+            max_connections=HTTP_POOL_MAXSIZE,
+            max_keepalive_connections=HTTP_POOL_MAXSIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_SEC,
+        )
+        transport = httpx.HTTPTransport(http2=True, limits=limits)
+        self.client = httpx.Client(transport=transport, limits=limits)
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        for attempt in range(self.retries + 1):
+            try:
+                resp = self.client.post(url, headers=headers, json=json, timeout=timeout)
+            except httpx.TransportError as e:
+                if attempt < self.retries:
+                    time.sleep(HTTP_BACKOFF_FACTOR * (2 ** attempt))
+                    continue
+                if isinstance(e, httpx.TimeoutException):
+                    raise requests.exceptions.Timeout(str(e)) from e
+                raise requests.exceptions.ConnectionError(str(e)) from e
+            if resp.status_code in RETRY_STATUS and attempt < self.retries:
+                time.sleep(HTTP_BACKOFF_FACTOR * (2 ** attempt))
+                continue
+            return _Http2Response(resp)
+
+    def close(self):
+        self.client.close()
+
+
+_SESSIONS = {}
+_SESSION_LOCK = threading.Lock()
+
+
+def _http2_available() -> bool:
+    if httpx is None:
+        return False
+    try:
+        import h2  # type: ignore  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def get_http_session(retry: bool = True):
+    """Shared pooled session (requests.Session, or the HTTP/2 adapter when enabled).
+
+    retry=False returns a session without transport-level retries, for callers
+    that retry on their own.
+    """
+    with _SESSION_LOCK:
+        session = _SESSIONS.get(retry)
+        if session is None:
+            retries = HTTP_MAX_RETRIES if retry else 0
+            if HTTP_HTTP2 and _http2_available():
+                session = _Http2Session(retries)
+            else:
+                if HTTP_HTTP2 and not _SESSIONS:
+                    print("⚠️  [http] http2 enabled but httpx[http2] is not installed; using requests")
+                session = _build_requests_session(retries)
+            _SESSIONS[retry] = session
+        return session
+
+
+def close_http_session():
+    with _SESSION_LOCK:
+        for session in _SESSIONS.values():
+            try:
+                session.close()
+            except Exception:
+                pass
+        _SESSIONS.clear()
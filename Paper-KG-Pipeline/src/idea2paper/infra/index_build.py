@@ -0,0 +1,236 @@
+"""
+Batched, checkpointed embedding writer shared by the novelty index builders
+(scripts/tools/build_novelty_index.py and NoveltyIndex.ensure_index).
+
+Texts are embedded in batches with up to `max_workers` batch requests in flight
+(capped by http.embedding_max_concurrency). Requests are paced by the global
+embedding rate limit (http.embedding_rps) or, when that is 0, start at most one
+per `sleep_sec`. Finished batches are committed in
+submission order: the vectors go to <prefix>_emb.part_NNNN.npy first, then the
+batch's meta lines are appended to the meta jsonl. After a crash the meta lists
+exactly the items whose vectors are on disk (orphan trailing parts are dropped by
+reconcile_parts), so a resumed build skips them and merge_parts() stitches the
+parts into <prefix>_emb.npy.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from idea2paper.infra.embeddings import get_embeddings_batch
+from idea2paper.infra.index_store import load_embeddings, save_embeddings, scale_path_for
+from idea2paper.infra.rate_limit import TokenBucket, get_limiter
+
+
+def normalize_matrix(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _part_paths(index_dir: Path, prefix: str) -> List[Path]:
+    return sorted(Path(index_dir).glob(f"{prefix}_emb.part_*.npy"))
+
+
+def _save_part(path: Path, mat: np.ndarray):
+    """Write a part file atomically (tmp + os.replace), so a crash never leaves a torn part."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("wb") as f:
+        np.save(f, mat)
+    os.replace(tmp, path)
+
+
+def _part_rows(path: Path) -> Optional[int]:
+    try:
+        return int(np.load(path, mmap_mode="r").shape[0])
+    except Exception:
+        return None
+
+
+def read_done_meta(meta_path: Path, id_key: str) -> Dict[str, Dict]:
+    """{id: meta} of the items already committed to meta_path (unreadable lines are ignored)."""
+    done = {}
+    meta_path = Path(meta_path)
+    if not meta_path.exists():
+        return done
+    with meta_path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except Exception:
+                continue
+            item_id = obj.get(id_key)
+            if item_id:
+                done[item_id] = obj
+    return done
+
+
+def next_part_index(index_dir: Path, prefix: str) -> int:
+    parts = _part_paths(index_dir, prefix)
+    if not parts:
+        return 0
+    last = parts[-1].stem  # <prefix>_emb.part_XXXX
+    try:
+        return int(last.split("_")[-1]) + 1
+    except Exception:
+        return len(parts)
+
+
+def reconcile_parts(index_dir: Path, prefix: str, meta_path: Path, emb_path: Optional[Path] = None,
+                    emb_dtype: str = "float32"):
+    """Make part files and meta lines agree before resuming an interrupted build.
+
+    - emb_path left by a finished merge (manifest not yet written) already holds
+      every part; it becomes part 0000 again so new batches are appended after it.
+      An emb_path that cannot be read (crash during the merge) is dropped; the
+      parts it was merged from are still there.
+    - trailing parts whose meta lines were never (fully) appended, and parts that
+      cannot be read, are dropped together with everything after them, and the
+      meta is cut back to the rows that have vectors on disk.
+    """
+    index_dir = Path(index_dir)
+    meta_path = Path(meta_path)
+    for tmp in index_dir.glob(f".{prefix}_emb.part_*.npy.tmp"):
+        tmp.unlink()
+    if emb_path is not None and Path(emb_path).exists():
+        try:
+            matrix = load_embeddings(emb_path, {"emb_dtype": emb_dtype}, mmap=False)
+            merged = matrix.rows(np.arange(len(matrix)))
+        except Exception:
+            merged = None
+        if merged is not None:
+            for part in _part_paths(index_dir, prefix):
+                part.unlink()
+            _save_part(index_dir / f"{prefix}_emb.part_0000.npy", merged)
+        for path in (Path(emb_path), scale_path_for(emb_path)):
+            if path.exists():
+                path.unlink()
+
+    lines = []
+    if meta_path.exists():
+        for line in meta_path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            try:
+                json.loads(line)
+            except Exception:
+                break  # torn write: nothing after it was committed
+            lines.append(line)
+    rows = 0
+    dropping = False
+    for part in _part_paths(index_dir, prefix):
+        part_rows = None if dropping else _part_rows(part)
+        if part_rows is None or rows + part_rows > len(lines):
+            dropping = True
+            part.unlink()
+            continue
+        rows += part_rows
+    if rows != len(lines):
+        meta_path.write_text("".join(line + "\n" for line in lines[:rows]), encoding="utf-8")
+
+
+def merge_parts(index_dir: Path, prefix: str, emb_path: Path, emb_dtype: str = "float32") -> Optional[Dict]:
+    """Stitch part files into emb_path (then delete them); returns the manifest format fields."""
+    parts = _part_paths(index_dir, prefix)
+    if not parts:
+        return None
+    mat = np.vstack([np.load(p) for p in parts])
+    emb_format = save_embeddings(emb_path, mat, emb_dtype)
+    # cleanup part files after successful merge
+    for p in parts:
+        try:
+            p.unlink()
+        except Exception:
+            pass
+    return emb_format
+
+
+def embed_to_parts(index_dir: Path, prefix: str, meta_path: Path, texts: Sequence[str], metas: Sequence[Dict],
+                   batch_size: int, max_workers: int = 1, max_retries: int = 3, sleep_sec: float = 1.0,
+                   logger=None, progress=None) -> Tuple[int, int]:
+    """Embed texts batch by batch into part files + meta lines; returns (processed, skipped).
+
+    A batch that still fails after max_retries is retried item by item, so a
+    text the API rejects only skips itself. Skipped items are not written, so
+    a later resumed build retries them.
+    """
+    index_dir = Path(index_dir)
+    meta_path = Path(meta_path)
+    batch_size = max(1, int(batch_size))
+    limiter = get_limiter("embedding")
+    max_workers = max(1, min(int(max_workers), limiter.max_concurrency))
+    part_idx = next_part_index(index_dir, prefix)
+    processed = 0
+    skipped = 0
+    # get_embeddings_batch already applies the global cap/rate; only without a global
+    # rate is the old inter-batch pause kept as the request pace
+    pace = None
+    if limiter.bucket.rate <= 0 and sleep_sec > 0:
+        pace = TokenBucket(1.0 / sleep_sec, capacity=1.0)
+
+    def request(batch_texts, retries):
+        for attempt in range(retries + 1):
+            if pace is not None:
+                pace.acquire()
+            embeddings = get_embeddings_batch(list(batch_texts), logger=logger)
+            if embeddings is not None:
+                return embeddings
+            if attempt < retries:
+                time.sleep(sleep_sec * (attempt + 1))
+        return None
+
+    def embed(batch_texts):
+        """Embeddings for the batch; None entries mark items that could not be embedded."""
+        embeddings = request(batch_texts, max_retries)
+        if embeddings is not None:
+            return embeddings
+        if len(batch_texts) == 1:
+            return [None]
+        # the batch keeps failing: one rejected text must not take the whole batch with it
+        return [(request([text], 0) or [None])[0] for text in batch_texts]
+
+    def commit(embeddings, batch_metas):
+        nonlocal part_idx, processed, skipped
+        kept = [(emb, meta) for emb, meta in zip(embeddings, batch_metas) if emb is not None]
+        skipped += len(batch_metas) - len(kept)
+        if kept:
+            mat = normalize_matrix(np.array([emb for emb, _ in kept], dtype=np.float32))
+            _save_part(index_dir / f"{prefix}_emb.part_{part_idx:04d}.npy", mat)
+            part_idx += 1
+            with meta_path.open("a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(meta, ensure_ascii=False) + "\n" for _, meta in kept))
+            processed += len(kept)
+        if progress is not None:
+            progress.update(len(batch_metas))
+
+    batches = [
+        (texts[start:start + batch_size], metas[start:start + batch_size])
+        for start in range(0, len(texts), batch_size)
+    ]
+    if max_workers == 1:
+        for batch_texts, batch_metas in batches:
+            commit(embed(batch_texts), batch_metas)
+        return processed, skipped
+
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for batch_texts, batch_metas in batches:
+            in_flight.append((pool.submit(copy_context().run, embed, batch_texts), batch_metas))
+            if len(in_flight) >= max_workers:
+                future, batch_metas_done = in_flight.popleft()
+                commit(future.result(), batch_metas_done)
+        while in_flight:
+            future, batch_metas_done = in_flight.popleft()
+            commit(future.result(), batch_metas_done)
+    return processed, skipped
@@ -1,12 +1,13 @@
 import json
 import os
 import time
-import hashlib
 from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, Optional
 
-import numpy as np
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.index_segments import base_paths, expected_rows, segment_row_counts, segments_complete
+from idea2paper.infra.index_store import manifest_emb_dtype
 
 try:
     import fcntl  # type: ignore
@@ -14,25 +15,6 @@ except Exception:  # pragma: no cover
     fcntl = None  # Windows or unavailable
 
 
-def sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
-
-
-def _count_jsonl_lines(path: Path) -> int:
-    if not path.exists():
-        return 0
-    count = 0
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                count += 1
-    return count
-
-
 def _load_manifest(path: Path) -> Optional[dict]:
     if not path.exists():
         return None
@@ -94,8 +76,6 @@ def acquire_lock(lock_path: Path, timeout_sec: int = 600):
 
 def validate_novelty_index(index_dir: Path, nodes_paper_path: Path, embedding_model: str) -> Dict:
     index_dir = Path(index_dir)
-    meta_path = index_dir / "paper_meta.jsonl"
-    emb_path = index_dir / "paper_emb.npy"
     manifest_path = index_dir / "index_manifest.json"
 
     result = {
@@ -108,19 +88,22 @@ def validate_novelty_index(index_dir: Path, nodes_paper_path: Path, embedding_mo
         },
     }
 
-    if not (meta_path.exists() and emb_path.exists() and manifest_path.exists()):
+    if not manifest_path.exists():
         return result
 
     manifest = _load_manifest(manifest_path)
     if not manifest:
         result["reason"] = "load_failed"
         return result
+    if not all(p.exists() for p in base_paths(index_dir, "paper", manifest)):
+        result["reason"] = "missing"
+        return result
 
     if not nodes_paper_path.exists():
         result["reason"] = "missing_nodes"
         return result
 
-    current_hash = sha256_file(nodes_paper_path)
+    current_hash = fingerprint(nodes_paper_path)
     result["details"]["nodes_paper_hash"] = current_hash
     result["details"]["manifest_hash"] = manifest.get("nodes_paper_hash")
     result["details"]["embedding_model"] = embedding_model
@@ -133,22 +116,26 @@ def validate_novelty_index(index_dir: Path, nodes_paper_path: Path, embedding_mo
         result["reason"] = "mismatch"
         return result
 
+    result["details"]["emb_dtype"] = manifest_emb_dtype(manifest)
+    if not segments_complete(index_dir, "paper", manifest):
+        result["reason"] = "incomplete"
+        return result
     try:
-        emb_count = int(np.load(emb_path, mmap_mode="r").shape[0])
+        emb_count, meta_count = segment_row_counts(index_dir, "paper", manifest)
     except Exception:
         result["reason"] = "load_failed"
         return result
-    meta_count = _count_jsonl_lines(meta_path)
 
     result["details"]["emb_count"] = emb_count
     result["details"]["meta_count"] = meta_count
     result["details"]["index_count"] = manifest.get("index_count")
     result["details"]["paper_count"] = manifest.get("paper_count")
+    result["details"]["deltas"] = len(manifest.get("deltas") or [])
 
     if meta_count != emb_count:
         result["reason"] = "incomplete"
         return result
-    if manifest.get("index_count") is not None and meta_count != int(manifest.get("index_count")):
+    if expected_rows(manifest) is not None and meta_count != expected_rows(manifest):
         result["reason"] = "incomplete"
         return result
     if manifest.get("paper_count") is not None and int(manifest.get("paper_count")) != int(manifest.get("index_count")):
@@ -161,8 +148,6 @@ def validate_novelty_index(index_dir: Path, nodes_paper_path: Path, embedding_mo
 
 
 def _validate_recall_kind(kind: str, index_dir: Path, nodes_path: Path, embedding_model: str) -> Dict:
-    emb_path = index_dir / f"{kind}_emb.npy"
-    meta_path = index_dir / f"{kind}_meta.jsonl"
     manifest_path = index_dir / f"{kind}_manifest.json"
     result = {
         "ok": False,
@@ -172,16 +157,19 @@ def _validate_recall_kind(kind: str, index_dir: Path, nodes_path: Path, embeddin
             "manifest": str(manifest_path),
         },
     }
-    if not (emb_path.exists() and meta_path.exists() and manifest_path.exists()):
+    if not manifest_path.exists():
         return result
     manifest = _load_manifest(manifest_path)
     if not manifest:
         result["reason"] = "load_failed"
         return result
+    if not all(p.exists() for p in base_paths(index_dir, kind, manifest)):
+        result["reason"] = "missing"
+        return result
     if not nodes_path.exists():
         result["reason"] = "missing_nodes"
         return result
-    current_hash = sha256_file(nodes_path)
+    current_hash = fingerprint(nodes_path)
     result["details"][f"nodes_{kind}_hash"] = current_hash
     result["details"]["manifest_hash"] = manifest.get(f"nodes_{kind}_hash")
     result["details"]["embedding_model"] = embedding_model
@@ -192,20 +180,24 @@ def _validate_recall_kind(kind: str, index_dir: Path, nodes_path: Path, embeddin
     if manifest.get(f"nodes_{kind}_hash") != current_hash:
         result["reason"] = "mismatch"
         return result
+    result["details"]["emb_dtype"] = manifest_emb_dtype(manifest)
+    if not segments_complete(index_dir, kind, manifest):
+        result["reason"] = "incomplete"
+        return result
     try:
-        emb_count = int(np.load(emb_path, mmap_mode="r").shape[0])
+        emb_count, meta_count = segment_row_counts(index_dir, kind, manifest)
     except Exception:
         result["reason"] = "load_failed"
         return result
-    meta_count = _count_jsonl_lines(meta_path)
     result["details"]["emb_count"] = emb_count
     result["details"]["meta_count"] = meta_count
     result["details"]["index_count"] = manifest.get("index_count")
     result["details"]["count"] = manifest.get("count")
+    result["details"]["deltas"] = len(manifest.get("deltas") or [])
     if meta_count != emb_count:
         result["reason"] = "incomplete"
         return result
-    if manifest.get("index_count") is not None and meta_count != int(manifest.get("index_count")):
+    if expected_rows(manifest) is not None and meta_count != expected_rows(manifest):
         result["reason"] = "incomplete"
         return result
     result["ok"] = True
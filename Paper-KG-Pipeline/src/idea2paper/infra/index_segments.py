@@ -0,0 +1,257 @@
+"""
+Delta-aware layout for the offline recall / novelty embedding indexes.
+
+An index with prefix P ("idea" / "paper") consists of:
+  P_emb.npy + P_meta.jsonl                        base segment (the original layout)
+  P_base_<n>_emb.npy + P_base_<n>_meta.jsonl      base segment written by compact_index (manifest "base")
+  P_delta_<n>_emb.npy + P_delta_<n>_meta.jsonl    appended delta segments
+  manifest "deltas" / "tombstones" / "rows"       segment list, removed ids, physical row count
+
+Every meta line carries the sha256 of the embedded text ("text_hash"), so an update
+only embeds items that are new or whose text changed. A row in a later segment
+supersedes earlier rows with the same id, and tombstoned ids are dropped. An index
+without deltas loads exactly as before (memory-mapped base); with deltas the live
+rows are gathered into memory until compact_index() folds them into a new base.
+Files are only ever added next to the ones the manifest references, so replacing the
+manifest (write_manifest) is the single switch-over point for deltas and compaction.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from idea2paper.infra.fingerprint import count_jsonl_lines
+from idea2paper.infra.index_store import (
+    EmbeddingMatrix,
+    embeddings_complete,
+    load_embeddings,
+    scale_path_for,
+)
+
+
+def read_meta(path: Path) -> List[Dict]:
+    path = Path(path)
+    if not path.exists():
+        return []
+    return [json.loads(l) for l in path.read_text(encoding="utf-8").splitlines() if l.strip()]
+
+
+def has_deltas(manifest: Optional[Dict]) -> bool:
+    manifest = manifest or {}
+    return bool(manifest.get("deltas") or manifest.get("tombstones"))
+
+
+def segment_paths(index_dir: Path, prefix: str, manifest: Optional[Dict]) -> List[Tuple[Path, Path]]:
+    """[(emb_path, meta_path), ...] for the base segment followed by each delta."""
+    index_dir = Path(index_dir)
+    manifest = manifest or {}
+    names = [f"{prefix}_{manifest['base']}" if manifest.get("base") else prefix]
+    names += [f"{prefix}_{delta['segment']}" for delta in manifest.get("deltas") or []]
+    return [(index_dir / f"{name}_emb.npy", index_dir / f"{name}_meta.jsonl") for name in names]
+
+
+def base_paths(index_dir: Path, prefix: str, manifest: Optional[Dict]) -> Tuple[Path, Path]:
+    """(emb_path, meta_path) of the base segment."""
+    return segment_paths(index_dir, prefix, manifest)[0]
+
+
+def segments_complete(index_dir: Path, prefix: str, manifest: Optional[Dict]) -> bool:
+    return all(
+        meta_path.exists() and embeddings_complete(emb_path, manifest)
+        for emb_path, meta_path in segment_paths(index_dir, prefix, manifest)
+    )
+
+
+def segment_row_counts(index_dir: Path, prefix: str, manifest: Optional[Dict]) -> Tuple[int, int]:
+    """(embedding rows, meta lines) summed over all segments."""
+    emb_rows = 0
+    meta_rows = 0
+    for emb_path, meta_path in segment_paths(index_dir, prefix, manifest):
+        emb_rows += int(np.load(emb_path, mmap_mode="r").shape[0])
+        meta_rows += count_jsonl_lines(meta_path)
+    return emb_rows, meta_rows
+
+
+def expected_rows(manifest: Optional[Dict]) -> Optional[int]:
+    """Physical row count recorded in the manifest (index_count for manifests without deltas)."""
+    manifest = manifest or {}
+    rows = manifest.get("rows", manifest.get("index_count"))
+    return None if rows is None else int(rows)
+
+
+def _live_rows(metas: Sequence[Dict], id_key: str, tombstones: Iterable[str]) -> np.ndarray:
+    """Rows (over all segments concatenated) that are still live, in row order."""
+    dead = set(tombstones or ())
+    latest = {}
+    rows = []
+    for row, meta in enumerate(metas):
+        item_id = meta.get(id_key)
+        if item_id:
+            latest[item_id] = row
+        else:
+            rows.append(row)
+    rows.extend(row for item_id, row in latest.items() if item_id not in dead)
+    return np.asarray(sorted(rows), dtype=np.int64)
+
+
+def _gather(arrays: Sequence[np.ndarray], rows: np.ndarray) -> np.ndarray:
+    out = []
+    start = 0
+    for arr in arrays:
+        end = start + arr.shape[0]
+        sel = rows[(rows >= start) & (rows < end)] - start
+        out.append(np.asarray(arr[sel]))
+        start = end
+    return np.concatenate(out, axis=0)
+
+
+def live_meta(index_dir: Path, prefix: str, manifest: Optional[Dict], id_key: str) -> Dict[str, Dict]:
+    """{id: meta} of the live rows (embeddings are not read)."""
+    metas = []
+    for _emb_path, meta_path in segment_paths(index_dir, prefix, manifest):
+        metas.extend(read_meta(meta_path))
+    rows = _live_rows(metas, id_key, (manifest or {}).get("tombstones"))
+    return {metas[i][id_key]: metas[i] for i in rows if metas[i].get(id_key)}
+
+
+def load_index(index_dir: Path, prefix: str, manifest: Optional[Dict], id_key: str) -> Tuple[EmbeddingMatrix, List[Dict]]:
+    """Live (matrix, meta) of an index; rows of both are aligned."""
+    segments = segment_paths(index_dir, prefix, manifest)
+    if not has_deltas(manifest):
+        emb_path, meta_path = segments[0]
+        return load_embeddings(emb_path, manifest), read_meta(meta_path)
+
+    metas = []
+    datas = []
+    scales = []
+    for emb_path, meta_path in segments:
+        matrix = load_embeddings(emb_path, manifest)
+        seg_meta = read_meta(meta_path)
+        if len(seg_meta) != len(matrix):
+            raise ValueError(f"segment rows mismatch: {emb_path.name} ({len(matrix)} vs {len(seg_meta)} meta)")
+        metas.extend(seg_meta)
+        datas.append(matrix.data)
+        scales.append(matrix.scale)
+    rows = _live_rows(metas, id_key, manifest.get("tombstones"))
+    scale = _gather(scales, rows) if scales[0] is not None else None
+    return EmbeddingMatrix(_gather(datas, rows), scale), [metas[i] for i in rows]
+
+
+def next_delta_segment(manifest: Optional[Dict]) -> str:
+    return f"delta_{int((manifest or {}).get('next_delta', 1)):04d}"
+
+
+def commit_delta(index_dir: Path, prefix: str, manifest: Dict, segment: str, id_key: str,
+                 removed_ids: Iterable[str]) -> Dict:
+    """Register a written delta segment (skipped if empty) and tombstone removed ids.
+
+    Returns the updated manifest (not written); "index_count" is the live row count.
+    """
+    index_dir = Path(index_dir)
+    manifest = dict(manifest)
+    deltas = list(manifest.get("deltas") or [])
+    tombstones = set(manifest.get("tombstones") or [])
+    tombstones.update(removed_ids)
+    rows = expected_rows(manifest) or 0
+
+    meta_path = index_dir / f"{prefix}_{segment}_meta.jsonl"
+    added = read_meta(meta_path)
+    if added:
+        deltas.append({
+            "segment": segment,
+            "count": len(added),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        manifest["next_delta"] = int(manifest.get("next_delta", 1)) + 1
+        tombstones.difference_update(m.get(id_key) for m in added)
+        rows += len(added)
+    else:
+        emb_path = index_dir / f"{prefix}_{segment}_emb.npy"
+        for path in (meta_path, emb_path, scale_path_for(emb_path)):
+            if path.exists():
+                path.unlink()
+
+    manifest["deltas"] = deltas
+    manifest["tombstones"] = sorted(tombstones)
+    manifest["rows"] = rows
+    if not has_deltas(manifest):
+        manifest["index_count"] = rows
+    else:
+        metas = []
+        for _emb_path, seg_meta_path in segment_paths(index_dir, prefix, manifest):
+            metas.extend(read_meta(seg_meta_path))
+        manifest["index_count"] = int(len(_live_rows(metas, id_key, tombstones)))
+    return manifest
+
+
+def needs_compaction(manifest: Dict, max_segments: int, dead_ratio: float) -> bool:
+    if not has_deltas(manifest):
+        return False
+    rows = expected_rows(manifest) or 0
+    live = int(manifest.get("index_count") or 0)
+    if max_segments and len(manifest.get("deltas") or []) > max_segments:
+        return True
+    return rows > 0 and (rows - live) / rows > dead_ratio
+
+
+def compact_index(index_dir: Path, prefix: str, manifest: Dict, id_key: str) -> Dict:
+    """Fold all deltas and tombstones into a new base segment; returns the updated manifest (not written).
+
+    The compacted rows go to a fresh segment (base_<n>) and nothing the current
+    manifest references is touched: until write_manifest() replaces the manifest the
+    old segments stay live, afterwards the new base is. remove_stale_segments()
+    deletes the replaced files once the manifest is written.
+    """
+    index_dir = Path(index_dir)
+    matrix, metas = load_index(index_dir, prefix, manifest, id_key)
+    base_no = int(manifest.get("next_base", 1))
+    base = f"base_{base_no:04d}"
+    emb_path = index_dir / f"{prefix}_{base}_emb.npy"
+    meta_path = index_dir / f"{prefix}_{base}_meta.jsonl"
+
+    np.save(emb_path, matrix.data)
+    if matrix.scale is not None:
+        np.save(scale_path_for(emb_path), matrix.scale)
+    meta_path.write_text("".join(json.dumps(m, ensure_ascii=False) + "\n" for m in metas), encoding="utf-8")
+
+    manifest = dict(manifest)
+    manifest["base"] = base
+    manifest["next_base"] = base_no + 1
+    manifest["deltas"] = []
+    manifest["tombstones"] = []
+    manifest["rows"] = len(metas)
+    manifest["index_count"] = len(metas)
+    manifest["compacted_at"] = datetime.now(timezone.utc).isoformat()
+    return manifest
+
+
+def write_manifest(path: Path, manifest: Dict):
+    """Replace a manifest atomically (tmp + os.replace)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def remove_stale_segments(index_dir: Path, prefix: str, manifest: Dict):
+    """Delete segment files the written manifest no longer references (replaced bases, compacted deltas).
+
+    Files of the next delta segment are kept: they belong to an interrupted update
+    that can still be resumed.
+    """
+    index_dir = Path(index_dir)
+    keep = set()
+    for emb_path, meta_path in segment_paths(index_dir, prefix, manifest):
+        keep.update((emb_path, scale_path_for(emb_path), meta_path))
+    pending = f"{prefix}_{next_delta_segment(manifest)}_"
+    plain_emb = index_dir / f"{prefix}_emb.npy"
+    paths = [plain_emb, scale_path_for(plain_emb), index_dir / f"{prefix}_meta.jsonl"]
+    paths += index_dir.glob(f"{prefix}_base_*")
+    paths += [p for p in index_dir.glob(f"{prefix}_delta_*") if not p.name.startswith(pending)]
+    for path in paths:
+        if path not in keep and path.exists():
+            path.unlink()
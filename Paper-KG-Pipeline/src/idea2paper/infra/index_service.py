@@ -0,0 +1,171 @@
+"""
+Client side of the resident recall / novelty / review service (scripts/tools/index_service.py).
+
+The service keeps RecallSystem, NoveltyIndex and ReviewIndex loaded and answers JSON
+requests on localhost HTTP. A pipeline run only uses it when the service reports
+the same signature (node/graph fingerprints, embedding model + key availability,
+index dirs, recall parameters / audit / cache settings, novelty settings) as the
+local configuration; any error makes the caller fall back to in-process loading.
+"""
+
+import json
+import os
+import threading
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from idea2paper import config
+from idea2paper.config import (
+    EMBEDDING_API_KEY,
+    EMBEDDING_MODEL,
+    NOVELTY_INDEX_DIR,
+    OUTPUT_DIR,
+    SERVICE_ENABLE,
+    SERVICE_HOST,
+    SERVICE_PORT,
+    SERVICE_TIMEOUT_SEC,
+    PipelineConfig,
+)
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.run_context import get_logger
+
+SERVICE_PROTOCOL_VERSION = 1
+SOURCE_FILES = ("nodes_idea.json", "nodes_pattern.json", "nodes_domain.json", "nodes_paper.json",
+                "knowledge_graph_v2.gpickle")
+
+
+def service_signature() -> Dict:
+    """Everything that must match between service and client for results to be interchangeable."""
+    # recall_system is only importable from the pipeline entry points (scripts/ on sys.path)
+    from idea2paper.recall.recall_system import recall_config_context
+
+    sources = {}
+    for name in SOURCE_FILES:
+        path = OUTPUT_DIR / name
+        sources[name] = fingerprint(path) if path.exists() else None
+    signature = {
+        "version": SERVICE_PROTOCOL_VERSION,
+        "sources": sources,
+        "embedding_model": EMBEDDING_MODEL,
+        "embedding_keys": [bool(EMBEDDING_API_KEY), bool(os.environ.get("SILICONFLOW_API_KEY", ""))],
+        "novelty_index_dir": str(Path(NOVELTY_INDEX_DIR).resolve()),
+        "recall_index_dir": str(Path(PipelineConfig.RECALL_INDEX_DIR).resolve()),
+        "recall_use_offline_index": bool(PipelineConfig.RECALL_USE_OFFLINE_INDEX),
+        "recall": recall_config_context(),
+        "recall_cache": {k: getattr(PipelineConfig, k) for k in dir(PipelineConfig) if k.startswith("RECALL_CACHE_")},
+        "novelty": {k: getattr(config, k) for k in dir(config) if k.startswith("NOVELTY_")},
+    }
+    # 与 /health 返回的 JSON 逐项比较，先做一次同样的序列化
+    return json.loads(json.dumps(signature, sort_keys=True, default=json_default))
+
+
+class EventRecorder:
+    """Logger stand-in used inside the service; the client replays the events into its run log."""
+
+    def __init__(self):
+        self.events: List[Dict] = []
+
+    def log_event(self, event_type: str, payload: Dict):
+        self.events.append({"kind": "event", "type": event_type, "payload": payload})
+
+    def log_llm_call(self, request: Dict, response: Dict):
+        self.events.append({"kind": "llm", "request": request, "response": response})
+
+    def log_embedding_call(self, request: Dict, response: Dict):
+        self.events.append({"kind": "embedding", "request": request, "response": response})
+
+
+def replay_events(logger, events: List[Dict]):
+    if not logger:
+        return
+    for ev in events or []:
+        kind = ev.get("kind")
+        if kind == "event":
+            logger.log_event(ev.get("type"), ev.get("payload") or {})
+        elif kind == "llm":
+            logger.log_llm_call(request=ev.get("request") or {}, response=ev.get("response") or {})
+        elif kind == "embedding":
+            logger.log_embedding_call(request=ev.get("request") or {}, response=ev.get("response") or {})
+
+
+def json_default(value):
+    """json.dumps default for numpy scalars / paths in service payloads."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class IndexServiceClient:
+    def __init__(self, host: str = SERVICE_HOST, port: int = SERVICE_PORT, timeout: float = SERVICE_TIMEOUT_SEC):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = float(timeout)
+        # localhost only: never route through HTTP(S)_PROXY
+        self._opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+
+    def _call(self, path: str, payload: Optional[Dict] = None, timeout: Optional[float] = None) -> Optional[Dict]:
+        data = None
+        if payload is not None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={"Content-Type": "application/json; charset=utf-8"},
+        )
+        try:
+            with self._opener.open(req, timeout=timeout or self.timeout) as resp:
+                body = json.loads(resp.read().decode("utf-8"))
+        except Exception:
+            return None
+        if not isinstance(body, dict) or not body.get("ok"):
+            return None
+        return body
+
+    def health(self) -> Optional[Dict]:
+        return self._call("/health", timeout=2.0)
+
+    def recall(self, user_idea: str) -> Optional[Dict]:
+        """{"results": [[pattern_id, pattern_info, score], ...], "audit", "log", "events"} or None."""
+        return self._call("/recall", {"user_idea": user_idea})
+
+    def novelty_query(self, story_text: str, top_k: int) -> Optional[Dict]:
+        """{"index_status", "candidates", "info", "events"} or None."""
+        return self._call("/novelty/query", {"story_text": story_text, "top_k": int(top_k)})
+
+    def review_summaries(self) -> Optional[List[Dict]]:
+        body = self._call("/review/summaries")
+        return None if body is None else body.get("summaries")
+
+
+_CLIENT = None
+_CHECKED = False
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_service_client(logger=None) -> Optional[IndexServiceClient]:
+    """Process-wide client if the service is enabled, reachable and serving the same data (else None)."""
+    global _CLIENT, _CHECKED
+    if not SERVICE_ENABLE:
+        return None
+    with _CLIENT_LOCK:
+        if _CHECKED:
+            return _CLIENT
+        _CHECKED = True
+        logger = logger or get_logger()
+        client = IndexServiceClient()
+        health = client.health()
+        if health is None:
+            return None
+        if health.get("signature") != service_signature():
+            print(f"⚠️  索引服务 {client.base_url} 的数据/配置与本地不一致，回退到进程内加载")
+            if logger:
+                logger.log_event("index_service_fallback", {"url": client.base_url, "reason": "signature_mismatch"})
+            return None
+        if logger:
+            logger.log_event("index_service_used", {
+                "url": client.base_url,
+                "pid": health.get("pid"),
+                "started_at": health.get("started_at"),
+            })
+        _CLIENT = client
+        return _CLIENT
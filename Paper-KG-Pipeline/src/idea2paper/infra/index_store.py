@@ -0,0 +1,145 @@
+"""
+Embedding matrix storage for the offline recall / novelty indexes.
+
+On-disk format (recorded in the manifest as "emb_dtype"):
+  - float32: <kind>_emb.npy, rows L2-normalized (legacy default)
+  - float16: <kind>_emb.npy stored as float16
+  - int8:    <kind>_emb.npy stored as int8 + <kind>_emb_scale.npy (float32, one scale per row)
+
+Matrices are opened with mmap_mode="r" so concurrent processes share the page
+cache, and scoring casts one block of rows at a time to float32 instead of
+materialising a full-precision copy of the index.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+EMB_DTYPES = ("float32", "float16", "int8")
+# rows decoded per scoring step: 1024 x 4096 dims is a 16 MB float32 transient per query pass
+DEFAULT_BLOCK_ROWS = 1024
+
+
+def scale_path_for(emb_path: Path) -> Path:
+    emb_path = Path(emb_path)
+    return emb_path.with_name(f"{emb_path.stem}_scale.npy")
+
+
+def encode_embeddings(mat: np.ndarray, emb_dtype: str):
+    """Return (stored_matrix, row_scale or None) for the requested dtype."""
+    if emb_dtype not in EMB_DTYPES:
+        raise ValueError(f"unsupported emb_dtype: {emb_dtype} (expected one of {EMB_DTYPES})")
+    mat = np.asarray(mat, dtype=np.float32)
+    if emb_dtype == "float32":
+        return mat, None
+    if emb_dtype == "float16":
+        return mat.astype(np.float16), None
+    if mat.size == 0:
+        return mat.astype(np.int8), np.zeros((mat.shape[0],), dtype=np.float32)
+    scale = np.abs(mat).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(mat / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def save_embeddings(emb_path: Path, mat: np.ndarray, emb_dtype: str = "float32") -> Dict:
+    """Save an embedding matrix; returns manifest fields describing the format."""
+    emb_path = Path(emb_path)
+    data, scale = encode_embeddings(mat, emb_dtype)
+    np.save(emb_path, data)
+    scale_path = scale_path_for(emb_path)
+    if scale is not None:
+        np.save(scale_path, scale)
+    elif scale_path.exists():
+        scale_path.unlink()
+    return {"emb_dtype": emb_dtype}
+
+
+def manifest_emb_dtype(manifest: Optional[Dict]) -> str:
+    return (manifest or {}).get("emb_dtype") or "float32"
+
+
+def embeddings_complete(emb_path: Path, manifest: Optional[Dict]) -> bool:
+    """Check that all files required by the manifest's emb_dtype exist."""
+    if not Path(emb_path).exists():
+        return False
+    if manifest_emb_dtype(manifest) == "int8":
+        return scale_path_for(emb_path).exists()
+    return True
+
+
+class EmbeddingMatrix:
+    """Read-only view over a stored (possibly quantized) embedding matrix."""
+
+    def __init__(self, data: np.ndarray, scale: Optional[np.ndarray] = None):
+        self.data = data
+        self.scale = scale
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    def __len__(self) -> int:
+        return int(self.data.shape[0])
+
+    def _decode(self, block: np.ndarray, scale: Optional[np.ndarray]) -> np.ndarray:
+        out = np.asarray(block, dtype=np.float32)
+        if scale is not None:
+            out = out * np.asarray(scale, dtype=np.float32)[:, None]
+        return out
+
+    def rows(self, idxs: Sequence[int]) -> np.ndarray:
+        """Gather rows as float32."""
+        idxs = np.asarray(idxs, dtype=np.int64)
+        scale = self.scale[idxs] if self.scale is not None else None
+        return self._decode(self.data[idxs], scale)
+
+    def iter_blocks(self, block_rows: int = DEFAULT_BLOCK_ROWS):
+        """Yield (start, float32 block) over consecutive row blocks."""
+        n = len(self)
+        for start in range(0, n, block_rows):
+            end = min(n, start + block_rows)
+            scale = self.scale[start:end] if self.scale is not None else None
+            yield start, self._decode(self.data[start:end], scale)
+
+    def dot(self, vec: np.ndarray, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """Scores of every row against vec (float32), computed block by block."""
+        return self.matmul(np.asarray(vec).reshape(1, -1), block_rows=block_rows)[0]
+
+    def matmul(self, queries: np.ndarray, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """Scores of every row against each query: (n_queries, n_rows) float32, one pass over the rows.
+
+        Accumulates in float32. BLAS sums in a different order for one query than
+        for several, so a batched score can differ from the single-query score in
+        the last bits; rankings break such near-ties on rounded scores, then row
+        (see dense_search.top_k_indices).
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        n = len(self)
+        out = np.empty((queries.shape[0], n), dtype=np.float32)
+        q_t = np.ascontiguousarray(queries.T)
+        for start in range(0, n, block_rows):
+            end = min(n, start + block_rows)
+            scores = np.asarray(self.data[start:end], dtype=np.float32) @ q_t
+            if self.scale is not None:
+                # per-row scale applied to the scores, not to every element of the block
+                scores *= np.asarray(self.scale[start:end], dtype=np.float32)[:, None]
+            out[:, start:end] = scores.T
+        return out
+
+
+def load_embeddings(emb_path: Path, manifest: Optional[Dict] = None, mmap: bool = True) -> EmbeddingMatrix:
+    emb_path = Path(emb_path)
+    mmap_mode = "r" if mmap else None
+    data = np.load(emb_path, mmap_mode=mmap_mode)
+    scale = None
+    if manifest_emb_dtype(manifest) == "int8" or data.dtype == np.int8:
+        scale = np.load(scale_path_for(emb_path), mmap_mode=mmap_mode)
+    return EmbeddingMatrix(data, scale)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import re
 import time
@@ -5,34 +6,16 @@ import warnings
 from typing import Dict, Any, Optional
 
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
 
 # 抑制 urllib3 的 OpenSSL 警告
 warnings.filterwarnings("ignore", category=UserWarning, module='urllib3')
 
 from idea2paper.config import LLM_API_KEY, LLM_API_URL, LLM_MODEL
+from idea2paper.infra.http_client import get_http_session
+from idea2paper.infra.llm_cache import get_llm_cache
+from idea2paper.infra.rate_limit import get_limiter
 from idea2paper.infra.run_context import get_logger
 
-def _create_session_with_retries():
-    """创建带有重试机制的 requests Session"""
-    session = requests.Session()
-
-    # 定义重试策略
-    retry_strategy = Retry(
-        total=3,  # 总共重试 3 次
-        backoff_factor=2,  # 指数退避: 1s, 2s, 4s
-        status_forcelist=[429, 500, 502, 503, 504],  # 在这些状态码上重试
-        allowed_methods=["POST", "GET"]
-    )
-
-    # 为 HTTP 和 HTTPS 适配器应用重试策略
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
-
-    return session
-
 def call_llm(prompt: str, temperature: float = 0.7, max_tokens: int = 2000, timeout: int = 120) -> str:
     """
     调用 LLM API（支持重试和延长超时）
@@ -46,6 +29,33 @@ def call_llm(prompt: str, temperature: float = 0.7, max_tokens: int = 2000, time
     logger = get_logger()
     start_ts = time.time()
 
+    # temperature=0 的调用在开启响应缓存时先查缓存（prompt 完全相同即复用）
+    cache = get_llm_cache()
+    if cache is not None and not cache.cacheable(temperature):
+        cache = None
+    if cache is not None:
+        cached = cache.get(prompt, temperature, max_tokens)
+        if cached is not None:
+            if logger:
+                logger.log_llm_call(
+                    request={
+                        "model": LLM_MODEL,
+                        "url": LLM_API_URL,
+                        "temperature": temperature,
+                        "max_tokens": max_tokens,
+                        "timeout": timeout,
+                        "prompt": prompt,
+                        "simulated": False,
+                        "cache_hit": True
+                    },
+                    response={
+                        "ok": True,
+                        "text": cached,
+                        "latency_ms": int((time.time() - start_ts) * 1000)
+                    }
+                )
+            return cached
+
     if not LLM_API_KEY:
         print("⚠️  警告: LLM_API_KEY 未配置，使用模拟输出")
         simulated_text = f"[模拟LLM输出] Prompt: {prompt[:100]}..."
@@ -86,32 +96,37 @@ def call_llm(prompt: str, temperature: float = 0.7, max_tokens: int = 2000, time
 
     for attempt in range(max_retries):
         try:
-            session = _create_session_with_retries()
+            session = get_http_session()
 
             if attempt > 0:
                 print(f"   ⏳ 重试 LLM 调用 (尝试 {attempt + 1}/{max_retries})...")
                 time.sleep(retry_delay)
 
-            response = session.post(
-                LLM_API_URL,
-                headers=headers,
-                json=data,
-                timeout=timeout
-            )
+            with get_limiter("llm"):
+                response = session.post(
+                    LLM_API_URL,
+                    headers=headers,
+                    json=data,
+                    timeout=timeout
+                )
             response.raise_for_status()
-            session.close()
             content = response.json()["choices"][0]["message"]["content"]
+            if cache is not None:
+                cache.put(prompt, temperature, max_tokens, content)
             if logger:
+                request_log = {
+                    "model": LLM_MODEL,
+                    "url": LLM_API_URL,
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "timeout": timeout,
+                    "prompt": prompt,
+                    "simulated": False
+                }
+                if cache is not None:
+                    request_log["cache_hit"] = False
                 logger.log_llm_call(
-                    request={
-                        "model": LLM_MODEL,
-                        "url": LLM_API_URL,
-                        "temperature": temperature,
-                        "max_tokens": max_tokens,
-                        "timeout": timeout,
-                        "prompt": prompt,
-                        "simulated": False
-                    },
+                    request=request_log,
                     response={
                         "ok": True,
                         "text": content,
@@ -196,6 +211,15 @@ def call_llm(prompt: str, temperature: float = 0.7, max_tokens: int = 2000, time
 
     return ""
 
+async def acall_llm(prompt: str, temperature: float = 0.7, max_tokens: int = 2000, timeout: int = 120) -> str:
+    """
+    call_llm 的异步版本：在工作线程中执行同步的 call_llm。
+
+    并发上限与令牌桶限速由 call_llm 内部的进程级限流器统一施加（与线程池中的同步调用共享），
+    连接池、重试与 RunLogger 记录完全一致，因此 asyncio.gather 多个调用即可重叠等待。
+    """
+    return await asyncio.to_thread(call_llm, prompt, temperature, max_tokens, timeout)
+
 def clean_json_text(text: str) -> str:
     """清理 JSON 文本中的 Markdown 标记和非法字符"""
     clean_text = text.strip()
@@ -0,0 +1,78 @@
+import hashlib
+import threading
+from typing import Optional
+
+from idea2paper.config import (
+    CACHE_ROOT,
+    LLM_CACHE_ENABLE,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL_SEC,
+    LLM_MODEL,
+)
+from idea2paper.infra.sqlite_cache import SqliteCache
+
+
+def llm_cache_key(prompt: str, temperature: float, max_tokens: int, model: str = LLM_MODEL) -> str:
+    digest = hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+    return f"{model}:{float(temperature)!r}:{int(max_tokens)}:{digest}"
+
+
+class LLMResponseCache:
+    """Response cache for deterministic (temperature == 0) LLM calls.
+
+    Key = (model, temperature, max_tokens, sha256(prompt)). Only successful,
+    non-empty responses are stored; callers that reject a response (e.g. invalid
+    critic JSON) discard it so the next identical call goes to the API again.
+    """
+
+    def __init__(self, store: SqliteCache, model: str = LLM_MODEL):
+        self.store = store
+        self.model = model
+
+    @staticmethod
+    def cacheable(temperature: float) -> bool:
+        return float(temperature) == 0.0
+
+    def get(self, prompt: str, temperature: float, max_tokens: int) -> Optional[str]:
+        blob = self.store.get(llm_cache_key(prompt, temperature, max_tokens, self.model))
+        if blob is None:
+            return None
+        try:
+            return blob.decode("utf-8")
+        except Exception:
+            return None
+
+    def put(self, prompt: str, temperature: float, max_tokens: int, text: str):
+        if not text:
+            return
+        self.store.set(llm_cache_key(prompt, temperature, max_tokens, self.model), text.encode("utf-8"))
+
+    def discard(self, prompt: str, temperature: float, max_tokens: int):
+        self.store.delete(llm_cache_key(prompt, temperature, max_tokens, self.model))
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Process-wide LLM response cache (None when disabled)."""
+    global _CACHE
+    if not LLM_CACHE_ENABLE:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            store = SqliteCache(
+                CACHE_ROOT / "llm_responses.sqlite",
+                max_entries=LLM_CACHE_MAX_ENTRIES,
+                ttl_sec=LLM_CACHE_TTL_SEC,
+            )
+            _CACHE = LLMResponseCache(store)
+        return _CACHE
+
+
+def discard_cached_response(prompt: str, temperature: float, max_tokens: int):
+    """Drop a cached response the caller rejected (no-op when the cache is disabled)."""
+    cache = get_llm_cache()
+    if cache is not None and cache.cacheable(temperature):
+        cache.discard(prompt, temperature, max_tokens)
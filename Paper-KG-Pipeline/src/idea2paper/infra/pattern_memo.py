@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from idea2paper.config import (
+    CACHE_ROOT,
+    LLM_MODEL,
+    OUTPUT_DIR,
+    PATTERN_MEMO_ENABLE,
+    PATTERN_MEMO_MAX_ENTRIES,
+    PATTERN_MEMO_TTL_SEC,
+)
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.sqlite_cache import SqliteCache
+
+NODES_PATTERN = OUTPUT_DIR / "nodes_pattern.json"
+
+
+def _sha256_text(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def pattern_content_hash(pattern_info: Dict) -> str:
+    return _sha256_text(json.dumps(pattern_info or {}, ensure_ascii=False, sort_keys=True, default=str))
+
+
+class PatternMemo:
+    """Disk-backed memo for per-pattern LLM results (multidim scores, pattern DNA).
+
+    Key = kind + prompt version + LLM model + nodes_pattern.json hash + pattern_id
+    + pattern content hash (+ sha256 of the user idea when idea-dependent).
+    A changed nodes_pattern.json therefore never serves stale entries; they age
+    out through the store's LRU eviction.
+    """
+
+    def __init__(self, store: SqliteCache, nodes_hash: str, model: str = LLM_MODEL):
+        self.store = store
+        self.nodes_hash = nodes_hash
+        self.model = model
+
+    def key(self, kind: str, prompt_version: str, pattern_id: str, pattern_info: Dict,
+            idea: Optional[str] = None) -> str:
+        parts = [kind, prompt_version, self.model, self.nodes_hash, pattern_id, pattern_content_hash(pattern_info)]
+        if idea is not None:
+            parts.append(_sha256_text(idea))
+        return ":".join(parts)
+
+    def get_many(self, kind: str, prompt_version: str, items: Iterable[Tuple[str, Dict]],
+                 idea: Optional[str] = None) -> Dict[str, Dict]:
+        """Return {pattern_id: value} for the (pattern_id, pattern_info) items found."""
+        keys = {}
+        for pattern_id, pattern_info in items:
+            keys[self.key(kind, prompt_version, pattern_id, pattern_info, idea)] = pattern_id
+        found = self.store.get_many(keys.keys())
+        hits = {}
+        for key, blob in found.items():
+            try:
+                hits[keys[key]] = json.loads(blob.decode("utf-8"))
+            except Exception:
+                continue
+        return hits
+
+    def get(self, kind: str, prompt_version: str, pattern_id: str, pattern_info: Dict,
+            idea: Optional[str] = None) -> Optional[Dict]:
+        return self.get_many(kind, prompt_version, [(pattern_id, pattern_info)], idea).get(pattern_id)
+
+    def put(self, kind: str, prompt_version: str, pattern_id: str, pattern_info: Dict, value: Dict,
+            idea: Optional[str] = None):
+        key = self.key(kind, prompt_version, pattern_id, pattern_info, idea)
+        self.store.set(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+_MEMO = None
+_MEMO_STAT = None
+_MEMO_LOCK = threading.Lock()
+
+
+def _nodes_stat(path: Path):
+    try:
+        st = path.stat()
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def _nodes_hash(path: Path) -> str:
+    if not path.exists():
+        return "no-nodes"
+    return fingerprint(path)
+
+
+def get_pattern_memo() -> Optional[PatternMemo]:
+    """Process-wide pattern memo (None when disabled); re-hashes nodes_pattern.json when it changes."""
+    global _MEMO, _MEMO_STAT
+    if not PATTERN_MEMO_ENABLE:
+        return None
+    with _MEMO_LOCK:
+        stat = _nodes_stat(NODES_PATTERN)
+        if _MEMO is None or stat != _MEMO_STAT:
+            store = _MEMO.store if _MEMO is not None else SqliteCache(
+                CACHE_ROOT / "pattern_memo.sqlite",
+                max_entries=PATTERN_MEMO_MAX_ENTRIES,
+                ttl_sec=PATTERN_MEMO_TTL_SEC,
+            )
+            _MEMO = PatternMemo(store, _nodes_hash(NODES_PATTERN))
+            _MEMO_STAT = stat
+        return _MEMO
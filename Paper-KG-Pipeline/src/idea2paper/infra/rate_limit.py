@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Dict
+
+from idea2paper.config import (
+    ASYNC_EMBEDDING_MAX_CONCURRENCY,
+    ASYNC_EMBEDDING_RPS,
+    ASYNC_LLM_MAX_CONCURRENCY,
+    ASYNC_LLM_RPS,
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    rate <= 0 disables limiting. `reserve` only books the tokens and returns the
+    delay; `acquire` sleeps it off in the calling thread.
+    """
+
+    def __init__(self, rate: float, capacity: float = 0):
+        self.rate = float(rate or 0)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens (possibly going into debt) and return seconds to wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class RequestLimiter:
+    """Process-wide in-flight cap (semaphore) + request rate (token bucket) for one API.
+
+    Entered with `with limiter:` around each single HTTP request in the sync
+    call_llm / get_embedding / get_embeddings_batch, so worker threads and the
+    async wrappers (which run those functions via asyncio.to_thread) share one cap.
+    """
+
+    def __init__(self, max_concurrency: int, rate: float):
+        self.max_concurrency = max(1, int(max_concurrency or 1))
+        self.bucket = TokenBucket(rate)
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        try:
+            self.bucket.acquire()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
+
+
+_LIMITERS: Dict[str, RequestLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(name: str) -> RequestLimiter:
+    """Process-wide limiter for "llm" or "embedding"."""
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(name)
+        if limiter is None:
+            if name == "embedding":
+                limiter = RequestLimiter(ASYNC_EMBEDDING_MAX_CONCURRENCY, ASYNC_EMBEDDING_RPS)
+            else:
+                limiter = RequestLimiter(ASYNC_LLM_MAX_CONCURRENCY, ASYNC_LLM_RPS)
+            _LIMITERS[name] = limiter
+        return limiter
@@ -1,5 +1,6 @@
 import json
 import os
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -18,6 +19,7 @@ class RunLogger:
         self.events_path = self.run_dir / "events.jsonl"
         self.llm_path = self.run_dir / "llm_calls.jsonl"
         self.embedding_path = self.run_dir / "embedding_calls.jsonl"
+        self._write_lock = threading.Lock()
         self._init_files(meta or {})
 
     def _init_files(self, meta: Dict[str, Any]):
@@ -51,8 +53,10 @@ class RunLogger:
     def _append_jsonl(self, path: Path, payload: Dict[str, Any]):
         try:
             line = json.dumps(payload, ensure_ascii=False)
-            with path.open("a", encoding="utf-8") as f:
-                f.write(line + os.linesep)
+            # serialize appends so records from worker threads never interleave
+            with self._write_lock:
+                with path.open("a", encoding="utf-8") as f:
+                    f.write(line + os.linesep)
         except Exception as e:
             print(f"⚠️  [RunLogger] Failed to write log: {e}")
 
@@ -0,0 +1,159 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+
+class SqliteCache:
+    """Disk-backed key/value cache on SQLite, shared safely by threads and processes.
+
+    - WAL journal + busy timeout for concurrent pipeline processes
+    - memory-mapped reads (PRAGMA mmap_size)
+    - LRU eviction by last access time when max_entries is exceeded
+    - optional TTL (entries older than ttl_sec are treated as misses)
+
+    Any SQLite error disables the cache for this process instead of failing the run.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 0, ttl_sec: float = 0,
+                 mmap_bytes: int = 256 * 1024 * 1024, evict_every: int = 64):
+        self.path = Path(path)
+        self.max_entries = int(max_entries or 0)
+        self.ttl_sec = float(ttl_sec or 0)
+        self.mmap_bytes = int(mmap_bytes)
+        self.evict_every = max(1, int(evict_every))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._disabled = False
+
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if self._disabled:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={self.mmap_bytes}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS kv_accessed ON kv(accessed_at)")
+        except Exception as e:
+            self._disable(e)
+            return None
+        self._local.conn = conn
+        return conn
+
+    def _disable(self, error: Exception):
+        if not self._disabled:
+            print(f"⚠️  [cache] disabled ({self.path.name}): {error}")
+        self._disabled = True
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        keys = list(dict.fromkeys(keys))
+        conn = self._conn()
+        if conn is None or not keys:
+            return {}
+        now = time.time()
+        found = {}
+        expired = []
+        try:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value, created_at FROM kv WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self.ttl_sec and now - created_at > self.ttl_sec:
+                        expired.append(key)
+                        continue
+                    found[key] = bytes(value)
+            if found:
+                conn.executemany(
+                    "UPDATE kv SET accessed_at=? WHERE key=?", [(now, k) for k in found]
+                )
+            if expired:
+                conn.executemany("DELETE FROM kv WHERE key=?", [(k,) for k in expired])
+        except Exception as e:
+            self._disable(e)
+            return {}
+        return found
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, bytes]):
+        conn = self._conn()
+        if conn is None or not items:
+            return
+        now = time.time()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO kv(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    [(k, sqlite3.Binary(v), now, now) for k, v in items.items()]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            self._disable(e)
+            return
+        with self._lock:
+            self._writes_since_evict += len(items)
+            due = self._writes_since_evict >= self.evict_every
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def set(self, key: str, value: bytes):
+        self.set_many({key: value})
+
+    def delete(self, key: str):
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            conn.execute("DELETE FROM kv WHERE key=?", (key,))
+        except Exception as e:
+            self._disable(e)
+
+    def evict(self):
+        """Drop expired entries, then least-recently-used entries beyond max_entries."""
+        conn = self._conn()
+        if conn is None:
+            return
+        try:
+            if self.ttl_sec:
+                conn.execute("DELETE FROM kv WHERE created_at < ?", (time.time() - self.ttl_sec,))
+            if self.max_entries:
+                count = conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0]
+                excess = count - self.max_entries
+                if excess > 0:
+                    conn.execute(
+                        "DELETE FROM kv WHERE key IN "
+                        "(SELECT key FROM kv ORDER BY accessed_at ASC LIMIT ?)", (excess,)
+                    )
+        except Exception as e:
+            self._disable(e)
+
+    def __len__(self) -> int:
+        conn = self._conn()
+        if conn is None:
+            return 0
+        try:
+            return int(conn.execute("SELECT COUNT(*) FROM kv").fetchone()[0])
+        except Exception:
+            return 0
@@ -1,8 +1,19 @@
 from idea2paper.application.novelty.novelty_index import (
     NoveltyIndex,
+    PaperTextIndex,
     build_story_text,
     build_paper_text,
     keyword_overlap,
+    keyword_tokens,
+    token_overlap,
 )
 
-__all__ = ["NoveltyIndex", "build_story_text", "build_paper_text", "keyword_overlap"]
+__all__ = [
+    "NoveltyIndex",
+    "PaperTextIndex",
+    "build_story_text",
+    "build_paper_text",
+    "keyword_overlap",
+    "keyword_tokens",
+    "token_overlap",
+]
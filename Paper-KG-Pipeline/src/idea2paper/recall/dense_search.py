@@ -0,0 +1,232 @@
+"""
+Dense top-k search over the offline recall index (idea_emb.npy / paper_emb.npy).
+
+Backends:
+  - exact: blocked matmul over the whole (mmap'd) matrix + argpartition top-k
+  - ivf:   inverted-file index (spherical k-means lists), only `nprobe` lists are scanned
+
+Index rows are L2-normalized at build time, so the dot product equals the cosine
+score used by the embedding rerank.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from idea2paper.infra.index_store import DEFAULT_BLOCK_ROWS, EmbeddingMatrix
+
+DENSE_MODES = ("off", "exact", "ivf")
+QUERY_CHUNK = 64  # queries scored per matmul in search_batch (bounds the score buffer)
+# scores are ranked after rounding to this many decimals, so float32 summation-order
+# noise (batched vs single-query matmul) does not reorder near-ties; ties go to the lower row
+RANK_DECIMALS = 6
+
+
+def _normalize(vec) -> np.ndarray:
+    vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vec)
+    if norm == 0:
+        return vec
+    return vec / norm
+
+
+def _normalize_rows(mat) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores (rounded to RANK_DECIMALS), sorted desc; ties keep ascending index order."""
+    n = int(scores.shape[0])
+    if k <= 0 or n == 0:
+        return np.zeros((0,), dtype=np.int64)
+    keys = -np.round(scores, RANK_DECIMALS)
+    if k < n:
+        # rows tied with the k-th key are all candidates, so the lowest rows win the tie
+        kth = np.partition(keys, k - 1)[k - 1]
+        part = np.flatnonzero(keys <= kth)
+    else:
+        part = np.arange(n)
+    order = np.argsort(keys[part], kind="stable")
+    return part[order[:k]]
+
+
+class ExactDenseSearcher:
+    """Brute-force cosine top-k, scored block by block."""
+
+    name = "exact"
+
+    def __init__(self, matrix: EmbeddingMatrix, block_rows: int = DEFAULT_BLOCK_ROWS):
+        self.matrix = matrix
+        self.block_rows = block_rows
+
+    def search(self, query_vec, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = _normalize(query_vec)
+        scores = self.matrix.dot(q, block_rows=self.block_rows)
+        idxs = top_k_indices(scores, k)
+        return idxs, np.round(scores[idxs], RANK_DECIMALS)
+
+    def search_batch(self, query_vecs, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top-k for several queries; each chunk of queries is one matmul over the matrix.
+
+        Scores are reported at RANK_DECIMALS, like search(), so downstream fusion sees
+        the same values whether a query was batched or not.
+        """
+        queries = _normalize_rows(query_vecs)
+        results = []
+        for start in range(0, queries.shape[0], QUERY_CHUNK):
+            scores = self.matrix.matmul(queries[start:start + QUERY_CHUNK], block_rows=self.block_rows)
+            for row in scores:
+                idxs = top_k_indices(row, k)
+                results.append((idxs, np.round(row[idxs], RANK_DECIMALS)))
+        return results
+
+
+def _spherical_kmeans(sample: np.ndarray, n_lists: int, iters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    init = rng.choice(sample.shape[0], size=n_lists, replace=False)
+    centroids = sample[init].copy()
+    for _ in range(max(1, iters)):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        counts = np.bincount(assign, minlength=n_lists)
+        empty = np.where(counts == 0)[0]
+        if empty.size:
+            sums[empty] = sample[rng.choice(sample.shape[0], size=empty.size, replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids
+
+
+class IVFDenseSearcher:
+    """Approximate cosine top-k: rows are bucketed by nearest centroid and only
+    the `nprobe` closest buckets are scored exactly."""
+
+    name = "ivf"
+
+    def __init__(self, matrix: EmbeddingMatrix, centroids: np.ndarray, offsets: np.ndarray,
+                 list_rows: np.ndarray, nprobe: int = 8):
+        self.matrix = matrix
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.list_rows = np.asarray(list_rows, dtype=np.int64)
+        self.nprobe = max(1, int(nprobe))
+
+    @property
+    def n_lists(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def train(cls, matrix: EmbeddingMatrix, n_lists: int = 0, nprobe: int = 8, iters: int = 10,
+              sample_size: int = 0, seed: int = 0, block_rows: int = DEFAULT_BLOCK_ROWS) -> "IVFDenseSearcher":
+        n = len(matrix)
+        if n == 0:
+            raise ValueError("cannot train IVF on an empty index")
+        if n_lists <= 0:
+            n_lists = int(np.sqrt(n))
+        n_lists = max(1, min(n_lists, n))
+        sample_size = sample_size or min(n, n_lists * 64)
+        sample_size = max(n_lists, min(n, sample_size))
+        rng = np.random.default_rng(seed)
+        sample_idx = np.sort(rng.choice(n, size=sample_size, replace=False))
+        centroids = _spherical_kmeans(matrix.rows(sample_idx), n_lists, iters, seed)
+
+        assign = np.empty((n,), dtype=np.int64)
+        for start, block in matrix.iter_blocks(block_rows):
+            assign[start:start + block.shape[0]] = np.argmax(block @ centroids.T, axis=1)
+        list_rows = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=n_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(matrix, centroids, offsets, list_rows, nprobe=nprobe)
+
+    def save(self, path: Path, meta: Dict):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez(
+            tmp,
+            centroids=self.centroids,
+            offsets=self.offsets,
+            list_rows=self.list_rows,
+            meta=np.array(json.dumps(meta, sort_keys=True)),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, matrix: EmbeddingMatrix, meta: Dict, nprobe: int = 8) -> Optional["IVFDenseSearcher"]:
+        """Load a saved IVF if it was built for the same index (meta must match)."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                if json.loads(str(data["meta"])) != json.loads(json.dumps(meta, sort_keys=True)):
+                    return None
+                searcher = cls(matrix, data["centroids"], data["offsets"], data["list_rows"], nprobe=nprobe)
+        except Exception:
+            return None
+        if int(searcher.offsets[-1]) != len(matrix):
+            return None
+        return searcher
+
+    def search(self, query_vec, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = _normalize(query_vec)
+        return self._search_lists(q, self._centroid_scores(q.reshape(1, -1))[0], k)
+
+    def search_batch(self, query_vecs, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top-k for several queries; centroid scores for all queries come from one matmul."""
+        queries = _normalize_rows(query_vecs)
+        centroid_scores = self._centroid_scores(queries)
+        return [self._search_lists(q, cs, k) for q, cs in zip(queries, centroid_scores)]
+
+    def _centroid_scores(self, queries: np.ndarray) -> np.ndarray:
+        # float64 so probe order does not depend on how many queries are batched
+        return (queries.astype(np.float64) @ self.centroids.T.astype(np.float64)).astype(np.float32)
+
+    def _search_lists(self, q: np.ndarray, centroid_scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        probe = top_k_indices(centroid_scores, min(self.nprobe, self.n_lists))
+        cand = np.concatenate([
+            self.list_rows[self.offsets[c]:self.offsets[c + 1]] for c in probe
+        ]) if probe.size else np.zeros((0,), dtype=np.int64)
+        if cand.size == 0:
+            return cand, np.zeros((0,), dtype=np.float32)
+        cand.sort()
+        scores = self.matrix.rows(cand) @ q
+        top = top_k_indices(scores, k)
+        return cand[top], scores[top]
+
+
+def load_dense_searcher(mode: str, matrix: EmbeddingMatrix, ivf_path: Optional[Path] = None,
+                        index_manifest: Optional[Dict] = None, n_lists: int = 0, nprobe: int = 8):
+    """Build the searcher for `mode`; the IVF is cached at ivf_path and reused
+    while the index manifest and list count are unchanged."""
+    if mode == "exact":
+        return ExactDenseSearcher(matrix)
+    if mode != "ivf":
+        return None
+    manifest = index_manifest or {}
+    meta = {
+        "index_created_at": manifest.get("created_at"),
+        "index_count": len(matrix),
+        "emb_dtype": manifest.get("emb_dtype") or "float32",
+        "n_lists": int(n_lists or 0),
+    }
+    if ivf_path is not None:
+        cached = IVFDenseSearcher.load(ivf_path, matrix, meta, nprobe=nprobe)
+        if cached is not None:
+            return cached
+    searcher = IVFDenseSearcher.train(matrix, n_lists=n_lists, nprobe=nprobe)
+    if ivf_path is not None:
+        try:
+            searcher.save(ivf_path, meta)
+        except Exception as e:
+            print(f"⚠️  [dense] failed to save IVF lists ({ivf_path.name}): {e}")
+    return searcher
@@ -0,0 +1,51 @@
+import heapq
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+class TokenInvertedIndex:
+    """Token -> posting list index over a fixed row order (used by the Jaccard coarse stage).
+
+    Only rows sharing at least one token with the query are scored, and the
+    top-k is kept with a heap. Ties keep the original row order, so the result
+    equals a full scan followed by a stable sort.
+    """
+
+    def __init__(self, ids: Sequence[str], token_sets: Sequence[frozenset]):
+        self.ids = list(ids)
+        self.sizes = [len(t) for t in token_sets]
+        self.postings = {}
+        for row, tokens in enumerate(token_sets):
+            for tok in tokens:
+                self.postings.setdefault(tok, []).append(row)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def overlap_counts(self, query_tokens: Iterable[str]) -> dict:
+        counts = {}
+        for tok in query_tokens:
+            rows = self.postings.get(tok)
+            if not rows:
+                continue
+            for row in rows:
+                counts[row] = counts.get(row, 0) + 1
+        return counts
+
+    def top_jaccard(self, query_tokens: frozenset, k: Optional[int],
+                    min_score: float = 0.0) -> Tuple[List[Tuple[str, float]], int]:
+        """Return ([(id, jaccard), ...] sorted desc, number of rows with score > min_score)."""
+        if not query_tokens:
+            return [], 0
+        q_size = len(query_tokens)
+        counts = self.overlap_counts(query_tokens)
+        scored = []
+        for row in sorted(counts):
+            inter = counts[row]
+            sim = inter / (q_size + self.sizes[row] - inter)
+            if sim > min_score:
+                scored.append((self.ids[row], sim))
+        if k is None:
+            top = sorted(scored, key=lambda x: x[1], reverse=True)
+        else:
+            top = heapq.nlargest(k, scored, key=lambda x: x[1])
+        return top, len(scored)
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def paper_quality(paper: Dict) -> float:
+    """计算Paper的综合质量分数
+
+    基于review的评分，归一化到[0, 1]
+    如果没有review数据，返回默认值0.5
+    """
+    # 优先使用新结构中的 review_stats.avg_score
+    review_stats = paper.get('review_stats', {})
+
+    if review_stats and review_stats.get('avg_score'):
+        # 已经是 0-1 的分数
+        return float(review_stats['avg_score'])
+
+    # 备选方案：兼容旧结构（review 列表）
+    reviews = paper.get('reviews', [])
+
+    if not reviews:
+        return 0.5  # 默认中等质量
+
+    # 提取所有评分
+    scores = []
+    for review in reviews:
+        score_str = review.get('overall_score', '')
+        # 尝试解析评分（可能是 "7", "7/10", "7.0" 等格式）
+        try:
+            if '/' in score_str:
+                score_str = score_str.split('/')[0]
+            score = float(score_str.strip())
+            scores.append(score)
+        except (ValueError, AttributeError):
+            continue
+
+    if not scores:
+        return 0.5
+
+    # 计算平均分并归一化
+    avg_score = np.mean(scores)
+    # 假设评分范围是 1-10，归一化到 [0, 1]
+    normalized_score = (avg_score - 1) / 9
+
+    return min(max(normalized_score, 0.0), 1.0)
+
+
+def edge_quality(paper: Dict) -> float:
+    """建边使用的 Paper 质量：review_stats.avg_score 截断到 [0, 1]（缺省 0.5）
+
+    与 paper_quality() 不同：avg_score 为 0 时按 0 计，不回退到旧的 reviews 列表。
+    """
+    review_stats = paper.get('review_stats', {}) or {}
+    avg_score = review_stats.get('avg_score')
+    if avg_score is None:
+        return 0.5
+    return min(max(float(avg_score), 0.0), 1.0)
+
+
+def _review_stats_fields(paper: Dict):
+    """(avg_score, review_count, highest - lowest) from review_stats（无数据时 0.5 / 0 / 0）"""
+    review_stats = paper.get('review_stats', {}) or {}
+    avg_score = review_stats.get('avg_score')
+    avg_score = 0.5 if avg_score is None else float(avg_score)
+    highest = review_stats.get('highest_score')
+    lowest = review_stats.get('lowest_score')
+    highest = avg_score if highest is None else float(highest)
+    lowest = avg_score if lowest is None else float(lowest)
+    return avg_score, int(review_stats.get('review_count', 0) or 0), highest - lowest
+
+
+class PaperQualityTable:
+    """Paper 质量相关数组，按 paper 行（nodes_paper 顺序）对齐，只计算一次
+
+    - quality:       paper_quality() 的结果（[0, 1]，召回路径3 使用）
+    - edge_quality:  edge_quality() 的结果（[0, 1]，build_edges 使用）
+    - review_score:  review_stats.avg_score（缺省 0.5，ReviewIndex 使用）
+    - review_count:  review_stats.review_count
+    - dispersion:    review_stats.highest_score - lowest_score（0-1 分制）
+    """
+
+    def __init__(self, paper_ids: Sequence[str], quality: np.ndarray, edge_quality: np.ndarray,
+                 review_score: np.ndarray, review_count: np.ndarray, dispersion: np.ndarray):
+        self.paper_ids: List[str] = list(paper_ids)
+        self.quality = np.asarray(quality, dtype=np.float64)
+        self.edge_quality = np.asarray(edge_quality, dtype=np.float64)
+        self.review_score = np.asarray(review_score, dtype=np.float64)
+        self.review_count = np.asarray(review_count, dtype=np.int64)
+        self.dispersion = np.asarray(dispersion, dtype=np.float64)
+        # 重复 paper_id 时后出现的行生效（与 paper_id_to_paper 一致）
+        self.row_of: Dict[str, int] = {pid: i for i, pid in enumerate(self.paper_ids) if pid}
+
+    @classmethod
+    def from_papers(cls, papers: Sequence[Dict]) -> "PaperQualityTable":
+        stats = [_review_stats_fields(p) for p in papers]
+        return cls(
+            paper_ids=[str(p.get('paper_id') or '') for p in papers],
+            quality=[paper_quality(p) for p in papers],
+            edge_quality=[edge_quality(p) for p in papers],
+            review_score=[s[0] for s in stats],
+            review_count=[s[1] for s in stats],
+            dispersion=[s[2] for s in stats],
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """用于 np.savez 持久化（与 from_arrays 对应）"""
+        return {
+            "paper_ids": np.asarray(self.paper_ids, dtype=str),
+            "quality": self.quality,
+            "edge_quality": self.edge_quality,
+            "review_score": self.review_score,
+            "review_count": self.review_count,
+            "dispersion": self.dispersion,
+        }
+
+    @classmethod
+    def from_arrays(cls, data) -> "PaperQualityTable":
+        return cls(
+            paper_ids=data["paper_ids"].tolist(),
+            quality=data["quality"],
+            edge_quality=data["edge_quality"],
+            review_score=data["review_score"],
+            review_count=data["review_count"],
+            dispersion=data["dispersion"],
+        )
+
+    def __len__(self) -> int:
+        return len(self.paper_ids)
+
+    def rows(self, paper_ids: Sequence[str]) -> np.ndarray:
+        """paper_id 列表 → 行号数组（未知 id 为 -1）"""
+        return np.fromiter((self.row_of.get(pid, -1) for pid in paper_ids), dtype=np.int64, count=len(paper_ids))
+
+    def quality_of(self, paper_ids: Sequence[str], default: float = 0.5) -> np.ndarray:
+        rows = self.rows(paper_ids)
+        out = np.full(len(rows), default, dtype=np.float64)
+        known = rows >= 0
+        out[known] = self.quality[rows[known]]
+        return out
+
+    def get(self, paper_id: str) -> Optional[float]:
+        row = self.row_of.get(paper_id)
+        return None if row is None else float(self.quality[row])
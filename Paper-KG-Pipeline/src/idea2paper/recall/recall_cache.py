@@ -0,0 +1,84 @@
+"""
+Persistent recall result cache.
+
+Entries hold the final ranked pattern list plus the per-path scores/audit state of
+one RecallSystem.recall call. The key covers the normalized idea text and a
+context dict (RecallConfig values, dense/offline-index settings, index manifests,
+node/graph fingerprints), so any change to weights, top-k or the indexed data
+yields a different key; stale entries age out through TTL / LRU eviction.
+"""
+
+import hashlib
+import json
+import pickle
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from idea2paper.config import CACHE_ROOT, PipelineConfig
+from idea2paper.infra.sqlite_cache import SqliteCache
+
+RECALL_CACHE_VERSION = 1
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_idea(text: str) -> str:
+    """NFKC + collapse whitespace; the text used for recall itself is not changed."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+class RecallResultCache:
+    """Recall results keyed by sha256(version, context, normalized idea)."""
+
+    def __init__(self, store: SqliteCache):
+        self.store = store
+
+    def key(self, user_idea: str, context: Dict) -> str:
+        blob = json.dumps(
+            [RECALL_CACHE_VERSION, context, normalize_idea(user_idea)],
+            ensure_ascii=False, sort_keys=True, default=str,
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def get_many(self, user_ideas: List[str], context: Dict) -> Dict[int, Dict]:
+        """Return {position: entry} for the ideas found in cache."""
+        keys = [self.key(idea, context) for idea in user_ideas]
+        found = self.store.get_many(keys)
+        hits = {}
+        for i, key in enumerate(keys):
+            blob = found.get(key)
+            if blob is None:
+                continue
+            try:
+                hits[i] = pickle.loads(blob)
+            except Exception:
+                self.store.delete(key)
+        return hits
+
+    def get(self, user_idea: str, context: Dict) -> Optional[Dict]:
+        return self.get_many([user_idea], context).get(0)
+
+    def put(self, user_idea: str, context: Dict, entry: Dict):
+        self.store.set(self.key(user_idea, context), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+_CACHE = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_recall_cache() -> Optional[RecallResultCache]:
+    """Process-wide recall result cache (None when disabled)."""
+    global _CACHE
+    if not PipelineConfig.RECALL_CACHE_ENABLE:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            store = SqliteCache(
+                CACHE_ROOT / "recall_results.sqlite",
+                max_entries=PipelineConfig.RECALL_CACHE_MAX_ENTRIES,
+                ttl_sec=PipelineConfig.RECALL_CACHE_TTL_SEC,
+            )
+            _CACHE = RecallResultCache(store)
+        return _CACHE
@@ -0,0 +1,235 @@
+"""
+Prebuilt binary snapshot for fast RecallSystem start-up.
+
+Layout (<snapshot_dir>/):
+  manifest.json            version, source file fingerprints, counts (written last)
+  nodes_<kind>.pkl         node lists for idea / pattern / domain / paper
+  tokens.pkl               recall token sets + Jaccard inverted indexes
+  quality.npz              paper quality / edge quality / review score / count / dispersion aligned with nodes_paper rows
+  graph.npz                recall relations (belongs_to / works_well_in / uses_pattern) as edge arrays
+
+A snapshot is used only while every source file (nodes_*.json, the gpickle) still
+has the recorded sha256 (via the shared fingerprint cache, so unchanged files are
+not re-hashed). Sections are read on first access.
+"""
+
+import json
+import os
+import pickle
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.recall.inverted_index import TokenInvertedIndex
+from idea2paper.recall.paper_quality import PaperQualityTable
+from idea2paper.recall.recall_text import build_recall_idea_text, build_recall_paper_text
+from idea2paper.recall.relation_graph import RECALL_RELATIONS, RelationGraph
+from idea2paper.recall.tokenize import to_token_set
+
+SNAPSHOT_VERSION = 3
+NODE_SECTIONS = ("nodes_idea", "nodes_pattern", "nodes_domain", "nodes_paper")
+SOURCE_KEYS = NODE_SECTIONS + ("graph",)
+
+_SECTION_FILES = {
+    "nodes_idea": "nodes_idea.pkl",
+    "nodes_pattern": "nodes_pattern.pkl",
+    "nodes_domain": "nodes_domain.pkl",
+    "nodes_paper": "nodes_paper.pkl",
+    "tokens": "tokens.pkl",
+    "quality": "quality.npz",
+    "graph": "graph.npz",
+}
+
+
+# ===================== Section builders (shared with the JSON path) =====================
+
+def build_idea_token_sets(ideas: Sequence[Dict]) -> Dict[str, frozenset]:
+    token_sets = {}
+    for idea in ideas:
+        idea_id = idea.get("idea_id")
+        if idea_id:
+            token_sets[idea_id] = to_token_set(build_recall_idea_text(idea))
+    return token_sets
+
+
+def build_paper_token_sets(papers: Sequence[Dict]) -> Dict[str, frozenset]:
+    token_sets = {}
+    for paper in papers:
+        paper_id = paper.get("paper_id")
+        if paper_id:
+            token_sets[paper_id] = to_token_set(build_recall_paper_text(paper))
+    return token_sets
+
+
+def build_idea_inv_index(ideas: Sequence[Dict], token_sets: Dict[str, frozenset]) -> TokenInvertedIndex:
+    """粗排用的Idea倒排索引（token -> 行号）"""
+    ids = []
+    tokens_list = []
+    for idea in ideas:
+        idea_id = idea.get("idea_id")
+        ids.append(idea_id)
+        tokens = token_sets.get(idea_id)
+        if tokens is None:
+            tokens = to_token_set(idea.get('description', ''))
+        tokens_list.append(tokens)
+    return TokenInvertedIndex(ids, tokens_list)
+
+
+def build_paper_inv_index(papers: Sequence[Dict], token_sets: Dict[str, frozenset]) -> TokenInvertedIndex:
+    """粗排用的Paper倒排索引；无标题的Paper不参与粗排"""
+    ids = []
+    tokens_list = []
+    for paper in papers:
+        paper_id = paper.get("paper_id")
+        ids.append(paper_id)
+        if not paper.get('title', ''):
+            tokens_list.append(frozenset())
+            continue
+        tokens = token_sets.get(paper_id)
+        if tokens is None:
+            tokens = to_token_set(paper.get('title', ''))
+        tokens_list.append(tokens)
+    return TokenInvertedIndex(ids, tokens_list)
+
+
+# ===================== Build / load =====================
+
+def _atomic_write_bytes(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _atomic_savez(path: Path, arrays: Dict[str, np.ndarray]):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def _fingerprint(path: Path) -> Dict:
+    st = path.stat()
+    return {"sha256": fingerprint(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _source_matches(path: Path, recorded: Optional[Dict]) -> bool:
+    if not recorded or not path.exists():
+        return False
+    if path.stat().st_size != recorded.get("size"):
+        return False
+    return fingerprint(path) == recorded.get("sha256")
+
+
+def _load_json(path: Path) -> List[Dict]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def build_recall_snapshot(snapshot_dir: Path, sources: Dict[str, Path]) -> Dict:
+    """Build the snapshot from the node JSON files and the gpickle; returns the manifest."""
+    snapshot_dir = Path(snapshot_dir)
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = snapshot_dir / "manifest.json"
+    if manifest_path.exists():
+        manifest_path.unlink()
+
+    fingerprints = {key: _fingerprint(Path(sources[key])) for key in SOURCE_KEYS}
+
+    nodes = {}
+    for key in NODE_SECTIONS:
+        nodes[key] = _load_json(Path(sources[key]))
+        _atomic_write_bytes(
+            snapshot_dir / _SECTION_FILES[key],
+            pickle.dumps(nodes[key], protocol=pickle.HIGHEST_PROTOCOL),
+        )
+
+    ideas, papers = nodes["nodes_idea"], nodes["nodes_paper"]
+    idea_token_sets = build_idea_token_sets(ideas)
+    paper_token_sets = build_paper_token_sets(papers)
+    tokens = {
+        "idea_token_sets": idea_token_sets,
+        "paper_token_sets": paper_token_sets,
+        "idea_inv_index": build_idea_inv_index(ideas, idea_token_sets),
+        "paper_inv_index": build_paper_inv_index(papers, paper_token_sets),
+    }
+    _atomic_write_bytes(snapshot_dir / _SECTION_FILES["tokens"], pickle.dumps(tokens, protocol=pickle.HIGHEST_PROTOCOL))
+
+    _atomic_savez(snapshot_dir / _SECTION_FILES["quality"], PaperQualityTable.from_papers(papers).arrays())
+
+    with open(sources["graph"], 'rb') as f:
+        G = pickle.load(f)
+    graph = RelationGraph.from_networkx(G)
+    graph.save(snapshot_dir / _SECTION_FILES["graph"])
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "sources": fingerprints,
+        "relations": list(RECALL_RELATIONS),
+        "counts": {
+            "ideas": len(ideas),
+            "patterns": len(nodes["nodes_pattern"]),
+            "domains": len(nodes["nodes_domain"]),
+            "papers": len(papers),
+            "graph_nodes": G.number_of_nodes(),
+            "graph_edges": G.number_of_edges(),
+            "relation_edges": graph.number_of_edges(),
+        },
+    }
+    _atomic_write_bytes(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+    return manifest
+
+
+class RecallSnapshot:
+    """Lazily loaded view over a snapshot directory."""
+
+    def __init__(self, snapshot_dir: Path, manifest: Dict):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.manifest = manifest
+        self._sections = {}
+
+    @classmethod
+    def open(cls, snapshot_dir: Path, sources: Dict[str, Path]) -> Tuple[Optional["RecallSnapshot"], str]:
+        """Return (snapshot, "ok") if it matches the sources, else (None, reason)."""
+        snapshot_dir = Path(snapshot_dir)
+        manifest_path = snapshot_dir / "manifest.json"
+        if not manifest_path.exists():
+            return None, "missing"
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except Exception:
+            return None, "bad_manifest"
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            return None, "version_mismatch"
+        if list(manifest.get("relations") or []) != list(RECALL_RELATIONS):
+            return None, "relations_mismatch"
+        for name in _SECTION_FILES.values():
+            if not (snapshot_dir / name).exists():
+                return None, "incomplete"
+        recorded = manifest.get("sources") or {}
+        for key in SOURCE_KEYS:
+            if not _source_matches(Path(sources[key]), recorded.get(key)):
+                return None, f"{key}_changed"
+        return cls(snapshot_dir, manifest), "ok"
+
+    @property
+    def counts(self) -> Dict[str, int]:
+        return self.manifest.get("counts") or {}
+
+    def load(self, section: str):
+        if section in self._sections:
+            return self._sections[section]
+        path = self.snapshot_dir / _SECTION_FILES[section]
+        if section == "graph":
+            value = RelationGraph.load(path)
+        elif section == "quality":
+            with np.load(path) as data:
+                value = PaperQualityTable.from_arrays(data)
+        else:
+            with path.open("rb") as f:
+                value = pickle.load(f)
+        self._sections[section] = value
+        return value
@@ -16,19 +16,36 @@ import json
 import os
 import pickle
 import time
-import hashlib
 from collections import defaultdict
+from functools import cached_property
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 import numpy as np
-import requests
 
 from pipeline.run_context import get_logger
 from idea2paper.config import OUTPUT_DIR, PipelineConfig
-from idea2paper.infra.embeddings import get_embeddings_batch, EMBEDDING_MODEL
+from idea2paper.infra.embeddings import (
+    get_embeddings_batch, get_cached_embedding, get_cached_embeddings, EMBEDDING_MODEL,
+)
+from idea2paper.infra.embedding_cache import get_embedding_cache
+from idea2paper.infra.fingerprint import fingerprint
+from idea2paper.infra.http_client import get_http_session
+from idea2paper.infra.index_segments import load_index, segments_complete
+from idea2paper.infra.rate_limit import get_limiter
 from idea2paper.recall.recall_text import build_recall_idea_text, build_recall_paper_text, truncate_for_embedding
 from idea2paper.recall.tokenize import to_token_set, jaccard_from_sets
+from idea2paper.recall.paper_quality import PaperQualityTable
+from idea2paper.recall.recall_snapshot import (
+    RecallSnapshot,
+    build_idea_inv_index,
+    build_idea_token_sets,
+    build_paper_inv_index,
+    build_paper_token_sets,
+)
+from idea2paper.recall.relation_graph import RelationGraph
+from idea2paper.recall.recall_cache import get_recall_cache
+from idea2paper.recall.dense_search import DENSE_MODES, load_dense_searcher
 
 # 输入文件
 NODES_IDEA = OUTPUT_DIR / "nodes_idea.json"
@@ -69,6 +86,18 @@ class RecallConfig:
     FINE_RECALL_SIZE = 20        # 精排数量（Embedding精确排序）
 
 
+def recall_config_context() -> Dict:
+    """召回结果依赖的配置（召回缓存键与常驻索引服务签名共用）"""
+    return {
+        "recall_config": {k: getattr(RecallConfig, k) for k in dir(RecallConfig) if k.isupper()},
+        "embedding_model": EMBEDDING_MODEL,
+        "dense": [str(PipelineConfig.RECALL_DENSE_MODE or "off").lower(), PipelineConfig.RECALL_DENSE_IVF_NLIST,
+                  PipelineConfig.RECALL_DENSE_IVF_NPROBE],
+        "audit": [PipelineConfig.RECALL_AUDIT_ENABLE, PipelineConfig.RECALL_AUDIT_TOPN,
+                  PipelineConfig.RECALL_AUDIT_SNIPPET_CHARS],
+    }
+
+
 # ===================== 召回系统 =====================
 class RecallSystem:
     """三路召回系统"""
@@ -77,21 +106,10 @@ class RecallSystem:
         print("🚀 初始化召回系统...")
         self.logger = logger or get_logger()
 
-        # 加载数据
-        self.ideas = self._load_json(NODES_IDEA)
-        self.patterns = self._load_json(NODES_PATTERN)
-        self.domains = self._load_json(NODES_DOMAIN)
-        self.papers = self._load_json(NODES_PAPER)
-
-        # 加载图谱
-        with open(GRAPH_FILE, 'rb') as f:
-            self.G = pickle.load(f)
-
-        # 构建索引
-        self.idea_id_to_idea = {i['idea_id']: i for i in self.ideas}
-        self.pattern_id_to_pattern = {p['pattern_id']: p for p in self.patterns}
-        self.domain_id_to_domain = {d['domain_id']: d for d in self.domains}
-        self.paper_id_to_paper = {p['paper_id']: p for p in self.papers}
+        # 冷启动快照: 源文件哈希一致时按需加载各部分，否则从JSON/图谱加载
+        self._snapshot = None
+        if PipelineConfig.RECALL_SNAPSHOT_ENABLE:
+            self._snapshot = self._open_snapshot()
 
         self._use_embed_batch = True
         self._use_token_cache = True
@@ -100,6 +118,17 @@ class RecallSystem:
         self._embed_max_retries = int(PipelineConfig.RECALL_EMBED_MAX_RETRIES)
         self._embed_sleep_sec = float(PipelineConfig.RECALL_EMBED_SLEEP_SEC)
         self._recall_index_dir = Path(PipelineConfig.RECALL_INDEX_DIR)
+        self._dense_mode = str(PipelineConfig.RECALL_DENSE_MODE or "off").lower()
+        if self._dense_mode not in DENSE_MODES:
+            print(f"⚠️  未知的 dense_mode={self._dense_mode}，回退为 off")
+            self._dense_mode = "off"
+        self._dense_searchers = {}
+        # recall_batch 预取的当前Query结果: {"query_emb": [...], "dense": {kind: [(id, sim), ...]},
+        #   "cache_checked": 是否已查过召回缓存, "cached": 命中的缓存条目（未命中为 None）}
+        self._prefetched = None
+        # 本次召回是否因embedding失败降级（降级结果不写入召回缓存）
+        self._recall_degraded = False
+        self._recall_cache_ctx = None
 
         self._offline_index_loaded = False
         self._offline_index_ok = False
@@ -110,40 +139,155 @@ class RecallSystem:
         self._paper_emb = None
         self._paper_meta = None
         self._paper_id_to_idx = {}
-
-        self._idea_token_sets = {}
-        self._paper_token_sets = {}
-        if self._use_token_cache:
-            for idea in self.ideas:
-                idea_id = idea.get("idea_id")
-                if idea_id:
-                    self._idea_token_sets[idea_id] = to_token_set(build_recall_idea_text(idea))
-            for paper in self.papers:
-                paper_id = paper.get("paper_id")
-                if paper_id:
-                    self._paper_token_sets[paper_id] = to_token_set(build_recall_paper_text(paper))
-
-        print(f"  ✓ 加载 {len(self.ideas)} 个Idea")
-        print(f"  ✓ 加载 {len(self.patterns)} 个Pattern")
-        print(f"  ✓ 加载 {len(self.domains)} 个Domain")
-        print(f"  ✓ 加载 {len(self.papers)} 个Paper")
-        print(f"  ✓ 图谱节点: {self.G.number_of_nodes()}, 边: {self.G.number_of_edges()}")
+        self._idea_manifest = None
+        self._paper_manifest = None
+
+        if self._snapshot is None:
+            # 无快照: 启动时加载全部数据（原行为）
+            names = ["ideas", "patterns", "domains", "papers", "G",
+                     "idea_id_to_idea", "pattern_id_to_pattern", "domain_id_to_domain", "paper_id_to_paper"]
+            if self._use_token_cache:
+                names += ["_idea_inv_index", "_paper_inv_index"]
+            for name in names:
+                getattr(self, name)
+            counts = {
+                "ideas": len(self.ideas),
+                "patterns": len(self.patterns),
+                "domains": len(self.domains),
+                "papers": len(self.papers),
+                "graph_nodes": self.G.number_of_nodes(),
+                "graph_edges": self.G.number_of_edges(),
+            }
+        else:
+            counts = self._snapshot.counts
+            print(f"  ✓ 使用召回快照: {self._snapshot.snapshot_dir}")
+
+        print(f"  ✓ 加载 {counts.get('ideas', 0)} 个Idea")
+        print(f"  ✓ 加载 {counts.get('patterns', 0)} 个Pattern")
+        print(f"  ✓ 加载 {counts.get('domains', 0)} 个Domain")
+        print(f"  ✓ 加载 {counts.get('papers', 0)} 个Paper")
+        print(f"  ✓ 图谱节点: {counts.get('graph_nodes', 0)}, 边: {counts.get('graph_edges', 0)}")
         print()
 
+    def _snapshot_sources(self) -> Dict[str, Path]:
+        return {
+            "nodes_idea": NODES_IDEA,
+            "nodes_pattern": NODES_PATTERN,
+            "nodes_domain": NODES_DOMAIN,
+            "nodes_paper": NODES_PAPER,
+            "graph": GRAPH_FILE,
+        }
+
+    def _open_snapshot(self):
+        snapshot_dir = Path(PipelineConfig.RECALL_SNAPSHOT_DIR)
+        try:
+            snapshot, reason = RecallSnapshot.open(snapshot_dir, self._snapshot_sources())
+        except Exception as e:
+            snapshot, reason = None, f"error: {e}"
+        if self.logger and reason != "missing":
+            self.logger.log_event("recall_snapshot_used" if snapshot else "recall_snapshot_fallback", {
+                "snapshot_dir": str(snapshot_dir),
+                "reason": reason,
+            })
+        return snapshot
+
+    # ===================== 数据（快照命中时按需加载） =====================
+
+    def _load_nodes(self, section: str, path: Path) -> List[Dict]:
+        if self._snapshot is not None:
+            return self._snapshot.load(section)
+        return self._load_json(path)
+
+    @cached_property
+    def ideas(self) -> List[Dict]:
+        return self._load_nodes("nodes_idea", NODES_IDEA)
+
+    @cached_property
+    def patterns(self) -> List[Dict]:
+        return self._load_nodes("nodes_pattern", NODES_PATTERN)
+
+    @cached_property
+    def domains(self) -> List[Dict]:
+        return self._load_nodes("nodes_domain", NODES_DOMAIN)
+
+    @cached_property
+    def papers(self) -> List[Dict]:
+        return self._load_nodes("nodes_paper", NODES_PAPER)
+
+    @cached_property
+    def G(self):
+        """知识图谱；快照命中时为只含召回关系的 RelationGraph"""
+        if self._snapshot is not None:
+            return self._snapshot.load("graph")
+        with open(GRAPH_FILE, 'rb') as f:
+            return pickle.load(f)
+
+    @cached_property
+    def _adjacency(self) -> RelationGraph:
+        """召回关系的CSR邻接（路径2/3的图遍历与Pattern聚合使用，不走networkx）"""
+        G = self.G
+        if isinstance(G, RelationGraph):
+            return G
+        return RelationGraph.from_networkx(G)
+
+    @cached_property
+    def idea_id_to_idea(self) -> Dict[str, Dict]:
+        return {i['idea_id']: i for i in self.ideas}
+
+    @cached_property
+    def pattern_id_to_pattern(self) -> Dict[str, Dict]:
+        return {p['pattern_id']: p for p in self.patterns}
+
+    @cached_property
+    def domain_id_to_domain(self) -> Dict[str, Dict]:
+        return {d['domain_id']: d for d in self.domains}
+
+    @cached_property
+    def paper_id_to_paper(self) -> Dict[str, Dict]:
+        return {p['paper_id']: p for p in self.papers}
+
+    @cached_property
+    def _idea_token_sets(self) -> Dict[str, frozenset]:
+        if self._snapshot is not None:
+            return self._snapshot.load("tokens")["idea_token_sets"]
+        return build_idea_token_sets(self.ideas) if self._use_token_cache else {}
+
+    @cached_property
+    def _paper_token_sets(self) -> Dict[str, frozenset]:
+        if self._snapshot is not None:
+            return self._snapshot.load("tokens")["paper_token_sets"]
+        return build_paper_token_sets(self.papers) if self._use_token_cache else {}
+
+    @cached_property
+    def _idea_inv_index(self):
+        """粗排用的倒排索引（token -> 行号），只对共享token的候选计算Jaccard"""
+        if self._snapshot is not None:
+            return self._snapshot.load("tokens")["idea_inv_index"]
+        if not self._use_token_cache:
+            return None
+        return build_idea_inv_index(self.ideas, self._idea_token_sets)
+
+    @cached_property
+    def _paper_inv_index(self):
+        if self._snapshot is not None:
+            return self._snapshot.load("tokens")["paper_inv_index"]
+        if not self._use_token_cache:
+            return None
+        return build_paper_inv_index(self.papers, self._paper_token_sets)
+
+    @cached_property
+    def _paper_quality(self) -> PaperQualityTable:
+        if self._snapshot is not None:
+            return self._snapshot.load("quality")
+        return PaperQualityTable.from_papers(self.papers)
+
     def _load_json(self, filepath: Path) -> List[Dict]:
         """加载JSON文件"""
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
 
-    def _file_hash(self, path: Path) -> str:
-        h = hashlib.sha256()
-        with path.open("rb") as f:
-            for chunk in iter(lambda: f.read(1024 * 1024), b""):
-                h.update(chunk)
-        return h.hexdigest()
-
-    def _load_index_kind(self, kind: str, emb_path: Path, meta_path: Path, manifest_path: Path, expected_hash: str):
-        if not emb_path.exists() or not meta_path.exists() or not manifest_path.exists():
+    def _load_index_kind(self, kind: str, manifest_path: Path, expected_hash: str):
+        if not manifest_path.exists():
             return None
         try:
             manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
@@ -151,9 +295,10 @@ class RecallSystem:
                 return None
             if manifest.get(f"nodes_{kind}_hash") != expected_hash:
                 return None
-            emb = np.load(emb_path)
-            meta = [json.loads(l) for l in meta_path.read_text(encoding="utf-8").splitlines() if l.strip()]
+            if not segments_complete(self._recall_index_dir, kind, manifest):
+                return None
             id_key = f"{kind}_id"
+            emb, meta = load_index(self._recall_index_dir, kind, manifest, id_key)
             id_to_idx = {m.get(id_key): i for i, m in enumerate(meta) if m.get(id_key)}
             return {"emb": emb, "meta": meta, "id_to_idx": id_to_idx, "manifest": manifest}
         except Exception:
@@ -168,19 +313,15 @@ class RecallSystem:
         self._offline_index_loaded = True
         self._offline_index_ok = False
 
+        # 段文件（base / delta）由 manifest 决定，存在性与完整性在 segments_complete 中检查
         idea_manifest = self._recall_index_dir / "idea_manifest.json"
-        idea_emb = self._recall_index_dir / "idea_emb.npy"
-        idea_meta = self._recall_index_dir / "idea_meta.jsonl"
-
         paper_manifest = self._recall_index_dir / "paper_manifest.json"
-        paper_emb = self._recall_index_dir / "paper_emb.npy"
-        paper_meta = self._recall_index_dir / "paper_meta.jsonl"
 
-        idea_hash = self._file_hash(NODES_IDEA) if NODES_IDEA.exists() else None
-        paper_hash = self._file_hash(NODES_PAPER) if NODES_PAPER.exists() else None
+        idea_hash = fingerprint(NODES_IDEA) if NODES_IDEA.exists() else None
+        paper_hash = fingerprint(NODES_PAPER) if NODES_PAPER.exists() else None
 
-        idea_idx = self._load_index_kind("idea", idea_emb, idea_meta, idea_manifest, idea_hash)
-        paper_idx = self._load_index_kind("paper", paper_emb, paper_meta, paper_manifest, paper_hash)
+        idea_idx = self._load_index_kind("idea", idea_manifest, idea_hash)
+        paper_idx = self._load_index_kind("paper", paper_manifest, paper_hash)
 
         if not idea_idx or not paper_idx:
             self._offline_index_reason = "missing_or_mismatch"
@@ -197,6 +338,8 @@ class RecallSystem:
         self._paper_emb = paper_idx["emb"]
         self._paper_meta = paper_idx["meta"]
         self._paper_id_to_idx = paper_idx["id_to_idx"]
+        self._idea_manifest = idea_idx["manifest"]
+        self._paper_manifest = paper_idx["manifest"]
         self._offline_index_ok = True
         if self.logger:
             self.logger.log_event("recall_offline_index_used", {
@@ -221,12 +364,80 @@ class RecallSystem:
             if idx is None:
                 return None
             idxs.append(idx)
-        return emb[np.array(idxs, dtype=int)]
+        return emb.rows(idxs)
+
+    def _get_dense_searcher(self, kind: str):
+        if kind in self._dense_searchers:
+            return self._dense_searchers[kind]
+        if kind == "idea":
+            emb, manifest = self._idea_emb, self._idea_manifest
+        else:
+            emb, manifest = self._paper_emb, self._paper_manifest
+        searcher = None
+        try:
+            searcher = load_dense_searcher(
+                self._dense_mode,
+                emb,
+                ivf_path=self._recall_index_dir / f"{kind}_ivf.npz",
+                index_manifest=manifest,
+                n_lists=int(PipelineConfig.RECALL_DENSE_IVF_NLIST),
+                nprobe=int(PipelineConfig.RECALL_DENSE_IVF_NPROBE),
+            )
+        except Exception as e:
+            print(f"⚠️  稠密检索初始化失败({kind}): {e}")
+        self._dense_searchers[kind] = searcher
+        return searcher
+
+    def _dense_search(self, user_idea: str, kind: str, k: int):
+        """在离线索引上直接做向量Top-K；不可用时返回None（调用方回退到Jaccard粗排）"""
+        if self._dense_mode == "off":
+            return None
+        reason = None
+        searcher = None
+        if not self._load_offline_index():
+            reason = self._offline_index_reason or "offline_index_unavailable"
+        else:
+            searcher = self._get_dense_searcher(kind)
+            if searcher is None:
+                reason = "searcher_unavailable"
+        query_emb = None
+        if searcher is not None:
+            prefetched = (self._prefetched or {}).get("dense", {}).get(kind)
+            if prefetched is not None:
+                return prefetched
+            query_emb = self._query_embedding(user_idea)
+            if query_emb is None:
+                reason = "query_embedding_failed"
+        if reason:
+            if self.logger:
+                self.logger.log_event("recall_dense_fallback", {
+                    "kind": kind,
+                    "mode": self._dense_mode,
+                    "reason": reason,
+                })
+            return None
+
+        idxs, scores = searcher.search(np.asarray(query_emb, dtype=np.float32), k)
+        return self._dense_results(kind, idxs, scores)
+
+    def _dense_results(self, kind: str, idxs, scores) -> List[Tuple[str, float]]:
+        if kind == "idea":
+            meta, lookup = self._idea_meta, self.idea_id_to_idea
+        else:
+            meta, lookup = self._paper_meta, self.paper_id_to_paper
+        id_key = f"{kind}_id"
+        results = []
+        for idx, score in zip(idxs, scores):
+            item_id = meta[int(idx)].get(id_key)
+            if item_id in lookup:
+                results.append((item_id, float(score)))
+        return results
 
     def _cosine_scores(self, query_emb: np.ndarray, cand_embs: np.ndarray) -> List[float]:
-        # Use float64 to minimize numeric drift vs. per-item cosine computation.
-        q = np.array(query_emb, dtype=float).reshape(-1)
-        c = np.array(cand_embs, dtype=float)
+        # float32 throughout: candidate rows come from a (possibly mmap'd/quantized) index,
+        # so avoid materialising float64 copies.
+        q = np.asarray(query_emb, dtype=np.float32).reshape(-1)
+        c = np.asarray(cand_embs, dtype=np.float32)
         # Edge cases:
         # - no candidates -> empty scores
         # - single candidate returned as 1D vector -> treat as (1, D)
@@ -251,6 +462,7 @@ class RecallSystem:
             if embs is not None:
                 return embs
             time.sleep(self._embed_sleep_sec * (attempt + 1))
+        self._recall_degraded = True
         return None
 
     def _compute_embedding_similarities(self, user_idea: str, candidate_ids: List[str], kind: str) -> List[Tuple[str, float]]:
@@ -262,7 +474,7 @@ class RecallSystem:
         if not self._use_embed_batch:
             return [(cid, self._compute_embedding_similarity(user_idea, text)) for cid, text in zip(candidate_ids, texts)]
 
-        query_emb = self._get_embedding(truncate_for_embedding(user_idea))
+        query_emb = self._query_embedding(user_idea)
         if query_emb is None:
             return [(cid, self._compute_jaccard_similarity(user_idea, text)) for cid, text in zip(candidate_ids, texts)]
 
@@ -321,8 +533,34 @@ class RecallSystem:
         cosine_sim = np.dot(emb1, emb2) / (np.linalg.norm(emb1) * np.linalg.norm(emb2))
         return float(cosine_sim)
 
+    def _query_embedding(self, user_idea: str):
+        """用户Idea的embedding；recall_batch 已批量获取时直接复用"""
+        prefetched = (self._prefetched or {}).get("query_emb")
+        if prefetched is not None:
+            return prefetched
+        return self._get_embedding(truncate_for_embedding(user_idea))
+
+    def _batch_query_embeddings(self, user_ideas: List[str]) -> List:
+        """一次批量请求获取多个Query的embedding；失败的位置为None（逐条回退到 _get_embedding）"""
+        texts = [truncate_for_embedding(t) for t in user_ideas]
+        embs = [None] * len(texts)
+        for i, emb in get_cached_embeddings(texts, logger=self.logger).items():
+            embs[i] = emb
+        # 与 _get_embedding 保持一致：未配置Key时不请求，由逐条路径降级
+        missing = [i for i, emb in enumerate(embs) if emb is None]
+        if missing and os.environ.get('SILICONFLOW_API_KEY', ''):
+            fetched = self._batch_embeddings([texts[i] for i in missing])
+            if fetched is not None:
+                for i, emb in zip(missing, fetched):
+                    embs[i] = emb
+        return embs
+
     def _get_embedding(self, text: str, max_retries: int = 3) -> List[float]:
         """调用SiliconFlow API获取文本embedding"""
+        cached = get_cached_embedding(truncate_for_embedding(text), logger=self.logger)
+        if cached is not None:
+            return cached
+
         api_key = os.environ.get('SILICONFLOW_API_KEY', '')
 
         if not api_key:
@@ -345,7 +583,8 @@ class RecallSystem:
         for attempt in range(max_retries):
             try:
                 start_ts = time.time()
-                response = requests.post(url, headers=headers, json=payload, timeout=10)
+                with get_limiter("embedding"):
+                    response = get_http_session(retry=False).post(url, headers=headers, json=payload, timeout=10)
                 response.raise_for_status()
                 result = response.json()
                 if self.logger:
@@ -362,7 +601,11 @@ class RecallSystem:
                             "latency_ms": int((time.time() - start_ts) * 1000)
                         }
                     )
-                return result['data'][0]['embedding']
+                embedding = result['data'][0]['embedding']
+                cache = get_embedding_cache()
+                if cache is not None:
+                    cache.put(payload["input"], embedding)
+                return embedding
             except Exception as e:
                 if attempt < max_retries - 1:
                     time.sleep(0.5)
@@ -385,52 +628,24 @@ class RecallSystem:
                                 "error": str(e)
                             }
                         )
+                    self._recall_degraded = True
                     return None
 
         return None
 
-    def _get_paper_quality(self, paper: Dict) -> float:
-        """计算Paper的综合质量分数
+    def _rank_papers_by_quality(self, scored: List[Tuple[str, float]], limit: int) -> List[Tuple[str, float, float, float]]:
+        """[(paper_id, sim)] → 按 sim × quality 降序的 [(paper_id, sim, quality, combined)]，过滤 sim <= 0.1
 
-        基于review的评分，归一化到[0, 1]
-        如果没有review数据，返回默认值0.5
+        质量取自按 paper 行对齐的质量数组，加权在候选上一次向量化完成。
         """
-        # 优先使用新结构中的 review_stats.avg_score
-        review_stats = paper.get('review_stats', {})
-
-        if review_stats and review_stats.get('avg_score'):
-            # 已经是 0-1 的分数
-            return float(review_stats['avg_score'])
-
-        # 备选方案：兼容旧结构（review 列表）
-        reviews = paper.get('reviews', [])
-
-        if not reviews:
-            return 0.5  # 默认中等质量
-
-        # 提取所有评分
-        scores = []
-        for review in reviews:
-            score_str = review.get('overall_score', '')
-            # 尝试解析评分（可能是 "7", "7/10", "7.0" 等格式）
-            try:
-                if '/' in score_str:
-                    score_str = score_str.split('/')[0]
-                score = float(score_str.strip())
-                scores.append(score)
-            except (ValueError, AttributeError):
-                continue
-
-        if not scores:
-            return 0.5
-
-        # 计算平均分并归一化
-        import numpy as np
-        avg_score = np.mean(scores)
-        # 假设评分范围是 1-10，归一化到 [0, 1]
-        normalized_score = (avg_score - 1) / 9
-
-        return min(max(normalized_score, 0.0), 1.0)
+        kept = [(paper_id, sim) for paper_id, sim in scored if sim > 0.1]  # 过滤低相似度
+        if not kept:
+            return []
+        sims = np.asarray([sim for _, sim in kept], dtype=np.float64)
+        quality = self._paper_quality.quality_of([paper_id for paper_id, _ in kept])
+        combined = sims * quality
+        order = np.argsort(-combined, kind="stable")[:limit]
+        return [(kept[i][0], float(sims[i]), float(quality[i]), float(combined[i])) for i in order.tolist()]
 
     # ===================== 路径1: Idea → Idea → Pattern =====================
 
@@ -449,22 +664,40 @@ class RecallSystem:
         """
         print("\n🔍 [路径1] 相似Idea召回...")
 
-        # Step 1: 粗排 - 使用Jaccard快速筛选
+        dense = None
         if RecallConfig.TWO_STAGE_RECALL and RecallConfig.USE_EMBEDDING:
+            dense = self._dense_search(user_idea, "idea", RecallConfig.COARSE_RECALL_SIZE)
+
+        if dense is not None:
+            # 稠密召回: 离线索引上的向量Top-K即为Embedding相似度，无需Jaccard粗排
+            print(f"  [稠密] 在离线索引上检索Top-{RecallConfig.COARSE_RECALL_SIZE} ({self._dense_mode})...")
+            candidates = dense
+            self._last_path1_candidates = candidates
+            top_ideas = [(idea_id, sim) for idea_id, sim in candidates if sim > 0][:RecallConfig.PATH1_TOP_K_IDEAS]
+            self._last_path1_top_ideas = top_ideas
+            print(f"  ✓ 稠密检索{len(candidates)}个 → 最终{len(top_ideas)}个")
+        # Step 1: 粗排 - 使用Jaccard快速筛选
+        elif RecallConfig.TWO_STAGE_RECALL and RecallConfig.USE_EMBEDDING:
             print(f"  [粗排] 使用Jaccard快速筛选Top-{RecallConfig.COARSE_RECALL_SIZE}...")
-            coarse_similarities = []
             user_tokens = to_token_set(user_idea)
-            for idea in self.ideas:
-                idea_id = idea.get("idea_id")
-                if self._use_token_cache and idea_id in self._idea_token_sets:
-                    sim = jaccard_from_sets(user_tokens, self._idea_token_sets[idea_id])
-                else:
-                    sim = self._compute_jaccard_similarity(user_idea, idea.get('description', ''))
-                if sim > 0:
-                    coarse_similarities.append((idea['idea_id'], sim))
-
-            coarse_similarities.sort(key=lambda x: x[1], reverse=True)
-            candidates = coarse_similarities[:RecallConfig.COARSE_RECALL_SIZE]
+            if self._use_token_cache and self._idea_inv_index is not None:
+                candidates, coarse_total = self._idea_inv_index.top_jaccard(
+                    user_tokens, RecallConfig.COARSE_RECALL_SIZE
+                )
+            else:
+                coarse_similarities = []
+                for idea in self.ideas:
+                    idea_id = idea.get("idea_id")
+                    if self._use_token_cache and idea_id in self._idea_token_sets:
+                        sim = jaccard_from_sets(user_tokens, self._idea_token_sets[idea_id])
+                    else:
+                        sim = self._compute_jaccard_similarity(user_idea, idea.get('description', ''))
+                    if sim > 0:
+                        coarse_similarities.append((idea['idea_id'], sim))
+
+                coarse_similarities.sort(key=lambda x: x[1], reverse=True)
+                candidates = coarse_similarities[:RecallConfig.COARSE_RECALL_SIZE]
+                coarse_total = len(coarse_similarities)
             self._last_path3_candidates = candidates
             self._last_path1_candidates = candidates
 
@@ -481,7 +714,7 @@ class RecallSystem:
             top_ideas = fine_similarities[:RecallConfig.PATH1_TOP_K_IDEAS]
             self._last_path1_top_ideas = top_ideas
 
-            print(f"  ✓ 粗排{len(coarse_similarities)}个 → 精排{len(candidates)}个 → 最终{len(top_ideas)}个")
+            print(f"  ✓ 粗排{coarse_total}个 → 精排{len(candidates)}个 → 最终{len(top_ideas)}个")
         else:
             # 单阶段召回（原逻辑）
             similarities = []
@@ -521,6 +754,17 @@ class RecallSystem:
 
     # ===================== 路径2: Idea → Domain → Pattern =====================
 
+    def _idea_domains(self, idea_id: str) -> List[Tuple[str, float]]:
+        """Idea -[belongs_to]-> Domain 的 (domain_id, weight)，保持图谱中的邻接顺序"""
+        adjacency = self._adjacency
+        row = adjacency.index_of(idea_id)
+        if row is None:
+            return []
+        belongs_to = adjacency.csr('belongs_to')
+        domain_idx, edges = belongs_to.row(row)
+        weights = belongs_to.column('weight', 0.5)[edges]
+        return [(adjacency.node_ids[d], w) for d, w in zip(domain_idx.tolist(), weights.tolist())]
+
     def _recall_path2_domain_patterns(self, user_idea: str, top_ideas: List[Tuple[str, float]] = None) -> Dict[str, float]:
         """路径2: 通过领域相关性召回Pattern
 
@@ -545,13 +789,8 @@ class RecallSystem:
             top_idea_id = top_ideas[0][0]
             top_idea = self.idea_id_to_idea.get(top_idea_id)
 
-            if top_idea and self.G.has_node(top_idea['idea_id']):
-                for successor in self.G.successors(top_idea['idea_id']):
-                    edge_data = self.G[top_idea['idea_id']][successor]
-                    if edge_data.get('relation') == 'belongs_to':
-                        domain_id = successor
-                        weight = edge_data.get('weight', 0.5)
-                        domain_scores.append((domain_id, weight))
+            if top_idea:
+                domain_scores.extend(self._idea_domains(top_idea['idea_id']))
 
         # Fallback: 如果没有找到Domain，重新计算最相似的Idea
         if not domain_scores:
@@ -567,12 +806,7 @@ class RecallSystem:
 
             if top_idea:
                 # 通过图谱找到Idea的Domain
-                for successor in self.G.successors(top_idea['idea_id']):
-                    edge_data = self.G[top_idea['idea_id']][successor]
-                    if edge_data.get('relation') == 'belongs_to':
-                        domain_id = successor
-                        weight = edge_data.get('weight', 0.5)
-                        domain_scores.append((domain_id, weight))
+                domain_scores.extend(self._idea_domains(top_idea['idea_id']))
 
         # Step 2: 排序并选择Top-K Domain
         domain_scores.sort(key=lambda x: x[1], reverse=True)
@@ -583,7 +817,9 @@ class RecallSystem:
         print(f"  找到 {len(domain_scores)} 个相关Domain，选择Top-{RecallConfig.PATH2_TOP_K_DOMAINS}")
 
         # Step 3: 从这些Domain中找Pattern
-        pattern_scores = defaultdict(float)
+        adjacency = self._adjacency
+        domain_rows = []
+        domain_weights = []
 
         for domain_id, domain_weight in top_domains:
             domain = self.domain_id_to_domain.get(domain_id)
@@ -602,17 +838,23 @@ class RecallSystem:
             if sub_domain_str:
                 print(f"    子领域: {sub_domain_str}")
 
-            # 找到在该Domain中表现好的Pattern
-            for predecessor in self.G.predecessors(domain_id):
-                edge_data = self.G[predecessor][domain_id]
-                if edge_data.get('relation') == 'works_well_in':
-                    pattern_id = predecessor
-                    effectiveness = edge_data.get('effectiveness', 0.0)
-                    confidence = edge_data.get('confidence', 0.0)
-
-                    # 得分 = Domain相关度 × 效果 × 置信度
-                    score = domain_weight * max(effectiveness, 0.1) * confidence
-                    pattern_scores[pattern_id] += score
+            row = adjacency.index_of(domain_id)
+            if row is not None:
+                domain_rows.append(row)
+                domain_weights.append(domain_weight)
+
+        # 找到在这些Domain中表现好的Pattern (works_well_in 反向邻接)
+        # 得分 = Domain相关度 × 效果 × 置信度
+        works_well_in = adjacency.csr('works_well_in', reverse=True)
+        pattern_idx, scores = works_well_in.vecmat(
+            domain_rows,
+            domain_weights,
+            factors=(
+                np.maximum(works_well_in.column('effectiveness', 0.0), 0.1),
+                works_well_in.column('confidence', 0.0),
+            ),
+        )
+        pattern_scores = dict(zip([adjacency.node_ids[i] for i in pattern_idx.tolist()], scores.tolist()))
 
         # 排序并只保留Top-K个Pattern（避免召回过多）
         sorted_patterns = sorted(pattern_scores.items(), key=lambda x: x[1], reverse=True)
@@ -640,60 +882,68 @@ class RecallSystem:
         """
         print("\n📄 [路径3] 相似Paper召回...")
 
-        # Step 1: 粗排 - 使用Jaccard快速筛选
+        dense = None
         if RecallConfig.TWO_STAGE_RECALL and RecallConfig.USE_EMBEDDING:
+            dense = self._dense_search(user_idea, "paper", RecallConfig.COARSE_RECALL_SIZE)
+
+        if dense is not None:
+            # 稠密召回: 候选池直接来自向量Top-K，再按Paper质量加权
+            print(f"  [稠密] 在离线索引上检索Top-{RecallConfig.COARSE_RECALL_SIZE} ({self._dense_mode})...")
+            candidates = [
+                (paper_id, sim) for paper_id, sim in dense
+                if self.paper_id_to_paper[paper_id].get('title')
+            ]
+            self._last_path3_candidates = candidates
+            top_papers = self._rank_papers_by_quality(candidates, RecallConfig.PATH3_TOP_K_PAPERS)
+
+            print(f"  ✓ 稠密检索{len(candidates)}个 → 最终{len(top_papers)}个")
+        # Step 1: 粗排 - 使用Jaccard快速筛选
+        elif RecallConfig.TWO_STAGE_RECALL and RecallConfig.USE_EMBEDDING:
             print(f"  [粗排] 使用Jaccard快速筛选Top-{RecallConfig.COARSE_RECALL_SIZE}...")
-            coarse_similarities = []
             user_tokens = to_token_set(user_idea)
-
-            for paper in self.papers:
-                paper_title = paper.get('title', '')
-                if not paper_title:
-                    continue
-
-                paper_id = paper.get("paper_id")
-                if self._use_token_cache and paper_id in self._paper_token_sets:
-                    sim = jaccard_from_sets(user_tokens, self._paper_token_sets[paper_id])
-                else:
-                    sim = self._compute_jaccard_similarity(user_idea, paper_title)
-                if sim > 0.05:  # 降低阈值以保留更多候选
-                    coarse_similarities.append((paper['paper_id'], sim))
-
-            coarse_similarities.sort(key=lambda x: x[1], reverse=True)
-            candidates = coarse_similarities[:RecallConfig.COARSE_RECALL_SIZE]
+            if self._use_token_cache and self._paper_inv_index is not None:
+                # 降低阈值(0.05)以保留更多候选
+                candidates, coarse_total = self._paper_inv_index.top_jaccard(
+                    user_tokens, RecallConfig.COARSE_RECALL_SIZE, min_score=0.05
+                )
+            else:
+                coarse_similarities = []
+                for paper in self.papers:
+                    paper_title = paper.get('title', '')
+                    if not paper_title:
+                        continue
+
+                    paper_id = paper.get("paper_id")
+                    if self._use_token_cache and paper_id in self._paper_token_sets:
+                        sim = jaccard_from_sets(user_tokens, self._paper_token_sets[paper_id])
+                    else:
+                        sim = self._compute_jaccard_similarity(user_idea, paper_title)
+                    if sim > 0.05:  # 降低阈值以保留更多候选
+                        coarse_similarities.append((paper['paper_id'], sim))
+
+                coarse_similarities.sort(key=lambda x: x[1], reverse=True)
+                candidates = coarse_similarities[:RecallConfig.COARSE_RECALL_SIZE]
+                coarse_total = len(coarse_similarities)
 
             print(f"  [精排] 使用Embedding重排Top-{RecallConfig.PATH3_TOP_K_PAPERS}...")
             # Step 2: 精排 - 对候选使用Embedding重新计算
-            fine_similarities = []
             candidate_ids = [paper_id for paper_id, _ in candidates]
             sims = self._compute_embedding_similarities(user_idea, candidate_ids, kind="paper")
-            for paper_id, sim in sims:
-                if sim > 0.1:  # 过滤低相似度
-                    paper = self.paper_id_to_paper[paper_id]
-                    quality = self._get_paper_quality(paper)
-                    combined_weight = sim * quality
-                    fine_similarities.append((paper_id, sim, quality, combined_weight))
+            top_papers = self._rank_papers_by_quality(sims, RecallConfig.PATH3_TOP_K_PAPERS)
 
-            fine_similarities.sort(key=lambda x: x[3], reverse=True)
-            top_papers = fine_similarities[:RecallConfig.PATH3_TOP_K_PAPERS]
-
-            print(f"  ✓ 粗排{len(coarse_similarities)}个 → 精排{len(candidates)}个 → 最终{len(top_papers)}个")
+            print(f"  ✓ 粗排{coarse_total}个 → 精排{len(candidates)}个 → 最终{len(top_papers)}个")
         else:
             # 单阶段召回（原逻辑）
-            similarities = []
+            scored = []
 
             for paper in self.papers:
                 paper_title = paper.get('title', '')
                 if not paper_title:
                     continue
 
-                sim = self._compute_text_similarity(user_idea, paper_title)
-                if sim > 0.1:  # 过滤低相似度
-                    quality = self._get_paper_quality(paper)
-                    combined_weight = sim * quality
-                    similarities.append((paper['paper_id'], sim, quality, combined_weight))
+                scored.append((paper['paper_id'], self._compute_text_similarity(user_idea, paper_title)))
 
-            similarities.sort(key=lambda x: x[3], reverse=True)
+            similarities = self._rank_papers_by_quality(scored, len(scored))
             top_papers = similarities[:RecallConfig.PATH3_TOP_K_PAPERS]
             self._last_path3_candidates = similarities[:RecallConfig.COARSE_RECALL_SIZE]
 
@@ -703,7 +953,9 @@ class RecallSystem:
         self._last_path3_top_papers = top_papers
 
         # Step 3: 收集Pattern
-        pattern_scores = defaultdict(float)
+        adjacency = self._adjacency
+        paper_rows = []
+        paper_weights = []
 
         for paper_id, similarity, quality, combined_weight in top_papers:
             paper = self.paper_id_to_paper.get(paper_id, {})
@@ -719,18 +971,19 @@ class RecallSystem:
             print(f"    标题: {title}")
 
             # 从图谱中找到Paper使用的Pattern
-            if not self.G.has_node(paper_id):
-                continue
-
-            for successor in self.G.successors(paper_id):
-                edge_data = self.G[paper_id][successor]
-                if edge_data.get('relation') == 'uses_pattern':
-                    pattern_id = successor
-                    pattern_quality = edge_data.get('quality', 0.5)
-
-                    # 得分 = Paper相似度 × Paper质量 × Pattern质量
-                    score = combined_weight * pattern_quality
-                    pattern_scores[pattern_id] += score
+            row = adjacency.index_of(paper_id)
+            if row is not None:
+                paper_rows.append(row)
+                paper_weights.append(combined_weight)
+
+        # 得分 = Paper相似度 × Paper质量 × Pattern质量 (uses_pattern 邻接)
+        uses_pattern = adjacency.csr('uses_pattern')
+        pattern_idx, scores = uses_pattern.vecmat(
+            paper_rows,
+            paper_weights,
+            factors=(uses_pattern.column('quality', 0.5),),
+        )
+        pattern_scores = dict(zip([adjacency.node_ids[i] for i in pattern_idx.tolist()], scores.tolist()))
 
         # 排序并只保留Top-K个Pattern
         sorted_patterns = sorted(pattern_scores.items(), key=lambda x: x[1], reverse=True)
@@ -752,11 +1005,49 @@ class RecallSystem:
         ranked = sorted(d.items(), key=lambda x: x[1], reverse=True)[:n]
         return [{key_name: k, "score": v} for k, v in ranked]
 
+    # ===================== 召回结果缓存 =====================
+
+    _CACHED_STATE = ("_last_path1_candidates", "_last_path1_top_ideas", "_last_path2_top_domains",
+                     "_last_path3_candidates", "_last_path3_top_papers")
+
+    def _recall_cache_context(self) -> Dict:
+        """缓存键中除Idea文本外的部分：召回参数 + 索引/节点版本（同一实例内数据不变，只计算一次）"""
+        if self._recall_cache_ctx is None:
+            offline_ok = self._load_offline_index()
+            self._recall_cache_ctx = {
+                **recall_config_context(),
+                "embedding_enabled": bool(os.environ.get('SILICONFLOW_API_KEY', '')),
+                "use_embed_batch": self._use_embed_batch,
+                "dense": [self._dense_mode, PipelineConfig.RECALL_DENSE_IVF_NLIST,
+                          PipelineConfig.RECALL_DENSE_IVF_NPROBE],
+                "offline_index": [self._idea_manifest, self._paper_manifest] if offline_ok else None,
+                "sources": {k: fingerprint(p) if Path(p).exists() else None
+                            for k, p in self._snapshot_sources().items()},
+            }
+        return self._recall_cache_ctx
+
+    def _recall_from_cache(self, entry: Dict, verbose: bool) -> List[Tuple[str, Dict, float]]:
+        # 全部字段都覆盖（包括缓存中为 None 的），避免残留上一次召回的中间结果
+        for name in self._CACHED_STATE:
+            setattr(self, name, entry["state"].get(name))
+        results = [(pattern_id, self.pattern_id_to_pattern.get(pattern_id, {}), score)
+                   for pattern_id, score in entry["results"]]
+        print(f"♻️  命中召回缓存，跳过三路召回 (Top-{len(results)})")
+        if verbose:
+            self._print_results(results, *entry["path_scores"])
+        self.last_audit = entry["audit"]
+        if self.logger:
+            self.logger.log_event("recall_cache_hit", {"top_k": len(results)})
+            self.logger.log_event("recall_end", {"top_k": len(results)})
+        return results
+
     # ===================== 多路融合 =====================
 
     def recall(self, user_idea: str, verbose: bool = True) -> List[Tuple[str, Dict, float]]:
         """三路召回融合
 
+        相同（规范化后的）Idea在参数与索引版本不变时直接返回召回缓存中的结果。
+
         Args:
             user_idea: 用户输入的Idea描述
             verbose: 是否打印详细信息
@@ -771,6 +1062,17 @@ class RecallSystem:
         if self.logger:
             self.logger.log_event("recall_start", {"user_idea": user_idea})
 
+        self._recall_degraded = False
+        cache = get_recall_cache()
+        if cache is not None:
+            prefetched = self._prefetched or {}
+            if prefetched.get("cache_checked"):
+                entry = prefetched.get("cached")
+            else:
+                entry = cache.get(user_idea, self._recall_cache_context())
+            if entry is not None:
+                return self._recall_from_cache(entry, verbose)
+
         # 路径1: 相似Idea召回
         path1_scores, top_ideas = self._recall_path1_similar_ideas(user_idea)
 
@@ -886,11 +1188,85 @@ class RecallSystem:
         else:
             self.last_audit = None
 
+        if cache is not None and not self._recall_degraded:
+            cache.put(user_idea, self._recall_cache_context(), {
+                "results": [(pattern_id, score) for pattern_id, _info, score in results],
+                "path_scores": (path1_scores, path2_scores, path3_scores),
+                "audit": self.last_audit,
+                "state": {name: getattr(self, name, None) for name in self._CACHED_STATE},
+            })
+
         if self.logger:
             self.logger.log_event("recall_end", {"top_k": len(results)})
 
         return results
 
+    def recall_batch(self, user_ideas: List[str], verbose: bool = False) -> List[List[Tuple[str, Dict, float]]]:
+        """批量三路召回（离线批量评估用）
+
+        所有Query的embedding通过一次批量请求获取；稠密模式下每个索引对所有Query只做一次矩阵乘。
+        路径2的图遍历与逐条召回共用。结果与逐个调用 recall 一致（稠密模式下
+        批量矩阵乘的 float32 分数在末位可能不同，稠密分数按 1e-6 舍入后排序、同分按行号，
+        召回分数差异 < 1e-6）。
+
+        Args:
+            user_ideas: 多个用户Idea描述
+            verbose: 是否打印每个Idea的详细结果
+
+        Returns:
+            与 user_ideas 一一对应的 recall 结果列表
+        """
+        user_ideas = list(user_ideas)
+        if not user_ideas:
+            return []
+
+        # 已缓存的Idea不再请求embedding / 稠密检索
+        cached = {}
+        cache = get_recall_cache()
+        if cache is not None:
+            cached = cache.get_many(user_ideas, self._recall_cache_context())
+        pending = [i for i in range(len(user_ideas)) if i not in cached]
+
+        query_embs = [None] * len(user_ideas)
+        if RecallConfig.USE_EMBEDDING and pending:
+            for i, emb in zip(pending, self._batch_query_embeddings([user_ideas[i] for i in pending])):
+                query_embs[i] = emb
+
+        dense = [{} for _ in user_ideas]
+        rows = [i for i, emb in enumerate(query_embs) if emb is not None]
+        if (self._dense_mode != "off" and RecallConfig.TWO_STAGE_RECALL and RecallConfig.USE_EMBEDDING
+                and rows and self._load_offline_index()):
+            queries = np.asarray([query_embs[i] for i in rows], dtype=np.float32)
+            for kind in ("idea", "paper"):
+                searcher = self._get_dense_searcher(kind)
+                if searcher is None:
+                    continue
+                hits = searcher.search_batch(queries, RecallConfig.COARSE_RECALL_SIZE)
+                for i, (idxs, scores) in zip(rows, hits):
+                    dense[i][kind] = self._dense_results(kind, idxs, scores)
+
+        if self.logger:
+            self.logger.log_event("recall_batch", {
+                "size": len(user_ideas),
+                "query_embeddings": len(rows),
+                "cache_hits": len(cached),
+                "dense_mode": self._dense_mode,
+            })
+
+        results = []
+        for i, user_idea in enumerate(user_ideas):
+            self._prefetched = {
+                "query_emb": query_embs[i],
+                "dense": dense[i],
+                "cache_checked": cache is not None,
+                "cached": cached.get(i),
+            }
+            try:
+                results.append(self.recall(user_idea, verbose=verbose))
+            finally:
+                self._prefetched = None
+        return results
+
     def _print_results(self, results: List[Tuple[str, Dict, float]],
                       path1_scores: Dict, path2_scores: Dict, path3_scores: Dict):
         """打印召回结果"""
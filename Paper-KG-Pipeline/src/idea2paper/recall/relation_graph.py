@@ -0,0 +1,232 @@
+"""
+Array-backed adjacency for the recall relations of the knowledge graph.
+
+RelationGraph keeps the edges of belongs_to / works_well_in / uses_pattern as
+flat arrays (src, dst, relation, one float column per edge attribute) and
+exposes the small networkx DiGraph surface RecallSystem used to rely on.
+`csr(relation)` gives one CSR matrix per relation (rows = source nodes, or
+target nodes with reverse=True) whose `vecmat` turns the per-edge pattern
+aggregation of recall paths 2 and 3 into a sparse vector x sparse matrix product.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+RECALL_RELATIONS = ("belongs_to", "works_well_in", "uses_pattern")
+EDGE_ATTRS = ("weight", "effectiveness", "confidence", "quality")
+
+
+class RelationCSR:
+    """One relation as a CSR matrix; each edge carries one value per attribute column.
+
+    Within a row, edges keep the source graph's neighbour order.
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: Dict[str, np.ndarray]):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self._columns = {}
+
+    @property
+    def nnz(self) -> int:
+        return int(self.indices.shape[0])
+
+    def column(self, name: str, default: float) -> np.ndarray:
+        """Attribute column with missing values (NaN) replaced by the networkx .get default."""
+        key = (name, default)
+        if key not in self._columns:
+            col = self.data[name]
+            self._columns[key] = np.where(np.isnan(col), default, col)
+        return self._columns[key]
+
+    def row(self, i: int) -> Tuple[np.ndarray, slice]:
+        """(target node indices, edge slice) of row i."""
+        start, end = int(self.indptr[i]), int(self.indptr[i + 1])
+        return self.indices[start:end], slice(start, end)
+
+    def vecmat(self, rows: Sequence[int], coefs: Sequence[float],
+               factors: Sequence[np.ndarray] = ()) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse vector x matrix: sum over rows r and their edges e of coefs[r] * factors[0][e] * ...
+
+        Products are formed left to right and summed in row/edge order, i.e. the
+        same floating point operations as the equivalent Python loop. Returns
+        (target node indices in first-touch order, scores).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        coefs = np.asarray(coefs, dtype=np.float64)
+        starts = self.indptr[rows]
+        lens = self.indptr[rows + 1] - starts
+        total = int(lens.sum())
+        if total == 0:
+            return np.zeros((0,), dtype=np.int64), np.zeros((0,), dtype=np.float64)
+        # edge ids of all selected rows, row by row
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lens)[:-1]]), lens)
+        edges = np.arange(total, dtype=np.int64) + offsets
+        contrib = np.repeat(coefs, lens)
+        for factor in factors:
+            contrib = contrib * factor[edges]
+        cols = self.indices[edges]
+        uniq, first, inverse = np.unique(cols, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(order.shape[0])
+        sums = np.bincount(rank[inverse.reshape(-1)], weights=contrib, minlength=uniq.shape[0])
+        return uniq[order], sums
+
+
+def _atomic_savez(path: Path, arrays: Dict[str, np.ndarray]):
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+class RelationGraph:
+    """Read-only directed graph over the recall relations.
+
+    Implements the part of the networkx DiGraph API used by RecallSystem
+    (has_node / successors / predecessors / G[u][v]); successor and predecessor
+    order matches the source graph, so traversals visit edges in the same order.
+    """
+
+    def __init__(self, node_ids: Sequence[str], src: np.ndarray, dst: np.ndarray, rel: np.ndarray,
+                 attrs: Dict[str, np.ndarray], pred_order: np.ndarray, relations: Sequence[str]):
+        self.node_ids = list(node_ids)
+        self.src = np.asarray(src, dtype=np.int64)
+        self.dst = np.asarray(dst, dtype=np.int64)
+        self.rel = np.asarray(rel, dtype=np.int64)
+        self.attrs = {k: np.asarray(v, dtype=np.float64) for k, v in attrs.items()}
+        self.relations = list(relations)
+        self._index = {n: i for i, n in enumerate(self.node_ids)}
+        self._csr = {}
+        n = len(self.node_ids)
+        self._succ = np.argsort(self.src, kind="stable")
+        self._succ_off = np.concatenate([[0], np.cumsum(np.bincount(self.src, minlength=n))])
+        pred_order = np.asarray(pred_order, dtype=np.int64)
+        self._pred = pred_order[np.argsort(self.dst[pred_order], kind="stable")]
+        self._pred_off = np.concatenate([[0], np.cumsum(np.bincount(self.dst, minlength=n))])
+
+    @classmethod
+    def from_networkx(cls, G, relations: Sequence[str] = RECALL_RELATIONS) -> "RelationGraph":
+        rel_code = {r: i for i, r in enumerate(relations)}
+        node_ids = list(G.nodes())
+        index = {n: i for i, n in enumerate(node_ids)}
+        src, dst, rel = [], [], []
+        attrs = {k: [] for k in EDGE_ATTRS}
+        edge_pos = {}
+        for u, v, data in G.edges(data=True):
+            code = rel_code.get(data.get("relation"))
+            if code is None:
+                continue
+            edge_pos[(u, v)] = len(src)
+            src.append(index[u])
+            dst.append(index[v])
+            rel.append(code)
+            for k in EDGE_ATTRS:
+                val = data.get(k)
+                attrs[k].append(float(val) if val is not None else np.nan)
+        pred_order = []
+        for v in node_ids:
+            for u in G.predecessors(v):
+                pos = edge_pos.get((u, v))
+                if pos is not None:
+                    pred_order.append(pos)
+        return cls(
+            node_ids,
+            np.asarray(src, dtype=np.int64),
+            np.asarray(dst, dtype=np.int64),
+            np.asarray(rel, dtype=np.int8),
+            {k: np.asarray(v, dtype=np.float64) for k, v in attrs.items()},
+            np.asarray(pred_order, dtype=np.int64),
+            relations,
+        )
+
+    def save(self, path: Path):
+        arrays = {
+            "node_ids": np.asarray(self.node_ids, dtype=str),
+            "src": self.src.astype(np.int32),
+            "dst": self.dst.astype(np.int32),
+            "rel": self.rel.astype(np.int8),
+            "pred_order": self._pred.astype(np.int32),
+            "relations": np.asarray(self.relations, dtype=str),
+        }
+        for k, v in self.attrs.items():
+            arrays[f"attr_{k}"] = v
+        _atomic_savez(path, arrays)
+
+    @classmethod
+    def load(cls, path: Path) -> "RelationGraph":
+        with np.load(path) as data:
+            attrs = {k[len("attr_"):]: data[k] for k in data.files if k.startswith("attr_")}
+            return cls(
+                data["node_ids"].tolist(),
+                data["src"],
+                data["dst"],
+                data["rel"],
+                attrs,
+                data["pred_order"],
+                data["relations"].tolist(),
+            )
+
+    def _node(self, n) -> int:
+        idx = self._index.get(n)
+        if idx is None:
+            raise KeyError(f"The node {n} is not in the graph.")
+        return idx
+
+    def _edge_attrs(self, e: int) -> Dict:
+        out = {"relation": self.relations[int(self.rel[e])]}
+        for k, col in self.attrs.items():
+            val = col[e]
+            if not np.isnan(val):
+                out[k] = float(val)
+        return out
+
+    def index_of(self, n):
+        """Row/column index of node n, or None."""
+        return self._index.get(n)
+
+    def csr(self, relation: str, reverse: bool = False) -> RelationCSR:
+        """CSR matrix of one relation; reverse=True indexes rows by target node (predecessor order)."""
+        key = (relation, reverse)
+        if key not in self._csr:
+            edges = self._pred if reverse else self._succ
+            if relation in self.relations:
+                edges = edges[self.rel[edges] == self.relations.index(relation)]
+            else:
+                edges = edges[:0]
+            rows = (self.dst if reverse else self.src)[edges]
+            cols = (self.src if reverse else self.dst)[edges]
+            indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(self.node_ids)))]).astype(np.int64)
+            self._csr[key] = RelationCSR(indptr, cols, {k: v[edges] for k, v in self.attrs.items()})
+        return self._csr[key]
+
+    def has_node(self, n) -> bool:
+        return n in self._index
+
+    __contains__ = has_node
+
+    def successors(self, n):
+        i = self._node(n)
+        edges = self._succ[self._succ_off[i]:self._succ_off[i + 1]]
+        return iter([self.node_ids[d] for d in self.dst[edges].tolist()])
+
+    def predecessors(self, n):
+        i = self._node(n)
+        edges = self._pred[self._pred_off[i]:self._pred_off[i + 1]]
+        return iter([self.node_ids[s] for s in self.src[edges].tolist()])
+
+    def __getitem__(self, u) -> Dict[str, Dict]:
+        i = self._node(u)
+        edges = self._succ[self._succ_off[i]:self._succ_off[i + 1]]
+        return {self.node_ids[int(self.dst[e])]: self._edge_attrs(int(e)) for e in edges}
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+    def number_of_edges(self) -> int:
+        return int(self.src.shape[0])